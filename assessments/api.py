@@ -0,0 +1,195 @@
+from django.contrib.auth import get_user_model
+from django.db import IntegrityError
+from django.shortcuts import get_object_or_404
+from django.urls import path
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.exceptions import NotFound, PermissionDenied, ValidationError
+from rest_framework.generics import ListAPIView
+from rest_framework.pagination import CursorPagination
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from . import inflight
+from .models import SyncCursor
+from .itembank import MissingItemsError, bank
+from .items import math_questions, memory_sequence, new_seed, reading_passage
+from .serializers import KINDS, SESSION_SERIALIZERS, SUBMIT_SERIALIZERS, BulkSubmitSerializer
+from .services import (
+	SESSION_MODELS,
+	draw_bank_items,
+	import_sessions,
+	submit_choices,
+	submit_math,
+	submit_memory,
+	submit_reading,
+)
+from .sync import SyncError, apply_batch, iter_lines
+
+
+def _kind(kind: str) -> str:
+	if kind not in KINDS:
+		raise NotFound(f"Unknown test kind {kind!r}")
+	return kind
+
+
+def _bank_item(item) -> dict:
+	# Answers stay on the server
+	return {"id": item.id, "prompt": item.prompt, "options": list(item.options)}
+
+
+class StartTestView(APIView):
+	"""POST: start a test of ``kind`` and return its content (never the answers)."""
+
+	def post(self, request, kind: str):
+		kind = _kind(kind)
+		user = request.user
+		model = SESSION_MODELS[kind]
+		seed = new_seed()
+		item_ids = ()
+		if kind == "math":
+			questions = math_questions(seed)
+			session = model.objects.create(user=user, seed=seed, num_total=len(questions))
+			content = {"questions": questions}
+		elif kind == "memory":
+			sequence = memory_sequence(seed)
+			session = model.objects.create(user=user, seed=seed, num_total=len(sequence))
+			content = {"sequence": sequence}
+		elif kind == "reading":
+			passage = reading_passage(seed)
+			session = model.objects.create(user=user, passage=passage)
+			content = {"passage": passage}
+		else:
+			items = draw_bank_items(user, kind, 5 if kind == "grammar" else 1, seed)
+			extra = {"scenario_text": items[0].stimulus if items else ""} if kind == "scenario" else {}
+			session = model.objects.create(user=user, num_total=len(items), **extra)
+			item_ids = [item.id for item in items]
+			content = {"items": [_bank_item(item) for item in items]}
+			if kind == "scenario":
+				content["text"] = extra["scenario_text"]
+		inflight.begin(user, kind, session.id, seed, item_ids)
+		return Response({"kind": kind, "session_id": session.id, **content}, status=status.HTTP_201_CREATED)
+
+
+class SubmitTestView(APIView):
+	"""POST: grade the in-flight test of ``kind`` and return the finished session."""
+
+	def post(self, request, kind: str):
+		kind = _kind(kind)
+		user = request.user
+		state = inflight.current(user, kind)
+		if state is None or state.session_id != request.data.get("session_id"):
+			raise ValidationError({"session_id": "no such test in progress"})
+		serializer = SUBMIT_SERIALIZERS[kind](data=request.data)
+		serializer.is_valid(raise_exception=True)
+		data = serializer.validated_data
+		session = get_object_or_404(SESSION_MODELS[kind], id=state.session_id, user=user)
+		duration = int(max(0, timezone.now().timestamp() - state.started_ts))
+		if kind == "math":
+			submit_math(session, data["answers"], duration)
+		elif kind == "memory":
+			submit_memory(session, data["response"], duration)
+		elif kind == "reading":
+			submit_reading(session, data["transcript"], duration)
+		else:
+			try:
+				items = bank.items(state.item_ids)
+			except MissingItemsError:
+				inflight.finish(user, kind)
+				raise ValidationError({"session_id": "a question in this test was removed; start a new one"})
+			submit_choices(session, kind, items, data["answers"], duration)
+		inflight.finish(user, kind)
+		return Response(SESSION_SERIALIZERS[kind](session).data)
+
+
+class BulkSubmitView(APIView):
+	"""POST ``{"sessions": [...]}``: store many completed offline sessions at once.
+
+	Staff may set ``user_id`` per session (a classroom device syncing for its
+	students); everyone else can only submit their own.
+	"""
+
+	def post(self, request):
+		serializer = BulkSubmitSerializer(data=request.data)
+		serializer.is_valid(raise_exception=True)
+		records = serializer.validated_data["sessions"]
+		for record in records:
+			user_id = record.get("user_id", request.user.pk)
+			if user_id != request.user.pk and not request.user.is_staff:
+				raise PermissionDenied("Only staff can submit sessions for other users.")
+			record["user_id"] = user_id
+		user_ids = {record["user_id"] for record in records}
+		if get_user_model().objects.filter(pk__in=user_ids).count() != len(user_ids):
+			raise ValidationError({"user_id": "unknown user"})
+		created = import_sessions(records)
+		return Response({"created": created}, status=status.HTTP_201_CREATED)
+
+
+def _device(request) -> str:
+	device = request.query_params.get("device", "")
+	if not 0 < len(device) <= 64:
+		raise ValidationError({"device": "a device id of 1-64 characters is required"})
+	return device
+
+
+class SyncView(APIView):
+	"""Offline-first sync for one device, named by ``?device=``.
+
+	GET returns the device's watermark. POST takes an NDJSON batch (send
+	``Content-Encoding: gzip`` when compressed), one session per line with an
+	idempotency ``key`` and a per-device ``seq``; re-sent keys are skipped.
+	"""
+
+	def get(self, request):
+		device = _device(request)
+		cursor = SyncCursor.objects.filter(user=request.user, device=device).first()
+		return Response({"device": device, "watermark": cursor.watermark if cursor else 0})
+
+	def post(self, request):
+		device = _device(request)
+		if request.stream is None:
+			raise ValidationError({"detail": "empty batch"})
+		gzipped = request.headers.get("Content-Encoding", "").lower() == "gzip"
+		try:
+			result = apply_batch(request.user, device, iter_lines(request.stream, gzipped))
+		except SyncError as exc:
+			return Response({"detail": str(exc)}, status=exc.status)
+		except IntegrityError:
+			# Another upload of the same keys committed first; a retry will skip them
+			return Response({"detail": "concurrent sync, retry"}, status=status.HTTP_409_CONFLICT, headers={"Retry-After": "1"})
+		return Response({
+			"device": device,
+			"watermark": result.watermark,
+			"applied": result.applied,
+			"duplicates": result.duplicates,
+			"rejected": result.rejected,
+			"errors": result.errors,
+		})
+
+
+class HistoryPagination(CursorPagination):
+	page_size = 50
+	max_page_size = 200
+	page_size_query_param = "page_size"
+	ordering = ("-started_at", "-id")
+
+
+class HistoryView(ListAPIView):
+	"""GET: the user's sessions of ``kind``, newest first, cursor-paginated."""
+
+	pagination_class = HistoryPagination
+
+	def get_serializer_class(self):
+		return SESSION_SERIALIZERS[_kind(self.kwargs["kind"])]
+
+	def get_queryset(self):
+		return SESSION_MODELS[_kind(self.kwargs["kind"])].objects.filter(user=self.request.user)
+
+
+urlpatterns = [
+	path("bulk/", BulkSubmitView.as_view(), name="api_assessments_bulk"),
+	path("sync/", SyncView.as_view(), name="api_assessments_sync"),
+	path("<str:kind>/start/", StartTestView.as_view(), name="api_test_start"),
+	path("<str:kind>/submit/", SubmitTestView.as_view(), name="api_test_submit"),
+	path("<str:kind>/history/", HistoryView.as_view(), name="api_test_history"),
+]
@@ -0,0 +1,76 @@
+from __future__ import annotations
+
+import time
+
+from channels.db import database_sync_to_async
+from channels.generic.websocket import AsyncJsonWebsocketConsumer
+from django.urls import reverse
+
+from . import inflight
+from .models import ReadingTestSession
+from .reading import IncrementalReadingScorer, tokenize
+from .services import finish_reading_session
+
+
+MAX_CHUNK_CHARS = 2000
+MAX_WORDS = 5000
+
+
+class ReadingTestConsumer(AsyncJsonWebsocketConsumer):
+	"""Live reading test: scores transcript chunks as they arrive, saves once at the end.
+
+	Client messages: ``{"type": "chunk", "text": "..."}`` for each finalised
+	piece of speech and ``{"type": "finish"}`` to stop. Nothing is written to the
+	database until ``finish``; a dropped socket leaves the in-flight test open so
+	the page can still fall back to the form POST.
+	"""
+
+	async def connect(self):
+		self.user = self.scope.get("user")
+		if self.user is None or not self.user.is_authenticated:
+			await self.close(code=4401)
+			return
+		state = await database_sync_to_async(inflight.current)(self.user, "reading")
+		if state is None or state.session_id != self.scope["url_route"]["kwargs"]["session_id"]:
+			await self.close(code=4404)
+			return
+		try:
+			self.session = await ReadingTestSession.objects.aget(id=state.session_id, user=self.user, ended_at__isnull=True)
+		except ReadingTestSession.DoesNotExist:
+			await self.close(code=4404)
+			return
+		self.state = state
+		self.scorer = IncrementalReadingScorer(self.session.passage)
+		self.chunks = []
+		self.words = []
+		await self.accept()
+
+	async def receive_json(self, content, **kwargs):
+		kind = content.get("type")
+		if kind == "chunk":
+			text = str(content.get("text", ""))[:MAX_CHUNK_CHARS]
+			if self.scorer.words_read + len(tokenize(text)) > MAX_WORDS:
+				await self.close(code=4413)
+				return
+			elapsed = round(time.time() - self.state.started_ts, 2)
+			# Chunks are whole recognised phrases, so end them on a word boundary
+			score = self.scorer.feed(text + " ")
+			self.words.extend([w, elapsed] for w in tokenize(text))
+			self.chunks.append(text.strip())
+			await self.send_json({
+				"type": "progress",
+				"words": score.words_read,
+				"position": score.position,
+				"wpm": round(score.wpm(elapsed), 1),
+				"accuracy": round(score.accuracy, 2),
+			})
+		elif kind == "finish":
+			transcript = " ".join(c for c in self.chunks if c)
+			duration = int(max(0, time.time() - self.state.started_ts))
+			await database_sync_to_async(self._save)(transcript, duration)
+			await self.send_json({"type": "done", "redirect": reverse("reading_test_result", args=[self.session.id])})
+			await self.close()
+
+	def _save(self, transcript: str, duration: int) -> None:
+		finish_reading_session(self.session, transcript, duration, self.scorer.result(), self.words)
+		inflight.finish(self.user, "reading")
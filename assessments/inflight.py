@@ -0,0 +1,72 @@
+from __future__ import annotations
+
+import time
+from dataclasses import dataclass
+from typing import Optional, Sequence, Tuple
+
+from django.conf import settings
+from django.core.cache import caches
+
+
+@dataclass(frozen=True)
+class InFlightTest:
+	"""A started but not yet submitted test: just enough to rebuild it."""
+
+	session_id: int
+	seed: int
+	started_ts: float
+	item_ids: Tuple[int, ...] = ()  # bank items drawn for this attempt, in order
+
+
+def _store():
+	# Any Django cache backend works (locmem, file, db); entries expire after the TTL
+	return caches[settings.ASSESSMENT_INFLIGHT_CACHE]
+
+
+def _key(user_id: int, kind: str) -> str:
+	return f"inflight:{kind}:{user_id}"
+
+
+def _new(session_id: int, seed: int, item_ids: Sequence[int]) -> InFlightTest:
+	return InFlightTest(session_id=session_id, seed=seed, started_ts=time.time(), item_ids=tuple(item_ids))
+
+
+def _raw(state: InFlightTest) -> tuple:
+	return (state.session_id, state.seed, state.started_ts, state.item_ids)
+
+
+def begin(user, kind: str, session_id: int, seed: int, item_ids: Sequence[int] = ()) -> InFlightTest:
+	state = _new(session_id, seed, item_ids)
+	_store().set(_key(user.pk, kind), _raw(state), settings.ASSESSMENT_INFLIGHT_TTL)
+	return state
+
+
+def current(user, kind: str) -> Optional[InFlightTest]:
+	raw = _store().get(_key(user.pk, kind))
+	if raw is None:
+		return None
+	return InFlightTest(*raw)
+
+
+def finish(user, kind: str) -> None:
+	_store().delete(_key(user.pk, kind))
+
+
+# Async variants for the ASGI views; the cache backend decides how they block
+
+
+async def abegin(user, kind: str, session_id: int, seed: int, item_ids: Sequence[int] = ()) -> InFlightTest:
+	state = _new(session_id, seed, item_ids)
+	await _store().aset(_key(user.pk, kind), _raw(state), settings.ASSESSMENT_INFLIGHT_TTL)
+	return state
+
+
+async def acurrent(user, kind: str) -> Optional[InFlightTest]:
+	raw = await _store().aget(_key(user.pk, kind))
+	if raw is None:
+		return None
+	return InFlightTest(*raw)
+
+
+async def afinish(user, kind: str) -> None:
+	await _store().adelete(_key(user.pk, kind))
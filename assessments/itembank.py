@@ -0,0 +1,245 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import random
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+from django.db import transaction
+from django.db.models import Avg, Case, Count, F, FloatField, Value, When
+
+from .models import Item, ItemResponse
+
+
+# key -> Item id; bank rows are immutable, so this never needs invalidating
+_item_ids: Dict[str, int] = {}
+
+MAX_STORED_CHOICE = 2**31 - 1
+
+BANK_KINDS = ["grammar", "scenario"]  # math items are generated, not sampled
+BANK_TTL_SECONDS = 300.0  # picks up items loaded by other processes
+RECENT_WINDOW = 50  # responses per kind that count as "recently seen"
+MAX_CACHED_ITEMS = 20000
+
+
+def item_key(kind: str, prompt: str, options: Sequence[str], answer: str) -> str:
+	raw = json.dumps([kind, prompt, list(options), answer], separators=(",", ":"))
+	return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+
+def math_item(q: Dict[str, Any]) -> Tuple[str, List[str], str]:
+	answer = q["a"] + q["b"] if q["op"] == "+" else q["a"] - q["b"]
+	return f"{q['a']} {q['op']} {q['b']}", [], str(answer)
+
+
+def resolve_items(kind: str, items: Sequence[Tuple[str, List[str], str]]) -> List[int]:
+	"""Map (prompt, options, answer) triples to bank ids, creating missing rows in bulk."""
+	keys = [item_key(kind, *item) for item in items]
+	found = {k: _item_ids[k] for k in keys if k in _item_ids}
+	missing = {k for k in keys if k not in found}
+	if missing:
+		found.update(Item.objects.filter(key__in=missing).values_list("key", "id"))
+		new = {
+			k: Item(kind=kind, key=k, prompt=prompt, options=options, answer=answer)
+			for k, (prompt, options, answer) in zip(keys, items)
+			if k not in found
+		}
+		if new:
+			Item.objects.bulk_create(new.values(), ignore_conflicts=True)
+			found.update(Item.objects.filter(key__in=list(new)).values_list("key", "id"))
+		# Only remember ids once they are committed; a rollback would leave dangling ids
+		transaction.on_commit(lambda: _item_ids.update(found))
+	return [found[k] for k in keys]
+
+
+def choice_index(options: Sequence[str], value: Optional[str]) -> Optional[int]:
+	try:
+		return list(options).index(value)
+	except ValueError:
+		return None
+
+
+def build_responses(session, kind: str, item_ids: Sequence[int], choices: Sequence[Optional[int]], correct: Sequence[bool]) -> List[ItemResponse]:
+	return [
+		ItemResponse(
+			user_id=session.user_id,
+			item_id=item_id,
+			kind=kind,
+			session_id=session.pk,
+			position=pos,
+			choice=choice if choice is None or abs(choice) <= MAX_STORED_CHOICE else None,
+			correct=ok,
+		)
+		for pos, (item_id, choice, ok) in enumerate(zip(item_ids, choices, correct))
+	]
+
+
+def responses_by_session(kind: str, session_ids: Sequence[int]) -> Dict[int, List[ItemResponse]]:
+	grouped: Dict[int, List[ItemResponse]] = {sid: [] for sid in session_ids}
+	rows = ItemResponse.objects.filter(kind=kind, session_id__in=session_ids).select_related("item").order_by("session_id", "position")
+	for r in rows:
+		grouped[r.session_id].append(r)
+	return grouped
+
+
+def item_statistics(kind: Optional[str] = None, min_attempts: int = 1):
+	"""Per-item attempts, accuracy and error rate in one aggregate query."""
+	qs = ItemResponse.objects.all()
+	if kind:
+		qs = qs.filter(kind=kind)
+	return (
+		qs.values("item_id", "item__kind", "item__prompt")
+		.annotate(
+			attempts=Count("id"),
+			accuracy=Avg(Case(When(correct=True, then=Value(1.0)), default=Value(0.0), output_field=FloatField())),
+		)
+		.annotate(error_rate=Value(1.0) - F("accuracy"))
+		.filter(attempts__gte=min_attempts)
+		.order_by("-error_rate", "-attempts")
+	)
+
+
+def age_band_for(age: Optional[int]) -> Optional[str]:
+	if age is None:
+		return None
+	if age <= 8:
+		return "6-8"
+	if age <= 11:
+		return "9-11"
+	if age <= 14:
+		return "12-14"
+	return "15+"
+
+
+def recently_seen(user, kind: str, window: int = RECENT_WINDOW) -> Set[int]:
+	rows = ItemResponse.objects.filter(user=user, kind=kind).order_by("-created_at").values_list("item_id", flat=True)[:window]
+	return set(rows)
+
+
+class MissingItemsError(LookupError):
+	"""Items drawn for an in-flight test are no longer in the bank."""
+
+	def __init__(self, ids: Sequence[int]):
+		super().__init__(f"Bank items no longer exist: {', '.join(map(str, ids))}")
+		self.ids = list(ids)
+
+
+@dataclass(frozen=True)
+class BankItem:
+	id: int
+	kind: str
+	prompt: str
+	options: Tuple[str, ...]
+	answer: str
+	skill: str
+	difficulty: int
+	age_band: str
+	stimulus: str
+	group: str
+
+
+class ItemBankIndex:
+	"""Per-process sampling index over active bank items.
+
+	Only ids are indexed, bucketed by (kind, age band) into units: a single
+	item, or every item of a ``group`` (a scenario and its questions). Item
+	text is loaded lazily for the ids actually drawn and kept warm in
+	``_meta``. Both expire after ``ttl`` seconds, so edits made by other
+	processes (a corrected answer key) are picked up.
+	"""
+
+	def __init__(self, ttl: float = BANK_TTL_SECONDS):
+		self.ttl = ttl
+		self._lock = threading.Lock()
+		self._buckets: Optional[Dict[Tuple[str, Optional[str]], List[Tuple[int, ...]]]] = None
+		self._loaded_at = 0.0
+		self._meta: Dict[int, BankItem] = {}
+		self._meta_loaded_at = time.monotonic()
+
+	def _load(self) -> Dict[Tuple[str, Optional[str]], List[Tuple[int, ...]]]:
+		units: Dict[Tuple[str, str, str], List[int]] = {}
+		rows = Item.objects.filter(kind__in=BANK_KINDS, active=True).order_by("id").values_list("id", "kind", "age_band", "group")
+		for pk, kind, band, group in rows:
+			units.setdefault((kind, band, group or f"#{pk}"), []).append(pk)
+		bands = [b for b, _ in Item.AGE_BAND_CHOICES if b != "all"]
+		buckets: Dict[Tuple[str, Optional[str]], List[Tuple[int, ...]]] = {}
+		for (kind, band, _), ids in units.items():
+			unit = tuple(ids)
+			# None is the bucket for users without a known age
+			for b in [None] + (bands if band == "all" else [band]):
+				buckets.setdefault((kind, b), []).append(unit)
+		return buckets
+
+	def _get(self) -> Dict[Tuple[str, Optional[str]], List[Tuple[int, ...]]]:
+		buckets = self._buckets
+		if buckets is not None and time.monotonic() - self._loaded_at < self.ttl:
+			return buckets
+		with self._lock:
+			if self._buckets is None or time.monotonic() - self._loaded_at >= self.ttl:
+				self._buckets = self._load()
+				self._loaded_at = time.monotonic()
+			return self._buckets
+
+	def invalidate(self) -> None:
+		self._buckets = None
+		self._meta = {}
+
+	def sample(self, kind: str, k: int, rng: random.Random, age_band: Optional[str] = None, exclude: Iterable[int] = ()) -> List[Tuple[int, ...]]:
+		"""Draw ``k`` distinct units in O(k) expected time, avoiding ``exclude`` ids.
+
+		Falls back to excluded units only when the bucket has too few fresh ones.
+		"""
+		units = self._get().get((kind, age_band)) or self._get().get((kind, None), [])
+		k = min(k, len(units))
+		exclude = set(exclude)
+		picked: List[int] = []
+		tried: Set[int] = set()
+		stale: List[int] = []
+		# Rejection sampling: bounded attempts, so a mostly-seen bank degrades gracefully
+		for _ in range(4 * k + 16):
+			if len(picked) == k or len(tried) == len(units):
+				break
+			i = rng.randrange(len(units))
+			if i in tried:
+				continue
+			tried.add(i)
+			if exclude.isdisjoint(units[i]):
+				picked.append(i)
+			else:
+				stale.append(i)
+		picked.extend(stale[:k - len(picked)])
+		while len(picked) < k:
+			i = rng.randrange(len(units))
+			if i not in picked:
+				picked.append(i)
+		return [units[i] for i in picked]
+
+	def items(self, ids: Sequence[int]) -> List[BankItem]:
+		"""Bank items for ``ids``, in order; raises MissingItemsError if any were deleted.
+
+		Answers are read by position, so dropping one would shift every later
+		answer onto the wrong question.
+		"""
+		meta = self._meta
+		if time.monotonic() - self._meta_loaded_at >= self.ttl:
+			meta = self._meta = {}
+			self._meta_loaded_at = time.monotonic()
+		missing = [pk for pk in ids if pk not in meta]
+		if missing:
+			if len(meta) + len(missing) > MAX_CACHED_ITEMS:
+				meta = self._meta = {}
+			for obj in Item.objects.filter(pk__in=missing):
+				meta[obj.pk] = BankItem(
+					obj.pk, obj.kind, obj.prompt, tuple(obj.options), obj.answer,
+					obj.skill, obj.difficulty, obj.age_band, obj.stimulus, obj.group,
+				)
+		gone = [pk for pk in ids if pk not in meta]
+		if gone:
+			raise MissingItemsError(gone)
+		return [meta[pk] for pk in ids]
+
+
+bank = ItemBankIndex()
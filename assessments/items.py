@@ -0,0 +1,40 @@
+from __future__ import annotations
+
+import random
+from typing import Any, Dict, List
+
+
+# Test content is rebuilt from a per-session seed instead of being stored.
+# Grammar and scenario items live in the Item bank (see itembank.py).
+
+PASSAGES = [
+	"The quick brown fox jumps over the lazy dog.",
+	"Reading fluently helps you understand and learn new ideas faster.",
+	"Students should practice every day to improve their skills.",
+]
+
+
+def new_seed() -> int:
+	return random.SystemRandom().randrange(1 << 31)
+
+
+def math_questions(seed: int, count: int = 10) -> List[Dict[str, Any]]:
+	# Random arithmetic questions (+ or - within 0..20)
+	rng = random.Random(seed)
+	questions = []
+	for _ in range(count):
+		a = rng.randint(0, 20)
+		b = rng.randint(0, 20)
+		op = rng.choice(["+", "-"])
+		questions.append({"a": a, "b": b, "op": op})
+	return questions
+
+
+def reading_passage(seed: int) -> str:
+	return random.Random(seed).choice(PASSAGES)
+
+
+def memory_sequence(seed: int, length: int = 6) -> List[int]:
+	rng = random.Random(seed)
+	return [rng.randint(0, 9) for _ in range(length)]
+
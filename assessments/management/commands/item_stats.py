@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from assessments.itembank import item_statistics
+
+
+class Command(BaseCommand):
+	help = "Print per-item attempts and error rates from the item response table."
+
+	def add_arguments(self, parser):
+		parser.add_argument("--kind", choices=["math", "grammar", "scenario"])
+		parser.add_argument("--min-attempts", type=int, default=1)
+		parser.add_argument("--limit", type=int, default=20)
+
+	def handle(self, *args, **options):
+		rows = item_statistics(options["kind"], options["min_attempts"])[:options["limit"]]
+		for row in rows:
+			self.stdout.write(f"{row['item__kind']:<9} {row['attempts']:>6} {row['error_rate']:>6.2f}  {row['item__prompt'][:60]}")
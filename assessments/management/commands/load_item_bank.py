@@ -0,0 +1,48 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from assessments.itembank import BANK_KINDS, bank, item_key
+from assessments.models import Item
+
+
+FIELDS = ["prompt", "options", "answer", "skill", "difficulty", "age_band", "stimulus", "group", "active"]
+
+
+class Command(BaseCommand):
+	help = "Load grammar/scenario items from a JSON Lines file into the item bank (upsert by content)."
+
+	def add_arguments(self, parser):
+		parser.add_argument("path", help="One JSON object per line: kind, prompt, options, answer and optional skill, difficulty, age_band, stimulus, group, active.")
+		parser.add_argument("--batch-size", type=int, default=1000)
+
+	def handle(self, *args, **options):
+		bands = {b for b, _ in Item.AGE_BAND_CHOICES}
+		batch, total = [], 0
+		with open(options["path"], encoding="utf-8") as fh:
+			for lineno, line in enumerate(fh, 1):
+				if not line.strip():
+					continue
+				row = json.loads(line)
+				kind = row.get("kind")
+				if kind not in BANK_KINDS:
+					raise CommandError(f"line {lineno}: kind must be one of {BANK_KINDS}")
+				if row.get("age_band", "all") not in bands:
+					raise CommandError(f"line {lineno}: unknown age_band {row['age_band']!r}")
+				item = Item(kind=kind, key=item_key(kind, row["prompt"], row.get("options", []), row["answer"]))
+				for name in FIELDS:
+					if name in row:
+						setattr(item, name, row[name])
+				batch.append(item)
+				if len(batch) >= options["batch_size"]:
+					total += self._flush(batch)
+					batch = []
+		if batch:
+			total += self._flush(batch)
+		# bulk_create sends no signals; other processes pick the rows up after the index TTL
+		bank.invalidate()
+		self.stdout.write(self.style.SUCCESS(f"Loaded {total} items."))
+
+	def _flush(self, batch):
+		Item.objects.bulk_create(batch, update_conflicts=True, unique_fields=["key"], update_fields=FIELDS)
+		return len(batch)
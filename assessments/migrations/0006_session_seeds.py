@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-18 12:34
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('assessments', '0005_memorytestsession_scenariotestsession'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='mathtestsession',
+            name='seed',
+            field=models.BigIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='memorytestsession',
+            name='seed',
+            field=models.BigIntegerField(blank=True, null=True),
+        ),
+    ]
@@ -0,0 +1,46 @@
+# Generated by Django 5.2.18 on 2026-10-18 12:37
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('assessments', '0006_session_seeds'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Item',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('math', 'Math'), ('grammar', 'Grammar'), ('scenario', 'Scenario')], max_length=10)),
+                ('key', models.CharField(max_length=40, unique=True)),
+                ('prompt', models.TextField()),
+                ('options', models.JSONField(blank=True, default=list)),
+                ('answer', models.CharField(max_length=200)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='ItemResponse',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('math', 'Math'), ('grammar', 'Grammar'), ('scenario', 'Scenario')], max_length=10)),
+                ('session_id', models.PositiveBigIntegerField()),
+                ('position', models.PositiveSmallIntegerField()),
+                ('choice', models.IntegerField(blank=True, null=True)),
+                ('correct', models.BooleanField(default=False)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('item', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='responses', to='assessments.item')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='item_responses', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['user', 'item'], name='item_response_user_item_idx')],
+                'constraints': [models.UniqueConstraint(fields=('kind', 'session_id', 'position'), name='uniq_item_response_position')],
+            },
+        ),
+    ]
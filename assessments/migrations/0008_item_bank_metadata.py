@@ -0,0 +1,61 @@
+# Generated by Django 5.2.18 on 2026-10-18 12:38
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('assessments', '0007_item_bank_responses'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='item',
+            name='active',
+            field=models.BooleanField(default=True),
+        ),
+        migrations.AddField(
+            model_name='item',
+            name='age_band',
+            field=models.CharField(choices=[('all', 'All ages'), ('6-8', '6-8'), ('9-11', '9-11'), ('12-14', '12-14'), ('15+', '15+')], default='all', max_length=8),
+        ),
+        migrations.AddField(
+            model_name='item',
+            name='difficulty',
+            field=models.PositiveSmallIntegerField(default=2),
+        ),
+        migrations.AddField(
+            model_name='item',
+            name='group',
+            field=models.CharField(blank=True, max_length=40),
+        ),
+        migrations.AddField(
+            model_name='item',
+            name='skill',
+            field=models.CharField(blank=True, max_length=40),
+        ),
+        migrations.AddField(
+            model_name='item',
+            name='stimulus',
+            field=models.TextField(blank=True),
+        ),
+        migrations.AddIndex(
+            model_name='item',
+            index=models.Index(fields=['kind', 'skill'], name='item_kind_skill_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='item',
+            index=models.Index(fields=['kind', 'difficulty'], name='item_kind_difficulty_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='item',
+            index=models.Index(fields=['kind', 'age_band'], name='item_kind_age_band_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='itemresponse',
+            index=models.Index(fields=['user', 'kind', '-created_at'], name='item_response_recent_idx'),
+        ),
+    ]
@@ -0,0 +1,75 @@
+import hashlib
+import json
+
+from django.db import migrations
+
+
+# (skill, difficulty, prompt, options, answer) - formerly the in-code grammar bank
+GRAMMAR = [
+	("agreement", 1, "Choose the correct form: She __ to school every day.", ["go", "goes", "going"], "goes"),
+	("agreement", 1, "Fill the blank: They ___ playing.", ["is", "are", "am"], "are"),
+	("articles", 2, "Correct article: He is ___ honest man.", ["a", "an", "the"], "an"),
+	("tense", 3, "Verb tense: I ___ dinner when you called.", ["cook", "was cooking", "cooks"], "was cooking"),
+	("plurals", 2, "Plural form: One child, two ___.", ["childs", "children", "childes"], "children"),
+]
+
+# (group, stimulus, [(skill, difficulty, question, options, answer), ...])
+SCENARIOS = [
+	(
+		"riya-homework",
+		"Riya forgot her homework again. The teacher asked her why, and she said her little brother was sick and she had to help. The teacher gave her an extra day.",
+		[
+			("cause", 2, "Why did Riya forget her homework?", ["She played games", "Brother was sick", "She lost it"], "Brother was sick"),
+			("recall", 1, "What did the teacher do?", ["Punished her", "Gave extra day", "Ignored it"], "Gave extra day"),
+		],
+	),
+	(
+		"aman-puppy",
+		"Aman saw a puppy stuck behind a fence. He called a neighbor for help. Together they opened the gate and the puppy ran to its mother.",
+		[
+			("recall", 1, "What problem did Aman see?", ["Puppy stuck", "Cat on tree", "Lost toy"], "Puppy stuck"),
+			("recall", 1, "Who helped Aman?", ["His teacher", "A neighbor", "A police officer"], "A neighbor"),
+		],
+	),
+]
+
+
+def _key(kind, prompt, options, answer):
+	# Same scheme as assessments.itembank.item_key, so existing responses keep their items
+	raw = json.dumps([kind, prompt, list(options), answer], separators=(",", ":"))
+	return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+
+def _rows():
+	for skill, difficulty, prompt, options, answer in GRAMMAR:
+		yield "grammar", prompt, options, answer, {"skill": skill, "difficulty": difficulty}
+	for group, stimulus, questions in SCENARIOS:
+		for skill, difficulty, prompt, options, answer in questions:
+			yield "scenario", prompt, options, answer, {"skill": skill, "difficulty": difficulty, "group": group, "stimulus": stimulus}
+
+
+def seed(apps, schema_editor):
+	Item = apps.get_model("assessments", "Item")
+	for kind, prompt, options, answer, meta in _rows():
+		Item.objects.update_or_create(
+			key=_key(kind, prompt, options, answer),
+			defaults={"kind": kind, "prompt": prompt, "options": options, "answer": answer, **meta},
+		)
+
+
+def unseed(apps, schema_editor):
+	# Items may already be referenced by responses; only drop the bank metadata
+	Item = apps.get_model("assessments", "Item")
+	keys = [_key(kind, prompt, options, answer) for kind, prompt, options, answer, _ in _rows()]
+	Item.objects.filter(key__in=keys).update(skill="", difficulty=2, group="", stimulus="")
+
+
+class Migration(migrations.Migration):
+
+	dependencies = [
+		("assessments", "0008_item_bank_metadata"),
+	]
+
+	operations = [
+		migrations.RunPython(seed, unseed),
+	]
@@ -1,6 +1,8 @@
 from django.conf import settings
 from django.db import models
 
+from .items import math_questions, memory_sequence
+
 
 class DemographicProfile(models.Model):
 	GENDER_CHOICES = [
@@ -31,6 +33,13 @@ class DemographicProfile(models.Model):
 		return f"Demographics({self.user.email}, age={self.age})"
 
 
+def _chosen(response):
+	options = response.item.options
+	if response.choice is None or not 0 <= response.choice < len(options):
+		return None
+	return options[response.choice]
+
+
 class MathTestSession(models.Model):
 	user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="math_tests")
 	started_at = models.DateTimeField(auto_now_add=True)
@@ -38,7 +47,9 @@ class MathTestSession(models.Model):
 	num_correct = models.PositiveIntegerField(default=0)
 	num_total = models.PositiveIntegerField(default=0)
 	duration_seconds = models.PositiveIntegerField(default=0)
-	# Store per-question details: [{"a": int, "b": int, "op": "+", "answer": int, "user": int, "correct": bool}]
+	# Questions are rebuilt from the seed and answers live in ItemResponse. Older rows keep
+	# details: a list of answers (seeded rows) or full dicts {"a", "b", "op", "answer", "user", "correct"}
+	seed = models.BigIntegerField(null=True, blank=True)
 	details = models.JSONField(default=list, blank=True)
 
 	class Meta:
@@ -47,6 +58,25 @@ class MathTestSession(models.Model):
 	def __str__(self) -> str:
 		return f"MathTest(user={self.user_id}, {self.num_correct}/{self.num_total})"
 
+	def question_rows(self, responses=None):
+		if responses is None:
+			responses = list(ItemResponse.objects.filter(kind="math", session_id=self.pk).select_related("item").order_by("position"))
+		if self.seed is None:
+			# Imported sessions have no seed; their questions are the bank items themselves
+			if not responses:
+				return self.details
+			rows = []
+			for r in responses:
+				a, op, b = r.item.prompt.split()
+				rows.append({"a": int(a), "b": int(b), "op": op, "answer": int(r.item.answer), "user": r.choice, "correct": r.correct})
+			return rows
+		answers = [r.choice for r in responses] if responses else self.details
+		rows = []
+		for q, user_val in zip(math_questions(self.seed, self.num_total), answers):
+			answer = q["a"] + q["b"] if q["op"] == "+" else q["a"] - q["b"]
+			rows.append({**q, "answer": answer, "user": user_val, "correct": user_val == answer})
+		return rows
+
 
 class GrammarTestSession(models.Model):
 	user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="grammar_tests")
@@ -55,7 +85,8 @@ class GrammarTestSession(models.Model):
 	num_correct = models.PositiveIntegerField(default=0)
 	num_total = models.PositiveIntegerField(default=0)
 	duration_seconds = models.PositiveIntegerField(default=0)
-	# details: [{"prompt": str, "options": [str,...], "answer": str, "user": str, "correct": bool}]
+	# Legacy only, answers now live in ItemResponse:
+	# [{"prompt": str, "options": [str,...], "answer": str, "user": str, "correct": bool}]
 	details = models.JSONField(default=list, blank=True)
 
 	class Meta:
@@ -64,6 +95,16 @@ class GrammarTestSession(models.Model):
 	def __str__(self) -> str:
 		return f"GrammarTest(user={self.user_id}, {self.num_correct}/{self.num_total})"
 
+	def question_rows(self, responses=None):
+		if responses is None:
+			responses = list(ItemResponse.objects.filter(kind="grammar", session_id=self.pk).select_related("item").order_by("position"))
+		if not responses:
+			return self.details
+		return [
+			{"prompt": r.item.prompt, "options": r.item.options, "answer": r.item.answer, "user": _chosen(r), "correct": r.correct}
+			for r in responses
+		]
+
 
 class ReadingTestSession(models.Model):
 	user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="reading_tests")
@@ -73,7 +114,7 @@ class ReadingTestSession(models.Model):
 	transcript = models.TextField(blank=True)
 	duration_seconds = models.PositiveIntegerField(default=0)
 	wpm = models.FloatField(default=0.0)
-	accuracy = models.FloatField(default=0.0)  # 0..1 token overlap
+	accuracy = models.FloatField(default=0.0)  # 0..1 words read correctly (aligned)
 	details = models.JSONField(default=dict, blank=True)
 
 	class Meta:
@@ -87,7 +128,8 @@ class MemoryTestSession(models.Model):
 	user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="memory_tests")
 	started_at = models.DateTimeField(auto_now_add=True)
 	ended_at = models.DateTimeField(null=True, blank=True)
-	sequence = models.JSONField(default=list, blank=True)  # list of ints shown
+	seed = models.BigIntegerField(null=True, blank=True)
+	sequence = models.JSONField(default=list, blank=True)  # list of ints shown; empty when rebuilt from seed
 	response = models.JSONField(default=list, blank=True)  # list of ints entered
 	num_correct = models.PositiveIntegerField(default=0)
 	num_total = models.PositiveIntegerField(default=0)
@@ -99,6 +141,12 @@ class MemoryTestSession(models.Model):
 	def __str__(self) -> str:
 		return f"MemoryTest(user={self.user_id}, {self.num_correct}/{self.num_total})"
 
+	@property
+	def target_sequence(self):
+		if self.seed is None:
+			return self.sequence
+		return memory_sequence(self.seed, self.num_total)
+
 
 class ScenarioTestSession(models.Model):
 	user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="scenario_tests")
@@ -116,4 +164,122 @@ class ScenarioTestSession(models.Model):
 	def __str__(self) -> str:
 		return f"ScenarioTest(user={self.user_id}, {self.num_correct}/{self.num_total})"
 
+	def question_rows(self, responses=None):
+		if responses is None:
+			responses = list(ItemResponse.objects.filter(kind="scenario", session_id=self.pk).select_related("item").order_by("position"))
+		if not responses:
+			return self.details
+		return [
+			{"q": r.item.prompt, "options": r.item.options, "a": r.item.answer, "user": _chosen(r), "correct": r.correct}
+			for r in responses
+		]
+
+
+
+
+class Item(models.Model):
+	"""Shared bank entry; identical questions across sessions map to one row via ``key``."""
+
+	KIND_CHOICES = [
+		("math", "Math"),
+		("grammar", "Grammar"),
+		("scenario", "Scenario"),
+	]
+
+	AGE_BAND_CHOICES = [
+		("all", "All ages"),
+		("6-8", "6-8"),
+		("9-11", "9-11"),
+		("12-14", "12-14"),
+		("15+", "15+"),
+	]
+
+	kind = models.CharField(max_length=10, choices=KIND_CHOICES)
+	key = models.CharField(max_length=40, unique=True)  # sha1 of kind + content
+	prompt = models.TextField()
+	options = models.JSONField(default=list, blank=True)
+	answer = models.CharField(max_length=200)
+	skill = models.CharField(max_length=40, blank=True)
+	difficulty = models.PositiveSmallIntegerField(default=2)  # 1 (easiest) .. 5
+	age_band = models.CharField(max_length=8, choices=AGE_BAND_CHOICES, default="all")
+	stimulus = models.TextField(blank=True)  # shared passage for scenario questions
+	group = models.CharField(max_length=40, blank=True)  # items that are always asked together
+	active = models.BooleanField(default=True)
+	created_at = models.DateTimeField(auto_now_add=True)
+
+	class Meta:
+		indexes = [
+			models.Index(fields=["kind", "skill"], name="item_kind_skill_idx"),
+			models.Index(fields=["kind", "difficulty"], name="item_kind_difficulty_idx"),
+			models.Index(fields=["kind", "age_band"], name="item_kind_age_band_idx"),
+		]
+
+	def __str__(self) -> str:
+		return f"Item({self.kind}, {self.prompt[:40]})"
+
+
+class ItemResponse(models.Model):
+	"""One answered question. ``session_id`` points into the session table named by ``kind``."""
 
+	user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="item_responses")
+	item = models.ForeignKey(Item, on_delete=models.PROTECT, related_name="responses")
+	kind = models.CharField(max_length=10, choices=Item.KIND_CHOICES)
+	session_id = models.PositiveBigIntegerField()
+	position = models.PositiveSmallIntegerField()
+	# Index into item.options for multiple choice; the number entered for math
+	choice = models.IntegerField(null=True, blank=True)
+	correct = models.BooleanField(default=False)
+	created_at = models.DateTimeField(auto_now_add=True)
+
+	class Meta:
+		constraints = [
+			models.UniqueConstraint(fields=["kind", "session_id", "position"], name="uniq_item_response_position"),
+		]
+		indexes = [
+			models.Index(fields=["user", "item"], name="item_response_user_item_idx"),
+			models.Index(fields=["user", "kind", "-created_at"], name="item_response_recent_idx"),
+		]
+
+	def __str__(self) -> str:
+		return f"ItemResponse({self.user_id}, item={self.item_id}, correct={self.correct})"
+
+
+class SyncedSession(models.Model):
+	"""An offline session already applied, keyed by the client's idempotency key.
+
+	``user`` is the uploading account (keys are generated per client), which
+	may differ from the session's owner when staff sync a classroom device.
+	"""
+
+	user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="synced_sessions")
+	key = models.CharField(max_length=64)
+	device = models.CharField(max_length=64)
+	seq = models.PositiveBigIntegerField()
+	kind = models.CharField(max_length=10)
+	session_id = models.PositiveBigIntegerField()
+	created_at = models.DateTimeField(auto_now_add=True)
+
+	class Meta:
+		constraints = [
+			models.UniqueConstraint(fields=["user", "key"], name="uniq_synced_session_key"),
+		]
+
+	def __str__(self) -> str:
+		return f"SyncedSession({self.user_id}, {self.key} -> {self.kind}#{self.session_id})"
+
+
+class SyncCursor(models.Model):
+	"""Highest client sequence number received from a device; the next sync sends only newer records."""
+
+	user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="sync_cursors")
+	device = models.CharField(max_length=64)
+	watermark = models.PositiveBigIntegerField(default=0)
+	updated_at = models.DateTimeField(auto_now=True)
+
+	class Meta:
+		constraints = [
+			models.UniqueConstraint(fields=["user", "device"], name="uniq_sync_cursor_device"),
+		]
+
+	def __str__(self) -> str:
+		return f"SyncCursor({self.user_id}, {self.device}@{self.watermark})"
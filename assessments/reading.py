@@ -0,0 +1,201 @@
+from __future__ import annotations
+
+import re
+from bisect import bisect_right
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Sequence, Tuple
+
+
+_WORD_RE = re.compile(r"[^\W_]+")  # runs of letters/digits, as the old char filter kept
+
+BAND = 32  # alignment window around the current reading position, in words
+PAUSE_SECONDS = 0.5  # silence between words that counts as a pause
+
+# Costs in half-errors so a repetition weighs less than a real miscue
+_SUB = 2
+_OMIT = 2
+_INSERT = 2
+_REPEAT = 1
+
+# Cell: (cost, -matches, substitutions, omissions, insertions, repetitions).
+# Negated matches make min() prefer the alignment with more correct words on ties.
+Cell = Tuple[int, int, int, int, int, int]
+
+
+def tokenize(text: str) -> List[str]:
+	return [t.lower() for t in _WORD_RE.findall(text)]
+
+
+@dataclass(frozen=True)
+class ReadingScore:
+	ref_words: int
+	words_read: int
+	position: int  # passage words covered by the alignment so far
+	matches: int
+	substitutions: int
+	omissions: int
+	insertions: int
+	repetitions: int
+
+	@property
+	def accuracy(self) -> float:
+		"""Correct words over the part of the passage reached (the whole passage once final)."""
+		return self.matches / max(1, self.position)
+
+	def wpm(self, seconds: float) -> float:
+		return self.words_read / (seconds / 60.0) if seconds > 0 else 0.0
+
+	def as_details(self) -> dict:
+		return {
+			"ref_len": self.ref_words,
+			"hyp_len": self.words_read,
+			"matches": self.matches,
+			"substitutions": self.substitutions,
+			"omissions": self.omissions,
+			"insertions": self.insertions,
+			"repetitions": self.repetitions,
+		}
+
+
+class IncrementalReadingScorer:
+	"""Word-level edit-distance alignment of a transcript against a passage.
+
+	Transcript text can be fed in chunks as it arrives; each ``feed`` extends the
+	alignment by one DP row per new word and returns the running score. Only the
+	last row is kept, restricted to ``band`` words either side of the best
+	position so far, so time is O(words * band) and memory O(band) beyond the
+	passage tokens.
+
+	A reader who skips ahead would leave that window behind, so a word other
+	than the next passage word that also occurs past the window widens it to
+	``band`` beyond that occurrence (the cells in between cost omissions), and
+	the wider edge is kept until the best position passes it. Clean reading
+	stays O(band) per word; many misread common words can widen the window to
+	the whole row, the cost of the unbanded alignment.
+	"""
+
+	def __init__(self, passage: str, band: int = BAND):
+		self.ref = tokenize(passage)
+		self.band = band
+		self.words_read = 0
+		self._pending = ""
+		self._last: Optional[str] = None
+		self._lo = 0
+		self._row: List[Cell] = [(_OMIT * i, 0, 0, i, 0, 0) for i in range(min(len(self.ref), band) + 1)]
+		self._best = 0
+		self._reach = 0  # right edge kept open after re-anchoring on a skip
+		self._positions: Dict[str, List[int]] = {}  # word -> DP columns i where ref[i - 1] == word
+		for i, token in enumerate(self.ref, 1):
+			self._positions.setdefault(token, []).append(i)
+
+	def feed(self, chunk: str) -> ReadingScore:
+		text = self._pending + chunk
+		words = tokenize(text)
+		# A chunk may end mid-word; hold the tail back until the next chunk or result()
+		if words and text and text[-1].isalnum():
+			self._pending = words.pop()
+		else:
+			self._pending = ""
+		for word in words:
+			self._step(word)
+		return self._score(final=False)
+
+	def result(self) -> ReadingScore:
+		if self._pending:
+			self._step(self._pending.lower())
+			self._pending = ""
+		return self._score(final=True)
+
+	def _step(self, word: str) -> None:
+		ref = self.ref
+		prev, prev_lo = self._row, self._lo
+		lo = max(0, self._best - self.band)
+		hi = min(len(ref), max(self._best + self.band, self._reach))
+		columns = self._positions.get(word)
+		if columns:
+			ahead = bisect_right(columns, hi)
+			expected = ref[self._best] if self._best < len(ref) else None
+			# A word other than the next one may be a skip past the window; once one is
+			# open (hi beyond best + band), later words keep extending it
+			if ahead < len(columns) and (word != expected or hi > self._best + self.band):
+				self._reach = hi = min(len(ref), columns[ahead] + self.band)
+		prev_hi = prev_lo + len(prev) - 1
+		if hi > prev_hi:
+			# Previous row past its window: its right edge plus omissions, as the full DP has
+			c = prev[-1]
+			prev = prev + [(c[0] + _OMIT * d, c[1], c[2], c[3] + d, c[4], c[5]) for d in range(1, hi - prev_hi + 1)]
+			prev_hi = hi
+		row: List[Cell] = []
+		left: Optional[Cell] = None
+		for i in range(lo, hi + 1):
+			best: Optional[Cell] = None
+			if prev_lo <= i <= prev_hi:
+				c = prev[i - prev_lo]
+				if word == self._last or (i > 0 and word == ref[i - 1]):
+					best = (c[0] + _REPEAT, c[1], c[2], c[3], c[4], c[5] + 1)
+				else:
+					best = (c[0] + _INSERT, c[1], c[2], c[3], c[4] + 1, c[5])
+			if i > 0 and prev_lo <= i - 1 <= prev_hi:
+				c = prev[i - 1 - prev_lo]
+				if ref[i - 1] == word:
+					cand = (c[0], c[1] - 1, c[2], c[3], c[4], c[5])
+				else:
+					cand = (c[0] + _SUB, c[1], c[2] + 1, c[3], c[4], c[5])
+				if best is None or cand < best:
+					best = cand
+			if left is not None:
+				cand = (left[0] + _OMIT, left[1], left[2], left[3] + 1, left[4], left[5])
+				if best is None or cand < best:
+					best = cand
+			if best is None:
+				# Outside what the previous window can reach; treat as unaligned
+				best = (1 << 30, 0, 0, 0, 0, 0)
+			row.append(best)
+			left = best
+		self._row, self._lo = row, lo
+		self._best = lo + min(range(len(row)), key=lambda k: (row[k][0], row[k][1], -k))
+		self._last = word
+		self.words_read += 1
+
+	def _score(self, final: bool) -> ReadingScore:
+		if final:
+			# Whatever was not reached by the end counts as omitted
+			n = len(self.ref)
+			i, cell = min(
+				((self._lo + k, c) for k, c in enumerate(self._row)),
+				key=lambda ic: (ic[1][0] + _OMIT * (n - ic[0]), ic[1][1]),
+			)
+			cell = (cell[0], cell[1], cell[2], cell[3] + n - i, cell[4], cell[5])
+			position = n
+		else:
+			position = self._best
+			cell = self._row[position - self._lo]
+		return ReadingScore(
+			ref_words=len(self.ref),
+			words_read=self.words_read,
+			position=position,
+			matches=-cell[1],
+			substitutions=cell[2],
+			omissions=cell[3],
+			insertions=cell[4],
+			repetitions=cell[5],
+		)
+
+
+def score_reading(passage: str, transcript: str, band: int = BAND) -> ReadingScore:
+	scorer = IncrementalReadingScorer(passage, band)
+	scorer.feed(transcript)
+	return scorer.result()
+
+
+def timing_metrics(words: Sequence[Tuple[str, float, float]]) -> dict:
+	"""Fluency figures from per-word (word, start, end) timestamps."""
+	if not words:
+		return {"speech_seconds": 0.0, "pauses": 0, "mean_pause": 0.0}
+	gaps = [b[1] - a[2] for a, b in zip(words, words[1:])]
+	pauses = [g for g in gaps if g >= PAUSE_SECONDS]
+	return {
+		"speech_seconds": round(max(0.0, words[-1][2] - words[0][1]), 2),
+		"pauses": len(pauses),
+		"mean_pause": round(sum(pauses) / len(pauses), 2) if pauses else 0.0,
+	}
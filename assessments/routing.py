@@ -0,0 +1,8 @@
+from django.urls import path
+
+from .consumers import ReadingTestConsumer
+
+
+websocket_urlpatterns = [
+	path("ws/assessments/reading/<int:session_id>/", ReadingTestConsumer.as_asgi()),
+]
@@ -0,0 +1,150 @@
+from rest_framework import serializers
+
+from .itembank import BANK_KINDS, MissingItemsError, bank
+from .models import (
+	GrammarTestSession,
+	MathTestSession,
+	MemoryTestSession,
+	ReadingTestSession,
+	ScenarioTestSession,
+)
+
+
+KINDS = ["math", "grammar", "reading", "memory", "scenario"]
+MAX_ITEMS = 100
+MAX_BULK_SESSIONS = 500
+
+
+class MathSubmitSerializer(serializers.Serializer):
+	answers = serializers.ListField(child=serializers.IntegerField(allow_null=True), max_length=MAX_ITEMS)
+
+
+class ChoiceSubmitSerializer(serializers.Serializer):
+	answers = serializers.ListField(
+		child=serializers.CharField(allow_null=True, allow_blank=True, max_length=200),
+		max_length=MAX_ITEMS,
+	)
+
+
+class ReadingSubmitSerializer(serializers.Serializer):
+	transcript = serializers.CharField(allow_blank=True, max_length=20000, trim_whitespace=True)
+
+
+class MemorySubmitSerializer(serializers.Serializer):
+	response = serializers.ListField(child=serializers.IntegerField(min_value=0, max_value=9), max_length=MAX_ITEMS)
+
+
+SUBMIT_SERIALIZERS = {
+	"math": MathSubmitSerializer,
+	"grammar": ChoiceSubmitSerializer,
+	"reading": ReadingSubmitSerializer,
+	"memory": MemorySubmitSerializer,
+	"scenario": ChoiceSubmitSerializer,
+}
+
+
+class MathQuestionSerializer(serializers.Serializer):
+	a = serializers.IntegerField(min_value=-1000, max_value=1000)
+	b = serializers.IntegerField(min_value=-1000, max_value=1000)
+	op = serializers.ChoiceField(choices=["+", "-"])
+
+
+class BulkSessionSerializer(serializers.Serializer):
+	"""One completed session recorded on a device while offline."""
+
+	kind = serializers.ChoiceField(choices=KINDS)
+	user_id = serializers.IntegerField(required=False)
+	started_at = serializers.DateTimeField()
+	duration_seconds = serializers.IntegerField(min_value=0, max_value=24 * 3600)
+	# math
+	questions = MathQuestionSerializer(many=True, required=False)
+	# grammar / scenario: bank ids as served by the start endpoint
+	item_ids = serializers.ListField(child=serializers.IntegerField(), required=False, max_length=MAX_ITEMS)
+	# math / grammar / scenario
+	answers = serializers.ListField(child=serializers.JSONField(allow_null=True), required=False, max_length=MAX_ITEMS)
+	# reading
+	passage = serializers.CharField(required=False, max_length=20000)
+	transcript = serializers.CharField(required=False, allow_blank=True, max_length=20000)
+	# memory
+	sequence = serializers.ListField(child=serializers.IntegerField(min_value=0, max_value=9), required=False, max_length=MAX_ITEMS)
+	response = serializers.ListField(child=serializers.IntegerField(min_value=0, max_value=9), required=False, max_length=MAX_ITEMS)
+
+	REQUIRED = {
+		"math": ["questions", "answers"],
+		"grammar": ["item_ids", "answers"],
+		"scenario": ["item_ids", "answers"],
+		"reading": ["passage", "transcript"],
+		"memory": ["sequence", "response"],
+	}
+
+	def validate(self, attrs):
+		kind = attrs["kind"]
+		missing = [f for f in self.REQUIRED[kind] if f not in attrs]
+		if missing:
+			raise serializers.ValidationError({f: f"required for {kind} sessions" for f in missing})
+		if kind == "math":
+			answers = attrs["answers"]
+			if any(a is not None and (isinstance(a, bool) or not isinstance(a, int)) for a in answers):
+				raise serializers.ValidationError({"answers": "math answers must be integers or null"})
+		if kind in BANK_KINDS:
+			try:
+				items = bank.items(attrs["item_ids"])
+			except MissingItemsError:
+				items = None
+			if items is None or any(item.kind != kind for item in items):
+				raise serializers.ValidationError({"item_ids": f"unknown {kind} item"})
+			if any(a is not None and not isinstance(a, str) for a in attrs["answers"]):
+				raise serializers.ValidationError({"answers": "answers must be strings or null"})
+			attrs["items"] = items
+		return attrs
+
+
+class SyncRecordSerializer(BulkSessionSerializer):
+	"""One line of an offline sync batch (see ``assessments.sync``)."""
+
+	key = serializers.CharField(max_length=64)
+	seq = serializers.IntegerField(min_value=0, max_value=2**63 - 1)
+
+
+class BulkSubmitSerializer(serializers.Serializer):
+	sessions = BulkSessionSerializer(many=True, allow_empty=False, max_length=MAX_BULK_SESSIONS)
+
+
+class SessionSerializer(serializers.ModelSerializer):
+	class Meta:
+		fields = ["id", "started_at", "ended_at", "num_correct", "num_total", "duration_seconds"]
+
+
+class MathSessionSerializer(SessionSerializer):
+	class Meta(SessionSerializer.Meta):
+		model = MathTestSession
+
+
+class GrammarSessionSerializer(SessionSerializer):
+	class Meta(SessionSerializer.Meta):
+		model = GrammarTestSession
+
+
+class MemorySessionSerializer(SessionSerializer):
+	class Meta(SessionSerializer.Meta):
+		model = MemoryTestSession
+
+
+class ScenarioSessionSerializer(SessionSerializer):
+	class Meta(SessionSerializer.Meta):
+		model = ScenarioTestSession
+
+
+class ReadingSessionSerializer(serializers.ModelSerializer):
+	class Meta:
+		model = ReadingTestSession
+		fields = ["id", "started_at", "ended_at", "duration_seconds", "wpm", "accuracy"]
+
+
+SESSION_SERIALIZERS = {
+	"math": MathSessionSerializer,
+	"grammar": GrammarSessionSerializer,
+	"reading": ReadingSessionSerializer,
+	"memory": MemorySessionSerializer,
+	"scenario": ScenarioSessionSerializer,
+}
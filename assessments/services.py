@@ -0,0 +1,213 @@
+from __future__ import annotations
+
+import random
+from datetime import timedelta
+from typing import List, Optional, Sequence
+
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.utils import timezone
+
+from predictions.featurestore import rebuild_user_features, record_session_features
+from recommendations.services import rebuild_area_rollups, record_completed_session, refresh_recommendations
+from .itembank import BankItem, age_band_for, bank, build_responses, choice_index, math_item, recently_seen, resolve_items
+from .items import math_questions
+from .models import (
+	DemographicProfile,
+	GrammarTestSession,
+	ItemResponse,
+	MathTestSession,
+	MemoryTestSession,
+	ReadingTestSession,
+	ScenarioTestSession,
+)
+from .reading import score_reading
+
+
+SESSION_MODELS = {
+	"math": MathTestSession,
+	"grammar": GrammarTestSession,
+	"reading": ReadingTestSession,
+	"memory": MemoryTestSession,
+	"scenario": ScenarioTestSession,
+}
+
+
+# Grading shared by the HTML views, the live reading socket and the JSON API
+
+
+def finish_session(session, kind: Optional[str] = None, item_ids=(), choices=(), correct=()) -> bool:
+	"""Save a graded session once; False (and the stored attempt reloaded) if it was already finished."""
+	now = timezone.now()
+	with transaction.atomic():
+		# Claim the session first so a double submit is only saved and rolled up once
+		claimed = type(session).objects.filter(pk=session.pk, ended_at__isnull=True).update(ended_at=now)
+		if not claimed:
+			# Losing request: the first attempt's answers stand, matching the rollups
+			session.refresh_from_db()
+			return False
+		session.ended_at = now
+		session.save()
+		if kind:
+			ItemResponse.objects.bulk_create(build_responses(session, kind, item_ids, choices, correct))
+		record_completed_session(session)
+		record_session_features(session)
+		refresh_recommendations(session.user)
+	return True
+
+
+def draw_bank_items(user, kind: str, k: int, seed: int) -> List[BankItem]:
+	profile = DemographicProfile.objects.filter(user=user).order_by("-created_at").only("age").first()
+	units = bank.sample(
+		kind, k, random.Random(seed),
+		age_band=age_band_for(profile.age if profile else None),
+		exclude=recently_seen(user, kind),
+	)
+	return bank.items([pk for unit in units for pk in unit])
+
+
+def math_answer(q: dict) -> int:
+	return q["a"] + q["b"] if q["op"] == "+" else q["a"] - q["b"]
+
+
+def submit_math(session, answers: Sequence[Optional[int]], duration: int) -> None:
+	questions = math_questions(session.seed, session.num_total)
+	answers = _pad(answers, len(questions))
+	flags = [user_val == math_answer(q) for q, user_val in zip(questions, answers)]
+	session.num_correct = sum(flags)
+	session.duration_seconds = duration
+	item_ids = resolve_items("math", [math_item(q) for q in questions])
+	finish_session(session, "math", item_ids, answers, flags)
+
+
+def submit_choices(session, kind: str, items: Sequence[BankItem], values: Sequence[Optional[str]], duration: int) -> None:
+	"""Grade a multiple-choice test (grammar or scenario) against its bank items."""
+	values = _pad(values, len(items))
+	choices = [choice_index(item.options, value) for item, value in zip(items, values)]
+	flags = [value == item.answer for item, value in zip(items, values)]
+	session.num_correct = sum(flags)
+	session.duration_seconds = duration
+	finish_session(session, kind, [item.id for item in items], choices, flags)
+
+
+def submit_memory(session, response: Sequence[int], duration: int) -> None:
+	session.response = list(response)
+	session.num_correct = sum(1 for a, b in zip(session.target_sequence, session.response) if a == b)
+	session.duration_seconds = duration
+	finish_session(session)
+
+
+def finish_reading_session(session, transcript: str, duration: int, score, words=None, timing=None) -> None:
+	"""Persist a finished reading attempt; shared by the form POST, live socket and audio upload."""
+	# With real word timestamps, WPM is over time spent speaking rather than on the page
+	seconds = timing["speech_seconds"] if timing and timing["speech_seconds"] > 0 else duration
+	session.transcript = transcript
+	session.duration_seconds = duration
+	session.wpm = float(f"{score.wpm(seconds):.2f}")
+	session.accuracy = float(f"{score.accuracy:.2f}")
+	session.details = score.as_details()
+	if words is not None:
+		session.details["words"] = words  # [[word, start seconds(, end seconds)], ...]
+	if timing:
+		session.details.update(timing)
+	finish_session(session)
+
+
+def submit_reading(session, transcript: str, duration: int) -> None:
+	finish_reading_session(session, transcript, duration, score_reading(session.passage, transcript))
+
+
+def import_sessions(records: Sequence[dict], refresh: bool = True) -> List[dict]:
+	"""Insert completed sessions collected offline, a few queries per test kind.
+
+	Each record is a validated dict with ``kind``, ``user_id``, ``started_at``,
+	``duration_seconds`` and the kind's content and answers (see
+	``assessments.serializers.BulkSessionSerializer``). Rollups and
+	recommendations are rebuilt once per affected user afterwards; pass
+	``refresh=False`` to defer that to a single ``refresh_users`` call when
+	importing in several slices.
+	"""
+	by_kind: dict = {}
+	for index, record in enumerate(records):
+		by_kind.setdefault(record["kind"], []).append((index, record))
+	created: List[Optional[dict]] = [None] * len(records)
+	with transaction.atomic():
+		responses: List[ItemResponse] = []
+		math_ids = _resolve_math_items([record for _, record in by_kind.get("math", [])])
+		for kind, group in by_kind.items():
+			model = SESSION_MODELS[kind]
+			sessions, answers = [], []
+			for n, (_, record) in enumerate(group):
+				session, answer = _offline_session(model, kind, record, math_ids[n] if kind == "math" else None)
+				sessions.append(session)
+				answers.append(answer)
+			model.objects.bulk_create(sessions)
+			# auto_now_add overrides started_at on insert; restore the device's timestamps
+			for session, (_, record) in zip(sessions, group):
+				session.started_at = record["started_at"]
+			model.objects.bulk_update(sessions, ["started_at"])
+			for session, answer, (index, _) in zip(sessions, answers, group):
+				if answer is not None:
+					responses.extend(build_responses(session, kind, *answer))
+				created[index] = {"kind": kind, "id": session.pk}
+		ItemResponse.objects.bulk_create(responses)
+		if refresh:
+			refresh_users({record["user_id"] for record in records})
+	return created
+
+
+def refresh_users(user_ids) -> None:
+	"""Rebuild area rollups, model features and recommendations after a bulk import."""
+	user_ids = sorted(user_ids)
+	rebuild_area_rollups(user_ids)
+	rebuild_user_features(user_ids)
+	for user in get_user_model().objects.filter(pk__in=user_ids):
+		refresh_recommendations(user)
+
+
+def _resolve_math_items(records: Sequence[dict]) -> List[List[int]]:
+	# One resolve_items call for every math record; its id cache only fills on commit
+	flat = [math_item(q) for record in records for q in record["questions"]]
+	ids = iter(resolve_items("math", flat)) if flat else iter(())
+	return [[next(ids) for _ in record["questions"]] for record in records]
+
+
+def _offline_session(model, kind: str, record: dict, item_ids: Optional[List[int]] = None):
+	"""Build an unsaved finished session and, for item-based kinds, its (item_ids, choices, correct)."""
+	common = {
+		"user_id": record["user_id"],
+		"duration_seconds": record["duration_seconds"],
+		"ended_at": record["started_at"] + timedelta(seconds=record["duration_seconds"]),
+	}
+	if kind == "math":
+		questions = record["questions"]
+		answers = _pad(record["answers"], len(questions))
+		flags = [value == math_answer(q) for q, value in zip(questions, answers)]
+		session = model(num_total=len(questions), num_correct=sum(flags), **common)
+		return session, (item_ids, answers, flags)
+	if kind in ("grammar", "scenario"):
+		items = record["items"]
+		values = _pad(record["answers"], len(items))
+		choices = [choice_index(item.options, value) for item, value in zip(items, values)]
+		flags = [value == item.answer for item, value in zip(items, values)]
+		extra = {"scenario_text": items[0].stimulus if items else ""} if kind == "scenario" else {}
+		session = model(num_total=len(items), num_correct=sum(flags), **extra, **common)
+		return session, ([item.id for item in items], choices, flags)
+	if kind == "memory":
+		sequence, response = record["sequence"], record["response"]
+		correct = sum(1 for a, b in zip(sequence, response) if a == b)
+		return model(sequence=sequence, response=response, num_total=len(sequence), num_correct=correct, **common), None
+	score = score_reading(record["passage"], record["transcript"])
+	session = model(
+		passage=record["passage"],
+		transcript=record["transcript"],
+		wpm=float(f"{score.wpm(record['duration_seconds']):.2f}"),
+		accuracy=float(f"{score.accuracy:.2f}"),
+		details=score.as_details(),
+		**common,
+	)
+	return session, None
+
+
+def _pad(values: Sequence, n: int) -> list:
+	return list(values)[:n] + [None] * max(0, n - len(values))
@@ -0,0 +1,10 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .itembank import bank
+from .models import Item
+
+
+@receiver([post_save, post_delete], sender=Item)
+def invalidate_item_bank(**kwargs):
+	bank.invalidate()
@@ -0,0 +1,228 @@
+from __future__ import annotations
+
+import json
+import logging
+import os
+import shutil
+import threading
+import time
+from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from functools import lru_cache
+from pathlib import Path
+from typing import List, Optional
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.utils.module_loading import import_string
+
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class RecognizedWord:
+	word: str
+	start: float  # seconds since the recording started
+	end: float
+
+
+class Recognizer(ABC):
+	"""Turns one uploaded audio chunk into timed words. Shared across threads."""
+
+	@abstractmethod
+	def recognize(self, audio: bytes, content_type: str, offset: float) -> List[RecognizedWord]:
+		...
+
+
+class OfflineStubRecognizer(Recognizer):
+	"""Local backend for development and tests: the "audio" is UTF-8 text.
+
+	Words are spaced ``word_seconds`` apart from the chunk offset, so timing
+	metrics are deterministic without any network or model. A student could
+	upload the passage as text, so it is refused unless DEBUG is on.
+	"""
+
+	word_seconds = 0.4
+
+	def recognize(self, audio: bytes, content_type: str, offset: float) -> List[RecognizedWord]:
+		words = audio.decode("utf-8", errors="ignore").split()
+		step = self.word_seconds
+		return [RecognizedWord(w, round(offset + i * step, 3), round(offset + (i + 1) * step - 0.1, 3)) for i, w in enumerate(words)]
+
+
+class GoogleSpeechRecognizer(Recognizer):
+	"""Google Cloud Speech-to-Text, one synchronous request per chunk with word offsets."""
+
+	ENCODINGS = {
+		"audio/l16": "LINEAR16",
+		"audio/wav": "LINEAR16",
+		"audio/x-wav": "LINEAR16",
+		"audio/webm": "WEBM_OPUS",
+		"audio/ogg": "OGG_OPUS",
+		"audio/flac": "FLAC",
+	}
+
+	def __init__(self):
+		from google.cloud import speech  # optional dependency, only needed for this backend
+
+		self._speech = speech
+		self._client = speech.SpeechClient()
+
+	def recognize(self, audio: bytes, content_type: str, offset: float) -> List[RecognizedWord]:
+		speech = self._speech
+		encoding = self.ENCODINGS.get(content_type.split(";")[0].strip().lower(), "LINEAR16")
+		config = speech.RecognitionConfig(
+			encoding=getattr(speech.RecognitionConfig.AudioEncoding, encoding),
+			sample_rate_hertz=settings.SPEECH_SAMPLE_RATE,
+			language_code=settings.SPEECH_LANGUAGE,
+			enable_word_time_offsets=True,
+		)
+		response = self._client.recognize(config=config, audio=speech.RecognitionAudio(content=audio))
+		words = []
+		for result in response.results:
+			if not result.alternatives:
+				continue
+			for w in result.alternatives[0].words:
+				words.append(RecognizedWord(
+					w.word,
+					round(offset + w.start_time.total_seconds(), 3),
+					round(offset + w.end_time.total_seconds(), 3),
+				))
+		return words
+
+
+@lru_cache(maxsize=1)
+def get_recognizer() -> Recognizer:
+	if not settings.SPEECH_BACKEND:
+		raise ImproperlyConfigured("SPEECH_BACKEND must be set when DEBUG is off.")
+	backend = import_string(settings.SPEECH_BACKEND)
+	if issubclass(backend, OfflineStubRecognizer) and not settings.DEBUG:
+		raise ImproperlyConfigured("OfflineStubRecognizer scores uploaded text and is only allowed with DEBUG on.")
+	return backend()
+
+
+# Bounded pool: at most SPEECH_WORKERS running plus SPEECH_QUEUE_LIMIT waiting chunks
+_executor: Optional[ThreadPoolExecutor] = None
+_executor_lock = threading.Lock()
+_slots: Optional[threading.BoundedSemaphore] = None
+
+
+def _get_executor() -> ThreadPoolExecutor:
+	global _executor, _slots
+	if _executor is None:
+		with _executor_lock:
+			if _executor is None:
+				_slots = threading.BoundedSemaphore(settings.SPEECH_WORKERS + settings.SPEECH_QUEUE_LIMIT)
+				_executor = ThreadPoolExecutor(max_workers=settings.SPEECH_WORKERS, thread_name_prefix="speech")
+	return _executor
+
+
+def spool_dir(session_id: int) -> Path:
+	return Path(settings.SPEECH_SPOOL_DIR) / str(session_id)
+
+
+def _write_result(base: Path, seq: int, result: dict) -> None:
+	tmp = base / f"{seq:06d}.json.tmp"
+	tmp.write_text(json.dumps(result))
+	os.replace(tmp, base / f"{seq:06d}.json")
+	(base / f"{seq:06d}.audio").unlink(missing_ok=True)
+	(base / f"{seq:06d}.meta").unlink(missing_ok=True)
+
+
+def _recognize_chunk(session_id: int, seq: int, content_type: str, offset: float) -> None:
+	base = spool_dir(session_id)
+	try:
+		audio = (base / f"{seq:06d}.audio").read_bytes()
+	except FileNotFoundError:
+		return  # a requeued copy that another worker already finished
+	try:
+		words = get_recognizer().recognize(audio, content_type, offset)
+		result = {"words": [[w.word, w.start, w.end] for w in words]}
+	except Exception as exc:
+		# Record the failure so finishing the test is not blocked on this chunk
+		logger.exception("Speech recognition failed for session %s chunk %s", session_id, seq)
+		result = {"words": [], "error": str(exc)}
+	_write_result(base, seq, result)
+
+
+def _queue(session_id: int, seq: int, content_type: str, offset: float) -> bool:
+	executor = _get_executor()
+	if not _slots.acquire(blocking=False):
+		return False
+	try:
+		future = executor.submit(_recognize_chunk, session_id, seq, content_type, offset)
+	except Exception:
+		_slots.release()
+		raise
+	future.add_done_callback(lambda _: _slots.release())
+	return True
+
+
+def submit_chunk(session_id: int, seq: int, audio: bytes, content_type: str, offset: float) -> bool:
+	"""Spool a chunk and queue it for recognition; False when the pool is full."""
+	get_recognizer()  # a misconfigured backend fails the upload, not every chunk silently
+	base = spool_dir(session_id)
+	base.mkdir(parents=True, exist_ok=True)
+	# The sidecar lets pending_chunks requeue the chunk if this worker dies first
+	meta = {"content_type": content_type, "offset": offset, "created": time.time()}
+	(base / f"{seq:06d}.meta").write_text(json.dumps(meta))
+	(base / f"{seq:06d}.audio").write_bytes(audio)
+	if not _queue(session_id, seq, content_type, offset):
+		(base / f"{seq:06d}.audio").unlink(missing_ok=True)
+		(base / f"{seq:06d}.meta").unlink(missing_ok=True)
+		return False
+	return True
+
+
+def pending_chunks(session_id: int) -> int:
+	"""Chunks still waiting for recognition.
+
+	A chunk untouched for SPEECH_CHUNK_TIMEOUT seconds was orphaned by a
+	worker that died or restarted: it is queued again here, and after
+	SPEECH_CHUNK_ATTEMPTS timeouts recorded as failed, so finishing the test
+	never waits on it forever.
+	"""
+	base = spool_dir(session_id)
+	if not base.exists():
+		return 0
+	now = time.time()
+	timeout = settings.SPEECH_CHUNK_TIMEOUT
+	pending = 0
+	for audio in sorted(base.glob("*.audio")):
+		try:
+			age = now - audio.stat().st_mtime
+		except FileNotFoundError:
+			continue  # finished while we looked
+		if age < timeout:
+			pending += 1
+			continue
+		seq = int(audio.stem)
+		meta_path = base / f"{seq:06d}.meta"
+		try:
+			meta = json.loads(meta_path.read_text())
+		except (FileNotFoundError, ValueError):
+			meta = None
+		if meta is not None and now - meta["created"] < timeout * settings.SPEECH_CHUNK_ATTEMPTS:
+			os.utime(audio)  # restart the clock, so other requests do not queue it again
+			if _queue(session_id, seq, meta["content_type"], meta["offset"]):
+				logger.warning("Requeued orphaned speech chunk %s of session %s", seq, session_id)
+			pending += 1
+			continue
+		logger.warning("Giving up on speech chunk %s of session %s", seq, session_id)
+		_write_result(base, seq, {"words": [], "error": "recognition did not finish"})
+	return pending
+
+
+def collect_words(session_id: int) -> List[RecognizedWord]:
+	"""All recognised words for a session, in chunk order."""
+	base = spool_dir(session_id)
+	words: List[RecognizedWord] = []
+	for path in sorted(base.glob("*.json")) if base.exists() else []:
+		words.extend(RecognizedWord(w, s, e) for w, s, e in json.loads(path.read_text())["words"])
+	return words
+
+
+def discard(session_id: int) -> None:
+	shutil.rmtree(spool_dir(session_id), ignore_errors=True)
@@ -0,0 +1,181 @@
+"""Offline-first sync of completed sessions from classroom devices.
+
+A batch is newline-delimited JSON, optionally gzip-compressed. Each line is
+one session in the bulk endpoint's format plus ``key`` (an idempotency key
+the client generates once per session) and ``seq`` (increasing per device).
+The batch is streamed and applied in slices inside one transaction; keys
+already in ``SyncedSession`` are skipped, so retries never double-insert.
+The device's ``SyncCursor`` watermark is returned so the next sync only
+sends records with a higher ``seq``.
+"""
+from __future__ import annotations
+
+import gzip
+import json
+import zlib
+from dataclasses import dataclass, field
+from typing import Iterable, Iterator, List, Optional, Set, Tuple
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from rest_framework.exceptions import ValidationError
+
+from .models import SyncCursor, SyncedSession
+from .serializers import SyncRecordSerializer
+from .services import import_sessions, refresh_users
+
+
+MAX_LINE_BYTES = 256 * 1024  # one session; reading passages are the largest
+MAX_REPORTED_ERRORS = 100
+
+
+class SyncError(Exception):
+	"""The batch as a whole cannot be applied; nothing from it is stored."""
+
+	status = 400
+
+
+class SyncTooLarge(SyncError):
+	status = 413
+
+
+@dataclass
+class SyncResult:
+	watermark: int
+	applied: int = 0
+	duplicates: int = 0
+	rejected: int = 0
+	errors: List[dict] = field(default_factory=list)
+
+
+def iter_lines(stream, gzipped: bool, max_bytes: Optional[int] = None) -> Iterator[Tuple[int, bytes]]:
+	"""Yield (line number, line) from an NDJSON body without reading it all into memory.
+
+	``max_bytes`` caps the decompressed size, so a small gzip bomb fails fast.
+	"""
+	max_bytes = settings.SYNC_MAX_BYTES if max_bytes is None else max_bytes
+	source = gzip.GzipFile(fileobj=stream, mode="rb") if gzipped else stream
+	total = 0
+	lineno = 0
+	try:
+		while True:
+			line = source.readline(MAX_LINE_BYTES + 1)
+			if not line:
+				return
+			lineno += 1
+			total += len(line)
+			if total > max_bytes:
+				raise SyncTooLarge(f"batch exceeds {max_bytes} bytes uncompressed")
+			if len(line) > MAX_LINE_BYTES:
+				raise SyncTooLarge(f"line {lineno} exceeds {MAX_LINE_BYTES} bytes")
+			line = line.strip()
+			if line:
+				yield lineno, line
+	except (OSError, EOFError, zlib.error) as exc:
+		raise SyncError(f"unreadable gzip body: {exc}") from exc
+
+
+def _chunks(lines: Iterable[Tuple[int, bytes]], size: int) -> Iterator[List[Tuple[int, bytes]]]:
+	chunk: List[Tuple[int, bytes]] = []
+	for line in lines:
+		chunk.append(line)
+		if len(chunk) >= size:
+			yield chunk
+			chunk = []
+	if chunk:
+		yield chunk
+
+
+def _seq(data: dict, serializer: SyncRecordSerializer) -> Optional[int]:
+	try:
+		return serializer.fields["seq"].run_validation(data.get("seq"))
+	except ValidationError:
+		return None
+
+
+def _parse(raw: bytes, uploader, serializer: SyncRecordSerializer) -> Tuple[Optional[int], Optional[dict], Optional[object]]:
+	"""Return (seq, record, errors); ``seq`` is read on its own so a rejected record still carries it."""
+	try:
+		data = json.loads(raw)
+	except ValueError as exc:
+		return None, None, f"invalid JSON: {exc}"
+	if not isinstance(data, dict):
+		return None, None, "expected a JSON object"
+	seq = _seq(data, serializer)
+	# One serializer validates every line, as ListSerializer does; building fields per record dominates otherwise
+	try:
+		record = serializer.run_validation(data)
+	except ValidationError as exc:
+		return seq, None, exc.detail
+	record.setdefault("user_id", uploader.pk)
+	if record["user_id"] != uploader.pk and not uploader.is_staff:
+		return seq, None, "only staff can sync sessions for other users"
+	return seq, record, None
+
+
+def apply_batch(uploader, device: str, lines: Iterable[Tuple[int, bytes]]) -> SyncResult:
+	"""Apply one sync batch atomically and advance the device watermark.
+
+	Invalid records are reported and skipped rather than failing the batch,
+	so one bad session cannot block a device forever; their ``seq``, when it
+	is itself a valid integer, still counts towards the watermark.
+	"""
+	seen: Set[str] = set()
+	touched: Set[int] = set()
+	received = 0
+	serializer = SyncRecordSerializer()
+	with transaction.atomic():
+		# Row lock serializes concurrent syncs from the same device
+		cursor, _ = SyncCursor.objects.select_for_update().get_or_create(user=uploader, device=device)
+		result = SyncResult(watermark=cursor.watermark)
+		for chunk in _chunks(lines, settings.SYNC_CHUNK_SIZE):
+			received += len(chunk)
+			if received > settings.SYNC_MAX_RECORDS:
+				raise SyncTooLarge(f"batch exceeds {settings.SYNC_MAX_RECORDS} records")
+			records = []
+			for lineno, raw in chunk:
+				seq, record, errors = _parse(raw, uploader, serializer)
+				if seq is not None:
+					result.watermark = max(result.watermark, seq)
+				if errors is not None:
+					result.rejected += 1
+					if len(result.errors) < MAX_REPORTED_ERRORS:
+						result.errors.append({"line": lineno, "errors": errors})
+					continue
+				if record["key"] in seen:
+					result.duplicates += 1
+					continue
+				seen.add(record["key"])
+				records.append((lineno, record))
+			owners = {r["user_id"] for _, r in records}
+			known_users = set(get_user_model().objects.filter(pk__in=owners).values_list("pk", flat=True))
+			known_keys = set(
+				SyncedSession.objects.filter(user=uploader, key__in=[r["key"] for _, r in records]).values_list("key", flat=True)
+			)
+			fresh = []
+			for lineno, record in records:
+				if record["key"] in known_keys:
+					result.duplicates += 1
+				elif record["user_id"] not in known_users:
+					result.rejected += 1
+					if len(result.errors) < MAX_REPORTED_ERRORS:
+						result.errors.append({"line": lineno, "errors": {"user_id": "unknown user"}})
+				else:
+					fresh.append(record)
+			if not fresh:
+				continue
+			created = import_sessions(fresh, refresh=False)
+			# A concurrent upload of the same key trips the unique constraint and rolls back the batch
+			SyncedSession.objects.bulk_create([
+				SyncedSession(user=uploader, key=r["key"], device=device, seq=r["seq"], kind=c["kind"], session_id=c["id"])
+				for r, c in zip(fresh, created)
+			])
+			touched.update(r["user_id"] for r in fresh)
+			result.applied += len(fresh)
+		if touched:
+			refresh_users(touched)
+		if result.watermark != cursor.watermark:
+			cursor.watermark = result.watermark
+			cursor.save(update_fields=["watermark", "updated_at"])
+	return result
@@ -0,0 +1,157 @@
+import gzip
+import io
+import json
+import random
+
+from django.contrib.auth import get_user_model
+from django.test import SimpleTestCase, TestCase
+
+from assessments.models import MemoryTestSession, SyncCursor, SyncedSession
+from assessments.reading import IncrementalReadingScorer, score_reading, tokenize
+from assessments.sync import SyncError, SyncTooLarge, apply_batch, iter_lines
+
+
+UNBANDED = 10**6
+
+
+class ReadingAlignmentTests(SimpleTestCase):
+	passage = " ".join(f"w{i}" for i in range(200))
+
+	def counts(self, score):
+		return (score.matches, score.substitutions, score.omissions, score.insertions, score.repetitions)
+
+	def test_exact_reading(self):
+		score = score_reading("The cat sat on the mat.", "the cat sat on the mat")
+		self.assertEqual(self.counts(score), (6, 0, 0, 0, 0))
+		self.assertEqual(score.accuracy, 1.0)
+
+	def test_miscues(self):
+		# "sat sat" costs less as a substitution for "on" than as a repetition plus an omission
+		score = score_reading("the cat sat on the mat", "the dog sat sat the mat mat")
+		self.assertEqual(self.counts(score), (4, 2, 0, 0, 1))
+		score = score_reading("the cat sat on the mat", "the cat sat the mat")
+		self.assertEqual(self.counts(score), (5, 0, 1, 0, 0))
+
+	def test_skip_longer_than_band(self):
+		words = self.passage.split()
+		transcript = " ".join(words[:80] + words[120:])
+		banded = score_reading(self.passage, transcript, band=32)
+		self.assertEqual(self.counts(banded), self.counts(score_reading(self.passage, transcript, band=UNBANDED)))
+		self.assertEqual((banded.matches, banded.omissions), (160, 40))
+		self.assertAlmostEqual(banded.accuracy, 0.8)
+
+	def test_banded_matches_unbanded(self):
+		rng = random.Random(0)
+		vocab = "the a cat dog ran sat on mat and then it was".split()
+		for _ in range(200):
+			ref = [rng.choice(vocab) for _ in range(rng.randint(20, 120))]
+			hyp = list(ref)
+			for _ in range(rng.randint(0, 4)):
+				i = rng.randrange(len(hyp) + 1)
+				op = rng.random()
+				if op < 0.4:
+					del hyp[i:i + rng.randint(1, 50)]
+				elif op < 0.7:
+					hyp.insert(i, rng.choice(vocab))
+				elif i < len(hyp):
+					hyp[i] = rng.choice(vocab)
+			passage, transcript = " ".join(ref), " ".join(hyp)
+			with self.subTest(passage=passage, transcript=transcript):
+				self.assertEqual(
+					self.counts(score_reading(passage, transcript, band=8)),
+					self.counts(score_reading(passage, transcript, band=UNBANDED)),
+				)
+
+	def test_chunked_feed_matches_whole_transcript(self):
+		transcript = "w0 w1 w2 w40 w41 w42 w43 w3 w4"
+		scorer = IncrementalReadingScorer(self.passage, band=4)
+		# Split mid-word: the tail is held back until the next chunk
+		for chunk in ("w0 w", "1 w2 w4", "0 w41 w42", " w43 w3 w4"):
+			scorer.feed(chunk)
+		self.assertEqual(self.counts(scorer.result()), self.counts(score_reading(self.passage, transcript, band=4)))
+
+	def test_running_score_tracks_position(self):
+		scorer = IncrementalReadingScorer(self.passage)
+		partial = scorer.feed("w0 w1 w2 ")
+		self.assertEqual((partial.position, partial.matches, partial.accuracy), (3, 3, 1.0))
+		self.assertEqual(scorer.result().omissions, 197)
+
+	def test_tokenize(self):
+		self.assertEqual(tokenize("It's a dog_house, 42!"), ["it", "s", "a", "dog", "house", "42"])
+
+
+class SyncTests(TestCase):
+	@classmethod
+	def setUpTestData(cls):
+		cls.user = get_user_model().objects.create_user("pupil@example.com", "pw")
+
+	def record(self, key, seq, **extra):
+		data = {
+			"kind": "memory",
+			"started_at": "2026-01-05T09:00:00Z",
+			"duration_seconds": 30,
+			"sequence": [1, 2, 3],
+			"response": [1, 2, 4],
+			"key": key,
+			"seq": seq,
+		}
+		data.update(extra)
+		return json.dumps(data).encode()
+
+	def sync(self, *lines, device="tablet-1"):
+		return apply_batch(self.user, device, iter_lines(io.BytesIO(b"\n".join(lines)), gzipped=False))
+
+	def test_applies_records_and_advances_watermark(self):
+		result = self.sync(self.record("a", 1), self.record("b", 2))
+		self.assertEqual((result.applied, result.duplicates, result.rejected, result.watermark), (2, 0, 0, 2))
+		self.assertEqual(MemoryTestSession.objects.filter(user=self.user).count(), 2)
+		self.assertEqual(SyncCursor.objects.get(user=self.user, device="tablet-1").watermark, 2)
+
+	def test_resent_batch_is_idempotent(self):
+		lines = (self.record("a", 1), self.record("b", 2))
+		self.sync(*lines)
+		result = self.sync(*lines)
+		self.assertEqual((result.applied, result.duplicates), (0, 2))
+		self.assertEqual(MemoryTestSession.objects.filter(user=self.user).count(), 2)
+		self.assertEqual(SyncedSession.objects.filter(user=self.user).count(), 2)
+
+	def test_duplicate_key_within_batch(self):
+		result = self.sync(self.record("a", 1), self.record("a", 2))
+		self.assertEqual((result.applied, result.duplicates, result.watermark), (1, 1, 2))
+
+	def test_invalid_record_is_reported_and_counts_towards_watermark(self):
+		result = self.sync(self.record("a", 1), self.record("b", 7, response=[10]), b"not json")
+		self.assertEqual((result.applied, result.rejected, result.watermark), (1, 2, 7))
+		self.assertEqual([e["line"] for e in result.errors], [2, 3])
+		self.assertIn("response", result.errors[0]["errors"])
+
+	def test_invalid_seq_does_not_move_watermark(self):
+		result = self.sync(self.record("a", 3), self.record("b", "soon"))
+		self.assertEqual((result.applied, result.rejected, result.watermark), (1, 1, 3))
+
+	def test_unknown_owner_is_rejected_for_staff(self):
+		staff = get_user_model().objects.create_user("teacher@example.com", "pw", is_staff=True)
+		lines = iter_lines(io.BytesIO(self.record("a", 1, user_id=10**9)), gzipped=False)
+		result = apply_batch(staff, "tablet-1", lines)
+		self.assertEqual((result.applied, result.rejected, result.watermark), (0, 1, 1))
+		self.assertEqual(result.errors[0]["errors"], {"user_id": "unknown user"})
+
+	def test_other_users_records_need_staff(self):
+		other = get_user_model().objects.create_user("other@example.com", "pw")
+		result = self.sync(self.record("a", 1, user_id=other.pk))
+		self.assertEqual((result.applied, result.rejected), (0, 1))
+
+
+class SyncLineTests(SimpleTestCase):
+	def test_gzip_body(self):
+		body = gzip.compress(b'{"a": 1}\n\n{"b": 2}\n')
+		self.assertEqual(list(iter_lines(io.BytesIO(body), gzipped=True, max_bytes=1024)), [(1, b'{"a": 1}'), (3, b'{"b": 2}')])
+
+	def test_decompressed_size_is_capped(self):
+		body = gzip.compress(b"{}\n" * 1000)
+		with self.assertRaises(SyncTooLarge):
+			list(iter_lines(io.BytesIO(body), gzipped=True, max_bytes=100))
+
+	def test_corrupt_gzip(self):
+		with self.assertRaises(SyncError):
+			list(iter_lines(io.BytesIO(b"not gzip at all"), gzipped=True, max_bytes=1024))
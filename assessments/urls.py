@@ -11,6 +11,8 @@ from .views import (
 	reading_test_start,
 	reading_test_submit,
 	reading_test_result,
+	reading_audio_chunk,
+	reading_audio_finish,
 	memory_test_start,
 	memory_test_submit,
 	memory_test_result,
@@ -32,6 +34,8 @@ urlpatterns = [
 	path("reading/start/", reading_test_start, name="reading_test_start"),
 	path("reading/submit/", reading_test_submit, name="reading_test_submit"),
 	path("reading/result/<int:session_id>/", reading_test_result, name="reading_test_result"),
+	path("reading/audio/", reading_audio_chunk, name="reading_audio_chunk"),
+	path("reading/audio/finish/", reading_audio_finish, name="reading_audio_finish"),
 	path("memory/start/", memory_test_start, name="memory_test_start"),
 	path("memory/submit/", memory_test_submit, name="memory_test_submit"),
 	path("memory/result/<int:session_id>/", memory_test_result, name="memory_test_result"),
@@ -1,10 +1,16 @@
+import asyncio
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
 from django.contrib.auth.decorators import login_required
+from django.http import JsonResponse
 from django.shortcuts import redirect, render
 from django.urls import reverse
 from django.utils import timezone
-import random
+from django.views.decorators.http import require_POST
 import math
 
+from . import inflight, speech
 from .forms import DemographicProfileForm
 from .models import (
 	DemographicProfile,
@@ -14,6 +20,14 @@ from .models import (
 	MemoryTestSession,
 	ScenarioTestSession,
 )
+from .itembank import MissingItemsError, bank
+from .reading import score_reading, timing_metrics
+from .items import math_questions, memory_sequence, new_seed, reading_passage
+from .services import draw_bank_items, finish_reading_session, submit_choices, submit_math, submit_memory
+
+
+# Templates touch the lazy request.user, session and messages, so render in a thread
+arender = sync_to_async(render)
 
 
 @login_required
@@ -36,286 +50,252 @@ def intake_success(_request):
 
 
 @login_required
-def math_test_start(request):
-	# Generate 10 random arithmetic questions (+ or - within 0..20)
-	questions = []
-	for _ in range(10):
-		a = random.randint(0, 20)
-		b = random.randint(0, 20)
-		op = random.choice(["+", "-"])
-		questions.append({"a": a, "b": b, "op": op})
+async def math_test_start(request):
+	user = await request.auser()
+	seed = new_seed()
+	questions = math_questions(seed)
 	# Create session scaffold
-	session = MathTestSession.objects.create(user=request.user, num_total=len(questions))
-	request.session["math_test_id"] = session.id
-	request.session["math_questions"] = questions
-	request.session["math_start_ts"] = timezone.now().timestamp()
-	return render(request, "assessments/math_test.html", {"questions": questions, "session": session})
+	session = await MathTestSession.objects.acreate(user=user, seed=seed, num_total=len(questions))
+	await inflight.abegin(user, "math", session.id, seed)
+	return await arender(request, "assessments/math_test.html", {"questions": questions, "session": session})
 
 
 @login_required
-def math_test_submit(request):
+async def math_test_submit(request):
+	user = await request.auser()
 	if request.method != "POST":
 		return redirect("math_test_start")
-	session_id = request.session.get("math_test_id")
-	questions = request.session.get("math_questions", [])
-	start_ts = request.session.get("math_start_ts")
-	if not session_id or not questions or not start_ts:
+	state = await inflight.acurrent(user, "math")
+	if state is None:
 		return redirect("math_test_start")
-	session = MathTestSession.objects.get(id=session_id, user=request.user)
-	correct = 0
-	details = []
-	for idx, q in enumerate(questions):
-		a, b, op = q["a"], q["b"], q["op"]
-		answer = a + b if op == "+" else a - b
-		user_key = f"q_{idx}"
+	session = await MathTestSession.objects.aget(id=state.session_id, user=user)
+	answers = []
+	for idx in range(session.num_total):
 		try:
-			user_val = int(request.POST.get(user_key, ""))
+			answers.append(int(request.POST.get(f"q_{idx}", "")))
 		except ValueError:
-			user_val = None
-		is_correct = user_val == answer
-		if is_correct:
-			correct += 1
-		details.append({"a": a, "b": b, "op": op, "answer": answer, "user": user_val, "correct": is_correct})
-	duration = int(max(0, timezone.now().timestamp() - start_ts))
-	session.num_correct = correct
-	session.duration_seconds = duration
-	session.details = details
-	session.ended_at = timezone.now()
-	session.save()
-	# Clear session keys
-	for k in ["math_test_id", "math_questions", "math_start_ts"]:
-		request.session.pop(k, None)
+			answers.append(None)
+	duration = int(max(0, timezone.now().timestamp() - state.started_ts))
+	await sync_to_async(submit_math)(session, answers, duration)
+	await inflight.afinish(user, "math")
 	return redirect("math_test_result", session_id=session.id)
 
 
 @login_required
-def math_test_result(request, session_id: int):
-	session = MathTestSession.objects.get(id=session_id, user=request.user)
-	return render(request, "assessments/math_test_result.html", {"session": session})
+async def math_test_result(request, session_id: int):
+	user = await request.auser()
+	session = await MathTestSession.objects.aget(id=session_id, user=user)
+	rows = await sync_to_async(session.question_rows)()
+	return await arender(request, "assessments/math_test_result.html", {"session": session, "rows": rows})
 
 
 @login_required
-def grammar_test_start(request):
+async def grammar_test_start(request):
+	user = await request.auser()
 	# Five MCQ grammar items
-	bank = [
-		{"prompt": "Choose the correct form: She __ to school every day.", "options": ["go", "goes", "going"], "answer": "goes"},
-		{"prompt": "Fill the blank: They ___ playing.", "options": ["is", "are", "am"], "answer": "are"},
-		{"prompt": "Correct article: He is ___ honest man.", "options": ["a", "an", "the"], "answer": "an"},
-		{"prompt": "Verb tense: I ___ dinner when you called.", "options": ["cook", "was cooking", "cooks"], "answer": "was cooking"},
-		{"prompt": "Plural form: One child, two ___.", "options": ["childs", "children", "childes"], "answer": "children"},
-	]
-	random.shuffle(bank)
-	items = bank[:5]
-	session = GrammarTestSession.objects.create(user=request.user, num_total=len(items))
-	request.session["grammar_test_id"] = session.id
-	request.session["grammar_items"] = items
-	request.session["grammar_start_ts"] = timezone.now().timestamp()
-	return render(request, "assessments/grammar_test.html", {"items": items, "session": session})
+	seed = new_seed()
+	items = await sync_to_async(draw_bank_items)(user, "grammar", 5, seed)
+	session = await GrammarTestSession.objects.acreate(user=user, num_total=len(items))
+	await inflight.abegin(user, "grammar", session.id, seed, [item.id for item in items])
+	return await arender(request, "assessments/grammar_test.html", {"items": items, "session": session})
 
 
 @login_required
-def grammar_test_submit(request):
+async def grammar_test_submit(request):
+	user = await request.auser()
 	if request.method != "POST":
 		return redirect("grammar_test_start")
-	session_id = request.session.get("grammar_test_id")
-	items = request.session.get("grammar_items", [])
-	start_ts = request.session.get("grammar_start_ts")
-	if not session_id or not items or not start_ts:
+	state = await inflight.acurrent(user, "grammar")
+	if state is None or not state.item_ids:
 		return redirect("grammar_test_start")
-	session = GrammarTestSession.objects.get(id=session_id, user=request.user)
-	correct = 0
-	details = []
-	for idx, item in enumerate(items):
-		key = f"q_{idx}"
-		user_val = request.POST.get(key)
-		is_correct = user_val == item["answer"]
-		if is_correct:
-			correct += 1
-		details.append({
-			"prompt": item["prompt"],
-			"options": item["options"],
-			"answer": item["answer"],
-			"user": user_val,
-			"correct": is_correct,
-		})
-	duration = int(max(0, timezone.now().timestamp() - start_ts))
-	session.num_correct = correct
-	session.duration_seconds = duration
-	session.details = details
-	session.ended_at = timezone.now()
-	session.save()
-	for k in ["grammar_test_id", "grammar_items", "grammar_start_ts"]:
-		request.session.pop(k, None)
+	session = await GrammarTestSession.objects.aget(id=state.session_id, user=user)
+	try:
+		items = await sync_to_async(bank.items)(state.item_ids)
+	except MissingItemsError:
+		# A question was deleted mid-test; grading the rest by position would misalign them
+		await inflight.afinish(user, "grammar")
+		return redirect("grammar_test_start")
+	values = [request.POST.get(f"q_{idx}") for idx in range(len(items))]
+	duration = int(max(0, timezone.now().timestamp() - state.started_ts))
+	await sync_to_async(submit_choices)(session, "grammar", items, values, duration)
+	await inflight.afinish(user, "grammar")
 	return redirect("grammar_test_result", session_id=session.id)
 
 
 @login_required
-def grammar_test_result(request, session_id: int):
-	session = GrammarTestSession.objects.get(id=session_id, user=request.user)
-	return render(request, "assessments/grammar_test_result.html", {"session": session})
+async def grammar_test_result(request, session_id: int):
+	user = await request.auser()
+	session = await GrammarTestSession.objects.aget(id=session_id, user=user)
+	rows = await sync_to_async(session.question_rows)()
+	return await arender(request, "assessments/grammar_test_result.html", {"session": session, "rows": rows})
 
 
 # Reading test
-_PASSAGES = [
-	"The quick brown fox jumps over the lazy dog.",
-	"Reading fluently helps you understand and learn new ideas faster.",
-	"Students should practice every day to improve their skills.",
-]
-
-
-def _tokenize(text: str):
-	return [t for t in ''.join(c.lower() if c.isalnum() or c.isspace() else ' ' for c in text).split() if t]
-
-
 @login_required
-def reading_test_start(request):
-	passage = random.choice(_PASSAGES)
-	session = ReadingTestSession.objects.create(user=request.user, passage=passage)
-	request.session["reading_test_id"] = session.id
-	request.session["reading_start_ts"] = timezone.now().timestamp()
-	return render(request, "assessments/reading_test.html", {"session": session, "passage": passage})
+async def reading_test_start(request):
+	user = await request.auser()
+	seed = new_seed()
+	passage = reading_passage(seed)
+	session = await ReadingTestSession.objects.acreate(user=user, passage=passage)
+	await inflight.abegin(user, "reading", session.id, seed)
+	return await arender(request, "assessments/reading_test.html", {"session": session, "passage": passage})
 
 
 @login_required
-def reading_test_submit(request):
+async def reading_test_submit(request):
+	user = await request.auser()
 	if request.method != "POST":
 		return redirect("reading_test_start")
-	session_id = request.session.get("reading_test_id")
-	start_ts = request.session.get("reading_start_ts")
-	if not session_id or not start_ts:
+	state = await inflight.acurrent(user, "reading")
+	if state is None:
 		return redirect("reading_test_start")
-	session = ReadingTestSession.objects.get(id=session_id, user=request.user)
+	session = await ReadingTestSession.objects.aget(id=state.session_id, user=user)
 	transcript = request.POST.get("transcript", "").strip()
-	duration = int(max(0, timezone.now().timestamp() - start_ts))
-	# Compute WPM and accuracy
-	ref_tokens = _tokenize(session.passage)
-	hyp_tokens = _tokenize(transcript)
-	wpm = (len(hyp_tokens) / (duration / 60.0)) if duration > 0 else 0.0
-	# simple overlap accuracy
-	ref_set = set(ref_tokens)
-	overlap = sum(1 for t in hyp_tokens if t in ref_set)
-	accuracy = (overlap / max(1, len(ref_tokens)))
-	session.transcript = transcript
-	session.duration_seconds = duration
-	session.wpm = float(f"{wpm:.2f}")
-	session.accuracy = float(f"{accuracy:.2f}")
-	session.details = {"ref_len": len(ref_tokens), "hyp_len": len(hyp_tokens), "overlap": overlap}
-	session.ended_at = timezone.now()
-	session.save()
-	for k in ["reading_test_id", "reading_start_ts"]:
-		request.session.pop(k, None)
+	duration = int(max(0, timezone.now().timestamp() - state.started_ts))
+	# Compute WPM and accuracy from a word-level alignment against the passage
+	# Alignment is CPU-bound; keep it off the event loop
+	score = await asyncio.get_running_loop().run_in_executor(None, score_reading, session.passage, transcript)
+	await sync_to_async(finish_reading_session)(session, transcript, duration, score)
+	await inflight.afinish(user, "reading")
 	return redirect("reading_test_result", session_id=session.id)
 
 
 @login_required
-def reading_test_result(request, session_id: int):
-	session = ReadingTestSession.objects.get(id=session_id, user=request.user)
-	return render(request, "assessments/reading_test_result.html", {"session": session})
+@require_POST
+def reading_audio_chunk(request):
+	"""Accept one audio chunk (raw body) for the in-flight reading test.
+
+	Query parameters: ``seq`` (chunk number, from 0) and ``offset`` (seconds
+	since recording started). Returns 503 with Retry-After when the
+	recognition pool is saturated.
+	"""
+	state = inflight.current(request.user, "reading")
+	if state is None:
+		return JsonResponse({"error": "no reading test in progress"}, status=409)
+	try:
+		seq = int(request.GET["seq"])
+		offset = float(request.GET.get("offset", "0"))
+	except (KeyError, ValueError):
+		return JsonResponse({"error": "seq and offset must be numbers"}, status=400)
+	if not 0 <= seq < 100000 or not 0 <= offset < 24 * 3600:
+		return JsonResponse({"error": "seq or offset out of range"}, status=400)
+	if len(request.body) > settings.SPEECH_MAX_CHUNK_BYTES:
+		return JsonResponse({"error": "chunk too large"}, status=413)
+	if not speech.submit_chunk(state.session_id, seq, request.body, request.content_type or "", offset):
+		response = JsonResponse({"error": "busy"}, status=503)
+		response["Retry-After"] = "1"
+		return response
+	return JsonResponse({"seq": seq}, status=202)
+
+
+@login_required
+@require_POST
+def reading_audio_finish(request):
+	state = inflight.current(request.user, "reading")
+	if state is None:
+		return JsonResponse({"error": "no reading test in progress"}, status=409)
+	pending = speech.pending_chunks(state.session_id)
+	if pending:
+		response = JsonResponse({"pending": pending}, status=202)
+		response["Retry-After"] = "1"
+		return response
+	session = ReadingTestSession.objects.get(id=state.session_id, user=request.user)
+	words = [(w.word, w.start, w.end) for w in speech.collect_words(state.session_id)]
+	transcript = " ".join(w for w, _, _ in words)
+	duration = int(max(0, timezone.now().timestamp() - state.started_ts))
+	finish_reading_session(
+		session, transcript, duration, score_reading(session.passage, transcript),
+		words=[list(w) for w in words], timing=timing_metrics(words),
+	)
+	inflight.finish(request.user, "reading")
+	speech.discard(state.session_id)
+	return JsonResponse({"redirect": reverse("reading_test_result", args=[session.id])})
+
+
+@login_required
+async def reading_test_result(request, session_id: int):
+	user = await request.auser()
+	session = await ReadingTestSession.objects.aget(id=session_id, user=user)
+	return await arender(request, "assessments/reading_test_result.html", {"session": session})
 
 
 # Memory test: show sequence then collect recall
 @login_required
-def memory_test_start(request):
+async def memory_test_start(request):
+	user = await request.auser()
 	# Generate a sequence of 6 numbers 0..9
-	seq = [random.randint(0,9) for _ in range(6)]
-	session = MemoryTestSession.objects.create(user=request.user, sequence=seq, num_total=len(seq))
-	request.session["memory_test_id"] = session.id
-	request.session["memory_start_ts"] = timezone.now().timestamp()
-	return render(request, "assessments/memory_test.html", {"sequence": seq, "session": session})
+	seed = new_seed()
+	seq = memory_sequence(seed)
+	session = await MemoryTestSession.objects.acreate(user=user, seed=seed, num_total=len(seq))
+	await inflight.abegin(user, "memory", session.id, seed)
+	return await arender(request, "assessments/memory_test.html", {"sequence": seq, "session": session})
 
 
 @login_required
-def memory_test_submit(request):
+async def memory_test_submit(request):
+	user = await request.auser()
 	if request.method != "POST":
 		return redirect("memory_test_start")
-	session_id = request.session.get("memory_test_id")
-	start_ts = request.session.get("memory_start_ts")
-	if not session_id or not start_ts:
+	state = await inflight.acurrent(user, "memory")
+	if state is None:
 		return redirect("memory_test_start")
-	session = MemoryTestSession.objects.get(id=session_id, user=request.user)
+	session = await MemoryTestSession.objects.aget(id=state.session_id, user=user)
 	resp_raw = request.POST.get("response", "").strip()
 	resp = [int(x) for x in resp_raw.split() if x.isdigit()]
-	correct = sum(1 for a,b in zip(session.sequence, resp) if a==b)
-	duration = int(max(0, timezone.now().timestamp() - start_ts))
-	session.response = resp
-	session.num_correct = correct
-	session.duration_seconds = duration
-	session.ended_at = timezone.now()
-	session.save()
-	for k in ["memory_test_id", "memory_start_ts"]:
-		request.session.pop(k, None)
+	duration = int(max(0, timezone.now().timestamp() - state.started_ts))
+	await sync_to_async(submit_memory)(session, resp, duration)
+	await inflight.afinish(user, "memory")
 	return redirect("memory_test_result", session_id=session.id)
 
 
 @login_required
-def memory_test_result(request, session_id: int):
-	session = MemoryTestSession.objects.get(id=session_id, user=request.user)
-	pairs = list(zip(session.sequence, session.response))
-	return render(request, "assessments/memory_test_result.html", {"session": session, "pairs": pairs})
+async def memory_test_result(request, session_id: int):
+	user = await request.auser()
+	session = await MemoryTestSession.objects.aget(id=session_id, user=user)
+	pairs = list(zip(session.target_sequence, session.response))
+	return await arender(request, "assessments/memory_test_result.html", {"session": session, "pairs": pairs})
 
 
 # Scenario-based test: short passage with questions
-_SCENARIOS = [
-	{
-		"text": "Riya forgot her homework again. The teacher asked her why, and she said her little brother was sick and she had to help. The teacher gave her an extra day.",
-		"qa": [
-			{"q": "Why did Riya forget her homework?", "options": ["She played games", "Brother was sick", "She lost it"], "a": "Brother was sick"},
-			{"q": "What did the teacher do?", "options": ["Punished her", "Gave extra day", "Ignored it"], "a": "Gave extra day"},
-		]
-	},
-	{
-		"text": "Aman saw a puppy stuck behind a fence. He called a neighbor for help. Together they opened the gate and the puppy ran to its mother.",
-		"qa": [
-			{"q": "What problem did Aman see?", "options": ["Puppy stuck", "Cat on tree", "Lost toy"], "a": "Puppy stuck"},
-			{"q": "Who helped Aman?", "options": ["His teacher", "A neighbor", "A police officer"], "a": "A neighbor"},
-		]
-	},
-]
-
-
 @login_required
-def scenario_test_start(request):
-	s = random.choice(_SCENARIOS)
-	session = ScenarioTestSession.objects.create(user=request.user, scenario_text=s["text"], num_total=len(s["qa"]))
-	request.session["scenario_test_id"] = session.id
-	request.session["scenario_start_ts"] = timezone.now().timestamp()
-	request.session["scenario_items"] = s["qa"]
-	return render(request, "assessments/scenario_test.html", {"text": s["text"], "items": s["qa"], "session": session})
+async def scenario_test_start(request):
+	user = await request.auser()
+	seed = new_seed()
+	# One scenario: a group of questions sharing a stimulus
+	items = await sync_to_async(draw_bank_items)(user, "scenario", 1, seed)
+	text = items[0].stimulus if items else ""
+	session = await ScenarioTestSession.objects.acreate(user=user, scenario_text=text, num_total=len(items))
+	await inflight.abegin(user, "scenario", session.id, seed, [item.id for item in items])
+	return await arender(request, "assessments/scenario_test.html", {"text": text, "items": items, "session": session})
 
 
 @login_required
-def scenario_test_submit(request):
+async def scenario_test_submit(request):
+	user = await request.auser()
 	if request.method != "POST":
 		return redirect("scenario_test_start")
-	session_id = request.session.get("scenario_test_id")
-	start_ts = request.session.get("scenario_start_ts")
-	items = request.session.get("scenario_items", [])
-	if not session_id or not start_ts or not items:
+	state = await inflight.acurrent(user, "scenario")
+	if state is None or not state.item_ids:
+		return redirect("scenario_test_start")
+	session = await ScenarioTestSession.objects.aget(id=state.session_id, user=user)
+	try:
+		items = await sync_to_async(bank.items)(state.item_ids)
+	except MissingItemsError:
+		# A question was deleted mid-test; grading the rest by position would misalign them
+		await inflight.afinish(user, "scenario")
 		return redirect("scenario_test_start")
-	session = ScenarioTestSession.objects.get(id=session_id, user=request.user)
-	correct = 0
-	details = []
-	for idx, item in enumerate(items):
-		key = f"q_{idx}"
-		user_val = request.POST.get(key)
-		is_correct = user_val == item["a"]
-		if is_correct:
-			correct += 1
-		details.append({"q": item["q"], "options": item["options"], "a": item["a"], "user": user_val, "correct": is_correct})
-	duration = int(max(0, timezone.now().timestamp() - start_ts))
-	session.num_correct = correct
-	session.duration_seconds = duration
-	session.details = details
-	session.ended_at = timezone.now()
-	session.save()
-	for k in ["scenario_test_id", "scenario_start_ts", "scenario_items"]:
-		request.session.pop(k, None)
+	values = [request.POST.get(f"q_{idx}") for idx in range(len(items))]
+	duration = int(max(0, timezone.now().timestamp() - state.started_ts))
+	await sync_to_async(submit_choices)(session, "scenario", items, values, duration)
+	await inflight.afinish(user, "scenario")
 	return redirect("scenario_test_result", session_id=session.id)
 
 
 @login_required
-def scenario_test_result(request, session_id: int):
-	session = ScenarioTestSession.objects.get(id=session_id, user=request.user)
-	return render(request, "assessments/scenario_test_result.html", {"session": session})
+async def scenario_test_result(request, session_id: int):
+	user = await request.auser()
+	session = await ScenarioTestSession.objects.aget(id=session_id, user=user)
+	rows = await sync_to_async(session.question_rows)()
+	return await arender(request, "assessments/scenario_test_result.html", {"session": session, "rows": rows})
 
 
@@ -0,0 +1,34 @@
+import gc
+import os
+
+bind = os.environ.get("GUNICORN_BIND", "0.0.0.0:8000")
+workers = int(os.environ.get("GUNICORN_WORKERS", "2"))
+# ASGI: the async views run on the worker's event loop and the reading-test WebSocket
+# (Channels) is served; lddiag.wsgi would run every async view through async_to_sync
+# and has no WebSocket support at all
+worker_class = os.environ.get("GUNICORN_WORKER_CLASS", "uvicorn_worker.UvicornWorker")
+wsgi_app = "lddiag.asgi:application"
+
+# Import Django and load the classifier in the master, then fork: workers start with
+# the model's pages shared copy-on-write instead of each unpickling its own copy.
+# Turn off (GUNICORN_PRELOAD=0) to get per-worker code reloads.
+preload_app = os.environ.get("GUNICORN_PRELOAD", "1") == "1"
+
+
+def when_ready(server):
+	if not server.cfg.preload_app:
+		return
+	from predictions.registry import registry
+
+	registry.warm()
+	# Move everything loaded so far out of the collector's reach; otherwise the first
+	# collection in each worker writes to every object header and un-shares the pages
+	gc.freeze()
+
+
+def post_worker_init(worker):
+	# Without preload: load the classifier once per worker, before it accepts requests.
+	# With preload this finds the inherited entry and returns.
+	from predictions.registry import registry
+
+	registry.warm()
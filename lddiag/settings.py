@@ -68,6 +68,18 @@ DATABASES = {
 	}
 }
 
+CACHES = {
+	"default": {
+		"BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+	},
+	# In-flight tests must be visible to every worker: file-based by default, or point
+	# INFLIGHT_CACHE_BACKEND at django.core.cache.backends.db.DatabaseCache (run createcachetable)
+	"inflight": {
+		"BACKEND": os.environ.get("INFLIGHT_CACHE_BACKEND", "django.core.cache.backends.filebased.FileBasedCache"),
+		"LOCATION": os.environ.get("INFLIGHT_CACHE_LOCATION", str(BASE_DIR / "var" / "inflight")),
+	},
+}
+
 AUTH_PASSWORD_VALIDATORS = [
 	{"NAME": "django.contrib.auth.password_validation.UserAttributeSimilarityValidator"},
 	{"NAME": "django.contrib.auth.password_validation.MinimumLengthValidator"},
@@ -89,8 +101,46 @@ DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 CRISPY_ALLOWED_TEMPLATE_PACKS = "bootstrap5"
 CRISPY_TEMPLATE_PACK = "bootstrap5"
 
+REST_FRAMEWORK = {
+	"DEFAULT_AUTHENTICATION_CLASSES": [
+		"rest_framework.authentication.SessionAuthentication",
+		"rest_framework.authentication.BasicAuthentication",
+	],
+	"DEFAULT_PERMISSION_CLASSES": ["rest_framework.permissions.IsAuthenticated"],
+}
+
 AUTH_USER_MODEL = "accounts.UserAccount"
 LOGIN_URL = "login"
 LOGIN_REDIRECT_URL = "home"
 LOGOUT_REDIRECT_URL = "login"
 
+ASSESSMENT_INFLIGHT_CACHE = "inflight"
+ASSESSMENT_INFLIGHT_TTL = int(os.environ.get("ASSESSMENT_INFLIGHT_TTL", str(2 * 60 * 60)))
+
+# Generated PDF reports are cached on disk and built by a background pool
+REPORT_CACHE_DIR = Path(os.environ.get("REPORT_CACHE_DIR", BASE_DIR / "var" / "reports"))
+REPORT_WORKERS = int(os.environ.get("REPORT_WORKERS", "2"))
+REPORT_JOB_TIMEOUT = int(os.environ.get("REPORT_JOB_TIMEOUT", "600"))  # seconds "running" before a job is reclaimed
+REPORT_JOB_MAX_ATTEMPTS = int(os.environ.get("REPORT_JOB_MAX_ATTEMPTS", "3"))
+
+
+# Server-side speech recognition for reading tests (audio chunk uploads)
+# The text-as-audio stub is a development backend; production must name a real one
+SPEECH_BACKEND = os.environ.get("SPEECH_BACKEND", "assessments.speech.OfflineStubRecognizer" if DEBUG else "")
+SPEECH_LANGUAGE = os.environ.get("SPEECH_LANGUAGE", "en-US")
+SPEECH_SAMPLE_RATE = int(os.environ.get("SPEECH_SAMPLE_RATE", "16000"))
+SPEECH_WORKERS = int(os.environ.get("SPEECH_WORKERS", "4"))
+SPEECH_QUEUE_LIMIT = int(os.environ.get("SPEECH_QUEUE_LIMIT", "16"))  # waiting chunks before uploads get 503
+SPEECH_MAX_CHUNK_BYTES = int(os.environ.get("SPEECH_MAX_CHUNK_BYTES", str(2 * 1024 * 1024)))
+SPEECH_SPOOL_DIR = Path(os.environ.get("SPEECH_SPOOL_DIR", BASE_DIR / "var" / "audio"))
+SPEECH_CHUNK_TIMEOUT = int(os.environ.get("SPEECH_CHUNK_TIMEOUT", "120"))  # seconds before a spooled chunk counts as orphaned
+SPEECH_CHUNK_ATTEMPTS = int(os.environ.get("SPEECH_CHUNK_ATTEMPTS", "3"))
+
+# Offline device sync (api/assessments/sync/): limits per batch, applied in slices of SYNC_CHUNK_SIZE
+SYNC_MAX_BYTES = int(os.environ.get("SYNC_MAX_BYTES", str(64 * 1024 * 1024)))  # decompressed
+SYNC_MAX_RECORDS = int(os.environ.get("SYNC_MAX_RECORDS", "20000"))
+SYNC_CHUNK_SIZE = int(os.environ.get("SYNC_CHUNK_SIZE", "500"))
+
+# Pickled (joblib) models are opened with this numpy mmap mode, so large arrays stay in
+# the page cache and forked gunicorn workers share them; empty loads them into the heap
+MODEL_MMAP_MODE = os.environ.get("MODEL_MMAP_MODE", "r") or None
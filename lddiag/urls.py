@@ -15,6 +15,9 @@ urlpatterns = [
 	path("predictions/", include("predictions.urls")),
 	path("recommendations/", include("recommendations.urls")),
 	path("reports/", include("reports.urls")),
+	path("api/assessments/", include("assessments.api")),
+	path("api/predictions/", include("predictions.api")),
+	path("api/recommendations/", include("recommendations.api")),
 ]
 
 
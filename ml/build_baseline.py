@@ -1,44 +1,17 @@
 from pathlib import Path
+import sys
+
 import joblib
-import numpy as np
 from sklearn.linear_model import LogisticRegression
 
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from predictions.synthetic import synthetic_dataset  # noqa: E402
+
 
 def main() -> None:
-	# Feature order must match predictions.services.default_model_spec
-	feature_order = [
-		"age",
-		"gender_male",
-		"gender_female",
-		"gender_other",
-		"reading_difficulties",
-		"attention_low",
-		"attention_medium",
-		"attention_high",
-	]
-
-	# Create synthetic training data
-	# Intuition: reading difficulties and low attention increase LD risk; age, gender neutral here
-	n_samples = 1000
-	age = np.random.randint(6, 19, size=(n_samples, 1)).astype(float)
-	gender_idx = np.random.randint(0, 3, size=n_samples)
-	gender = np.eye(3, dtype=float)[gender_idx]
-	reading = np.random.binomial(1, 0.3, size=(n_samples, 1)).astype(float)
-	attention_idx = np.random.randint(0, 3, size=n_samples)
-	attention_levels = np.eye(3, dtype=float)[attention_idx]
-
-	X = np.concatenate([age, gender, reading := reading, attention_levels], axis=1)
-
-	# Generate probabilities using a simple linear combination
-	logits = (
-		0.0
-		+ 0.05 * (X[:, 0] - 10.0)  # slight age effect
-		+ 1.5 * X[:, 4]            # reading_difficulties
-		+ 0.8 * X[:, 5]            # attention_low
-		- 0.5 * X[:, 7]            # attention_high
-	)
-	p = 1.0 / (1.0 + np.exp(-logits))
-	Y = (np.random.rand(n_samples) < p).astype(int)
+	# Create synthetic training data (see predictions/synthetic.py); model selection
+	# and calibration over the same generator: manage.py select_model --source synthetic
+	X, Y = synthetic_dataset(1000)
 
 	model = LogisticRegression(max_iter=1000)
 	model.fit(X, Y)
@@ -51,5 +24,3 @@ def main() -> None:
 
 if __name__ == "__main__":
 	main()
-
-
@@ -0,0 +1,81 @@
+from django.urls import path
+from rest_framework import serializers, status
+from rest_framework.exceptions import ValidationError
+from rest_framework.generics import ListAPIView
+from rest_framework.pagination import CursorPagination
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from assessments.models import DemographicProfile
+from .models import PredictionResult
+from .registry import get_classifier
+from .services import store_predictions
+
+
+MAX_BULK_INTAKES = 1000
+
+
+class PredictionSerializer(serializers.ModelSerializer):
+	class Meta:
+		model = PredictionResult
+		fields = ["id", "intake", "label", "probability", "model_name", "created_at"]
+
+
+class CreatePredictionSerializer(serializers.Serializer):
+	intake_id = serializers.IntegerField()
+
+
+class BulkPredictionSerializer(serializers.Serializer):
+	intake_ids = serializers.ListField(child=serializers.IntegerField(), allow_empty=False, max_length=MAX_BULK_INTAKES)
+
+
+class PredictionPagination(CursorPagination):
+	page_size = 50
+	ordering = ("-created_at", "-id")
+
+
+def _intakes(user):
+	# Staff can score any intake (e.g. a whole class); others only their own
+	qs = DemographicProfile.objects.all()
+	return qs if user.is_staff else qs.filter(user=user)
+
+
+class PredictionListCreateView(ListAPIView):
+	"""GET: the user's predictions, newest first. POST ``{"intake_id"}``: score one intake."""
+
+	serializer_class = PredictionSerializer
+	pagination_class = PredictionPagination
+
+	def get_queryset(self):
+		return PredictionResult.objects.filter(user=self.request.user)
+
+	def post(self, request):
+		serializer = CreatePredictionSerializer(data=request.data)
+		serializer.is_valid(raise_exception=True)
+		classifier = get_classifier()
+		rows = list(classifier.profile_values(_intakes(request.user).filter(pk=serializer.validated_data["intake_id"]), "id", "user_id"))
+		if not rows:
+			raise ValidationError({"intake_id": "unknown intake"})
+		prediction = store_predictions(classifier, rows)[0]
+		return Response(PredictionSerializer(prediction).data, status=status.HTTP_201_CREATED)
+
+
+class BulkPredictionView(APIView):
+	"""POST ``{"intake_ids": [...]}``: score many intakes in one pass and bulk-insert the results."""
+
+	def post(self, request):
+		serializer = BulkPredictionSerializer(data=request.data)
+		serializer.is_valid(raise_exception=True)
+		ids = set(serializer.validated_data["intake_ids"])
+		classifier = get_classifier()
+		rows = list(classifier.profile_values(_intakes(request.user).filter(pk__in=ids), "id", "user_id"))
+		if len(rows) != len(ids):
+			raise ValidationError({"intake_ids": "unknown intake"})
+		created = store_predictions(classifier, rows)
+		return Response({"created": PredictionSerializer(created, many=True).data}, status=status.HTTP_201_CREATED)
+
+
+urlpatterns = [
+	path("", PredictionListCreateView.as_view(), name="api_predictions"),
+	path("bulk/", BulkPredictionView.as_view(), name="api_predictions_bulk"),
+]
@@ -0,0 +1,122 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Sequence, Tuple
+
+import numpy as np
+
+
+# Kept free of Django imports so ml/ training scripts can use it directly.
+
+DEFAULT_FEATURE_ORDER = [
+	"age",
+	"gender_male",
+	"gender_female",
+	"gender_other",
+	"reading_difficulties",
+	"attention_low",
+	"attention_medium",
+	"attention_high",
+]
+
+# Test-battery features from the per-user feature store; not columns of DemographicProfile,
+# so querysets must be annotated with them first (predictions.services.annotate_features)
+TEST_FEATURES = [
+	"math_accuracy",
+	"grammar_accuracy",
+	"reading_accuracy",
+	"reading_wpm",
+	"memory_accuracy",
+	"scenario_accuracy",
+	"math_seconds_per_item",
+	"grammar_seconds_per_item",
+	"scenario_seconds_per_item",
+	"memory_span",
+	"memory_span_max",
+	"sessions_completed",
+]
+
+TRAINING_FEATURE_ORDER = DEFAULT_FEATURE_ORDER + TEST_FEATURES
+
+
+@dataclass(frozen=True)
+class FeatureDef:
+	source: str  # DemographicProfile field (or annotated column) the feature reads
+	equals: Optional[Any] = None  # one-hot value; None means numeric passthrough
+
+
+FEATURE_DEFS: Dict[str, FeatureDef] = {
+	"age": FeatureDef("age"),
+	"gender_male": FeatureDef("gender", "male"),
+	"gender_female": FeatureDef("gender", "female"),
+	"gender_other": FeatureDef("gender", "other"),
+	"reading_difficulties": FeatureDef("reading_difficulties"),
+	"attention_low": FeatureDef("attention_span", "low"),
+	"attention_medium": FeatureDef("attention_span", "medium"),
+	"attention_high": FeatureDef("attention_span", "high"),
+	**{name: FeatureDef(name) for name in TEST_FEATURES},
+}
+
+
+class FeatureEncoder:
+	"""Turns raw profile rows into a model matrix laid out by ``feature_order``.
+
+	The column plan is compiled once: numeric features map a source column to an
+	output index, one-hot features map (source column, value) to an index.
+	Features without a definition are left as constant zero columns.
+	"""
+
+	def __init__(self, feature_order: Sequence[str]):
+		self.feature_order: List[str] = list(feature_order)
+		self.index: Dict[str, int] = {name: i for i, name in enumerate(self.feature_order)}
+		sources: List[str] = []
+		self._numeric: List[Tuple[int, int]] = []  # (source position, output column)
+		self._onehot: List[Tuple[int, Any, int]] = []  # (source position, value, output column)
+		for col, name in enumerate(self.feature_order):
+			definition = FEATURE_DEFS.get(name)
+			if definition is None:
+				continue
+			if definition.source not in sources:
+				sources.append(definition.source)
+			pos = sources.index(definition.source)
+			if definition.equals is None:
+				self._numeric.append((pos, col))
+			else:
+				self._onehot.append((pos, definition.equals, col))
+		self.source_fields: Tuple[str, ...] = tuple(sources)
+
+	@property
+	def width(self) -> int:
+		return len(self.feature_order)
+
+	def transform_columns(self, columns: Mapping[str, Sequence[Any]], n_rows: int) -> np.ndarray:
+		X = np.zeros((n_rows, self.width), dtype=float)
+		if n_rows == 0:
+			return X
+		arrays = [np.asarray(columns[field]) for field in self.source_fields]
+		for pos, col in self._numeric:
+			values = arrays[pos]
+			if values.dtype == object:
+				values = np.where(values == None, 0, values)  # noqa: E711 - elementwise None check
+			X[:, col] = values.astype(float)
+		for pos, value, col in self._onehot:
+			X[:, col] = arrays[pos] == value
+		return X
+
+	def transform(self, rows: Sequence[Sequence[Any]]) -> np.ndarray:
+		"""Encode tuples ordered like ``source_fields`` (e.g. ``values_list(*source_fields)``)."""
+		rows = rows if isinstance(rows, list) else list(rows)
+		if not rows:
+			return np.zeros((0, self.width), dtype=float)
+		columns = dict(zip(self.source_fields, zip(*rows)))
+		return self.transform_columns(columns, len(rows))
+
+	def transform_values(self, rows: Iterable[Mapping[str, Any]]) -> np.ndarray:
+		"""Encode dicts such as the output of ``queryset.values(*source_fields)``."""
+		rows = rows if isinstance(rows, list) else list(rows)
+		columns = {field: [row[field] for row in rows] for field in self.source_fields}
+		return self.transform_columns(columns, len(rows))
+
+	def transform_objects(self, objects: Sequence[Any]) -> np.ndarray:
+		columns = {field: [getattr(obj, field) for obj in objects] for field in self.source_fields}
+		return self.transform_columns(columns, len(objects))
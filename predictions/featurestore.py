@@ -0,0 +1,144 @@
+from __future__ import annotations
+
+from datetime import datetime
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models import Count, F, Sum
+from django.db.models.functions import Greatest
+from django.utils import timezone
+
+from assessments.models import GrammarTestSession, MathTestSession, MemoryTestSession, ReadingTestSession, ScenarioTestSession
+from .models import UserFeatures
+
+
+_KINDS = {
+	MathTestSession: "math",
+	GrammarTestSession: "grammar",
+	ScenarioTestSession: "scenario",
+	MemoryTestSession: "memory",
+	ReadingTestSession: "reading",
+}
+
+
+def memory_span(target: Sequence[int], response: Sequence[int]) -> int:
+	"""Digits recalled correctly, in order, before the first mistake."""
+	span = 0
+	for a, b in zip(target, response):
+		if a != b:
+			break
+		span += 1
+	return span
+
+
+def _increments(session) -> Dict[str, float]:
+	kind = _KINDS[type(session)]
+	inc = {"sessions": 1, f"{kind}_sessions": 1, f"{kind}_seconds": session.duration_seconds}
+	if kind == "reading":
+		inc.update(reading_accuracy_sum=session.accuracy, reading_wpm_sum=session.wpm)
+	else:
+		inc.update({f"{kind}_correct": session.num_correct, f"{kind}_items": session.num_total})
+	if kind == "memory":
+		inc["memory_span_sum"] = memory_span(session.target_sequence, session.response)
+	return inc
+
+
+# Columns _increments reads, so replaying history skips passages, transcripts and details
+_INCREMENT_COLUMNS = {
+	"math": ("num_correct", "num_total"),
+	"grammar": ("num_correct", "num_total"),
+	"scenario": ("num_correct", "num_total"),
+	"memory": ("num_correct", "num_total", "seed", "sequence", "response"),
+	"reading": ("accuracy", "wpm"),
+}
+
+
+def _apply(features: UserFeatures, inc: Dict[str, float]) -> None:
+	for name, value in inc.items():
+		setattr(features, name, getattr(features, name) + value)
+	if "memory_span_sum" in inc:
+		features.memory_span_max = max(features.memory_span_max, inc["memory_span_sum"])
+
+
+def features_as_of(points: Sequence[Tuple[int, Optional[datetime]]]) -> List[Optional[UserFeatures]]:
+	"""Unsaved features for each (user id, cutoff) from sessions that ended by the cutoff.
+
+	What ``UserFeatures`` held for that user at that moment (None where no
+	session had finished), for training on history without later sessions
+	leaking in; a cutoff of None counts every session.
+	"""
+	by_user: Dict[int, List[int]] = {}
+	for i, (user_id, _) in enumerate(points):
+		by_user.setdefault(user_id, []).append(i)
+	result: List[Optional[UserFeatures]] = [None] * len(points)
+	for model, kind in _KINDS.items():
+		done = model.objects.filter(user_id__in=by_user, ended_at__isnull=False).order_by()
+		for session in done.only("user_id", "ended_at", "duration_seconds", *_INCREMENT_COLUMNS[kind]).iterator(chunk_size=2000):
+			inc = None
+			for i in by_user[session.user_id]:
+				cutoff = points[i][1]
+				if cutoff is not None and session.ended_at > cutoff:
+					continue
+				inc = inc or _increments(session)
+				if result[i] is None:
+					result[i] = UserFeatures(user_id=session.user_id)
+				_apply(result[i], inc)
+	return result
+
+
+def record_session_features(session) -> None:
+	"""Fold a just-finished session into its user's features; call inside the saving transaction."""
+	inc = _increments(session)
+	UserFeatures.objects.get_or_create(user_id=session.user_id)
+	updates = {name: F(name) + value for name, value in inc.items()}
+	if "memory_span_sum" in inc:
+		updates["memory_span_max"] = Greatest(F("memory_span_max"), inc["memory_span_sum"])
+	UserFeatures.objects.filter(pk=session.user_id).update(**updates, updated_at=timezone.now())
+
+
+def rebuild_user_features(user_ids: List[int]) -> int:
+	"""Recompute features for ``user_ids`` from the session tables, one grouped query per kind.
+
+	Reads and rewrites inside one transaction that holds the users' feature
+	rows, so a session finishing meanwhile is either counted here or has its
+	F() increment applied after the rewrite. Returns how many of the users
+	have completed sessions.
+	"""
+	with transaction.atomic():
+		# A row must exist to be locked; record_session_features creates them the same way
+		existing = get_user_model().objects.filter(pk__in=user_ids).values_list("pk", flat=True)
+		UserFeatures.objects.bulk_create([UserFeatures(user_id=pk) for pk in existing], ignore_conflicts=True)
+		locked = UserFeatures.objects.select_for_update().filter(user_id__in=user_ids).order_by("pk")
+		rows: Dict[int, UserFeatures] = {pk: UserFeatures(user_id=pk) for pk in locked.values_list("pk", flat=True)}
+		for model, kind in _KINDS.items():
+			done = model.objects.filter(user_id__in=user_ids, ended_at__isnull=False).order_by()
+			if kind == "reading":
+				sums = {"first": Sum("accuracy"), "second": Sum("wpm")}
+			else:
+				sums = {"first": Sum("num_correct"), "second": Sum("num_total")}
+			for agg in done.values("user_id").annotate(n=Count("id"), seconds=Sum("duration_seconds"), **sums):
+				features = rows[agg["user_id"]]
+				features.sessions += agg["n"]
+				setattr(features, f"{kind}_sessions", agg["n"])
+				setattr(features, f"{kind}_seconds", agg["seconds"] or 0)
+				if kind == "reading":
+					features.reading_accuracy_sum = agg["first"] or 0.0
+					features.reading_wpm_sum = agg["second"] or 0.0
+				else:
+					setattr(features, f"{kind}_correct", agg["first"] or 0)
+					setattr(features, f"{kind}_items", agg["second"] or 0)
+			if kind == "memory":
+				# Span needs the digit lists themselves; stream just those columns
+				for session in done.only("user_id", "seed", "num_total", "sequence", "response").iterator(chunk_size=2000):
+					span = memory_span(session.target_sequence, session.response)
+					features = rows[session.user_id]
+					features.memory_span_sum += span
+					features.memory_span_max = max(features.memory_span_max, span)
+		now = timezone.now()
+		for features in rows.values():
+			features.updated_at = now
+		# Overwrite in place rather than delete and re-insert, which would drop the row locks
+		fields = [f.name for f in UserFeatures._meta.concrete_fields if not f.primary_key]
+		UserFeatures.objects.bulk_update(rows.values(), fields, batch_size=500)
+	return sum(1 for features in rows.values() if features.sessions)
@@ -0,0 +1,98 @@
+from __future__ import annotations
+
+import json
+from pathlib import Path
+from typing import List, Sequence, Tuple
+
+import numpy as np
+
+
+# NumPy-only, like features.py: serving a .json artifact never imports scikit-learn.
+# Exporting inspects fitted estimators by attribute for the same reason.
+
+FORMAT = "ld-linear/1"
+
+
+class LinearModel:
+	"""Logistic model as plain arrays: P(LD) = sigmoid(X @ coef + intercept).
+
+	Has the ``predict_proba`` shape LDClassifier expects from sklearn models.
+	"""
+
+	def __init__(self, coef: Sequence[float], intercept: float, feature_order: Sequence[str]):
+		self.coef = np.asarray(coef, dtype=float)
+		self.intercept = float(intercept)
+		self.feature_order: List[str] = list(feature_order)
+		if self.coef.shape != (len(self.feature_order),):
+			raise ValueError(f"{self.coef.shape[0]} coefficients for {len(self.feature_order)} features")
+
+	def decision_function(self, X: np.ndarray) -> np.ndarray:
+		return X @ self.coef + self.intercept
+
+	def predict_proba(self, X: np.ndarray) -> np.ndarray:
+		# exp(-log(1 + e^-z)) is sigmoid(z) without overflow for large |z|
+		p = np.exp(-np.logaddexp(0.0, -self.decision_function(X)))
+		return np.column_stack([1.0 - p, p])
+
+	def to_dict(self) -> dict:
+		return {
+			"format": FORMAT,
+			"feature_order": self.feature_order,
+			"coef": self.coef.tolist(),
+			"intercept": self.intercept,
+		}
+
+	@classmethod
+	def from_dict(cls, data: dict) -> "LinearModel":
+		if data.get("format") != FORMAT:
+			raise ValueError(f"Not a {FORMAT} artifact")
+		return cls(data["coef"], data["intercept"], data["feature_order"])
+
+	@classmethod
+	def load(cls, path: Path) -> "LinearModel":
+		return cls.from_dict(json.loads(Path(path).read_text()))
+
+
+def _linear_terms(model, calibrated: bool = False) -> Tuple[np.ndarray, float]:
+	"""(w, c) with decision_function(x) == x @ w + c for a fitted sklearn model."""
+	steps = [step for _, step in model.steps] if hasattr(model, "steps") else [model]
+	*transforms, last = steps
+	if hasattr(last, "calibrated_classifiers_"):
+		# CalibratedClassifierCV(ensemble=False, method="sigmoid"): p = sigmoid(-(a * f(x) + b))
+		if transforms or len(last.calibrated_classifiers_) != 1:
+			raise ValueError("Only a single (ensemble=False) calibrated model can be exported")
+		fold = last.calibrated_classifiers_[0]
+		calibrator = fold.calibrators[0]
+		if not hasattr(calibrator, "a_"):
+			raise ValueError("Only sigmoid calibration is linear; isotonic cannot be exported")
+		w, c = _linear_terms(fold.estimator, calibrated=True)
+		return -calibrator.a_ * w, -(calibrator.a_ * c + calibrator.b_)
+	coef = getattr(last, "coef_", None)
+	if coef is None or np.asarray(coef).shape[0] != 1:
+		raise ValueError(f"{type(last).__name__} is not a binary linear model")
+	if not calibrated and getattr(last, "loss", "log_loss") != "log_loss":
+		raise ValueError(f"{type(last).__name__}(loss={last.loss!r}) has no logistic probabilities")
+	w = np.asarray(coef, dtype=float)[0]
+	c = float(np.asarray(last.intercept_, dtype=float)[0])
+	for step in reversed(transforms):
+		if not hasattr(step, "scale_"):
+			raise ValueError(f"Cannot fold {type(step).__name__} into the coefficients")
+		# w . ((x - mean) / scale) + c == (w / scale) . x + (c - w . mean / scale)
+		scale = np.ones_like(w) if step.scale_ is None else np.asarray(step.scale_, dtype=float)
+		mean = np.zeros_like(w) if getattr(step, "mean_", None) is None else np.asarray(step.mean_, dtype=float)
+		w = w / scale
+		c = c - float(w @ mean)
+	return w, c
+
+
+def export_linear(model, feature_order: Sequence[str]) -> LinearModel:
+	"""Fold scaling and sigmoid calibration into one coefficient vector; raises ValueError if not linear."""
+	w, c = _linear_terms(model)
+	return LinearModel(w, c, feature_order)
+
+
+def parity_error(model, linear: LinearModel, X: np.ndarray) -> float:
+	"""Largest |P(LD)| difference between the sklearn model and its export on ``X``."""
+	if len(X) == 0:
+		return 0.0
+	return float(np.max(np.abs(model.predict_proba(X)[:, 1] - linear.predict_proba(X)[:, 1])))
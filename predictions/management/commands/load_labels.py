@@ -0,0 +1,72 @@
+import json
+from datetime import datetime, time
+from typing import Optional
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+
+from assessments.models import DemographicProfile
+from predictions.models import DiagnosisLabel
+
+
+def _diagnosed_at(value) -> Optional[datetime]:
+	if not isinstance(value, str):
+		return None
+	try:
+		parsed = parse_datetime(value)
+		if parsed is None:
+			day = parse_date(value)
+			# A bare date counts from the start of the day: sessions later that day are not used
+			parsed = None if day is None else datetime.combine(day, time.min)
+	except ValueError:
+		return None
+	if parsed is not None and timezone.is_naive(parsed):
+		parsed = timezone.make_aware(parsed)
+	return parsed
+
+
+class Command(BaseCommand):
+	help = "Load confirmed diagnoses from a JSON Lines file as training labels (upsert by intake)."
+
+	def add_arguments(self, parser):
+		parser.add_argument(
+			"path",
+			help=(
+				"One JSON object per line: intake_id, has_ld, diagnosed_at (ISO 8601 date or datetime, when the "
+				"diagnosis was made; training ignores sessions after it) and optional source."
+			),
+		)
+		parser.add_argument("--batch-size", type=int, default=1000)
+
+	def handle(self, *args, **options):
+		batch, total = [], 0
+		with open(options["path"], encoding="utf-8") as fh:
+			for lineno, line in enumerate(fh, 1):
+				if not line.strip():
+					continue
+				row = json.loads(line)
+				if not isinstance(row.get("intake_id"), int) or not isinstance(row.get("has_ld"), bool):
+					raise CommandError(f"line {lineno}: intake_id (int) and has_ld (bool) are required")
+				diagnosed_at = _diagnosed_at(row.get("diagnosed_at"))
+				if diagnosed_at is None:
+					raise CommandError(f"line {lineno}: diagnosed_at (ISO 8601 date or datetime) is required")
+				if diagnosed_at > timezone.now():
+					raise CommandError(f"line {lineno}: diagnosed_at is in the future")
+				batch.append(DiagnosisLabel(
+					intake_id=row["intake_id"], has_ld=row["has_ld"], source=row.get("source", ""), diagnosed_at=diagnosed_at,
+				))
+				if len(batch) >= options["batch_size"]:
+					total += self._flush(batch)
+					batch = []
+		if batch:
+			total += self._flush(batch)
+		self.stdout.write(self.style.SUCCESS(f"Loaded {total} labels."))
+
+	def _flush(self, batch):
+		known = set(DemographicProfile.objects.filter(pk__in=[label.intake_id for label in batch]).values_list("pk", flat=True))
+		missing = sorted({label.intake_id for label in batch} - known)
+		if missing:
+			raise CommandError(f"Unknown intake ids: {missing[:10]}")
+		DiagnosisLabel.objects.bulk_create(batch, update_conflicts=True, unique_fields=["intake"], update_fields=["has_ld", "source", "diagnosed_at", "recorded_at"])
+		return len(batch)
@@ -0,0 +1,155 @@
+import dataclasses
+import gc
+import json
+import os
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import numpy as np
+from django.core.management.base import BaseCommand, CommandError
+
+from predictions.services import LDClassifier, ModelSpec, default_model_spec
+
+
+SMAPS = Path("/proc/self/smaps_rollup")
+
+# mode -> (load in the parent before fork, mmap_mode). "none" loads nothing: the
+# interpreter + Django floor that every worker pays anyway.
+MODES = {
+	"none": (False, None),
+	"private": (False, None),  # no preload, no mmap: each worker unpickles its own copy
+	"mmap": (False, "r"),  # per-worker load (hot reload), arrays shared through the page cache
+	"preload": (True, None),  # gunicorn preload_app: loaded once, inherited copy-on-write
+	"preload+mmap": (True, "r"),
+}
+
+
+def _memory_kb() -> Dict[str, int]:
+	fields = {}
+	for line in SMAPS.read_text().splitlines()[1:]:
+		name, value = line.split(":", 1)
+		fields[name] = int(value.split()[0])
+	return {
+		"rss": fields["Rss"],
+		"pss": fields["Pss"],
+		# Unique set size: what the kernel would free if this worker exited
+		"uss": fields["Private_Clean"] + fields["Private_Dirty"],
+	}
+
+
+def _worker(spec: ModelSpec, classifier: Optional[LDClassifier], load: bool, X: np.ndarray, ready: int, go: int) -> None:
+	if load and classifier is None:
+		classifier = LDClassifier(spec)
+	if classifier is not None:
+		classifier.predict_matrix(X)  # serve a request so every array the model uses is touched
+	gc.collect()  # a worker's collector runs sooner or later; measure after it has
+	os.write(ready, b"\n")
+	os.read(go, 1)  # measure only once every worker is alive, so PSS splits shared pages fairly
+	os.write(ready, (json.dumps(_memory_kb()) + "\n").encode())
+	os.read(go, 1)  # stay alive until the parent has every reading
+
+
+class Command(BaseCommand):
+	help = (
+		"Fork N worker processes per loading strategy and report RSS, PSS and USS per worker "
+		"(Linux only), to size gunicorn workers and check that model pages are shared."
+	)
+
+	def add_arguments(self, parser):
+		parser.add_argument("--workers", type=int, default=4)
+		parser.add_argument("--modes", default=",".join(MODES), help=f"Comma-separated subset of: {', '.join(MODES)}.")
+		parser.add_argument("--artifact", type=Path, help="Model to measure (default: the manifest's, as served).")
+		parser.add_argument("--rows", type=int, default=256, help="Rows per warm-up prediction in each worker.")
+
+	def handle(self, *args, **options):
+		if not SMAPS.exists():
+			raise CommandError(f"{SMAPS} is not available; this measurement needs Linux 4.14+.")
+		modes = [m.strip() for m in options["modes"].split(",") if m.strip()]
+		unknown = set(modes) - set(MODES)
+		if unknown:
+			raise CommandError(f"Unknown modes: {', '.join(sorted(unknown))}")
+		spec = default_model_spec()
+		if options["artifact"] is not None:
+			spec = dataclasses.replace(spec, path=options["artifact"])
+		if not Path(spec.path).exists():
+			raise CommandError(f"No model artifact at {spec.path}")
+		X = np.random.default_rng(0).random((options["rows"], len(spec.feature_order)))
+
+		self.stdout.write(f"{spec.path} ({Path(spec.path).stat().st_size / 2**20:.1f} MB), {options['workers']} workers")
+		self.stdout.write(f"{'mode':<14}{'RSS/worker':>12}{'PSS/worker':>12}{'USS/worker':>12}{'PSS total':>12}")
+		for mode in modes:
+			readings = self._isolated(mode, spec, X, options["workers"])
+			mean = {key: sum(r[key] for r in readings) / len(readings) / 1024 for key in ("rss", "pss", "uss")}
+			total = sum(r["pss"] for r in readings) / 1024
+			self.stdout.write(f"{mode:<14}{mean['rss']:>10.1f}MB{mean['pss']:>10.1f}MB{mean['uss']:>10.1f}MB{total:>10.1f}MB")
+
+	def _isolated(self, mode: str, spec: ModelSpec, X: np.ndarray, workers: int) -> List[Dict[str, int]]:
+		# Each mode forks its workers from a fresh copy of this process, so a model loaded
+		# (and freed) by an earlier mode does not linger in the next mode's inherited heap
+		read_fd, write_fd = os.pipe()
+		pid = os.fork()
+		if pid == 0:
+			os.close(read_fd)
+			status = 0
+			try:
+				with os.fdopen(write_fd, "w") as out:
+					json.dump(self._measure(mode, spec, X, workers), out)
+			except BaseException as exc:
+				status = 1
+				self.stderr.write(f"{mode}: {exc}")
+			os._exit(status)
+		os.close(write_fd)
+		with os.fdopen(read_fd) as results:
+			data = results.read()
+		_, status = os.waitpid(pid, 0)
+		if status != 0 or not data:
+			raise CommandError(f"Measuring {mode} failed")
+		return json.loads(data)
+
+	def _measure(self, mode: str, spec: ModelSpec, X: np.ndarray, workers: int) -> List[Dict[str, int]]:
+		preload, mmap_mode = MODES[mode]
+		spec = dataclasses.replace(spec, mmap_mode=mmap_mode)
+		classifier = None
+		if preload:
+			classifier = LDClassifier(spec)
+			classifier.load()
+			gc.freeze()  # as gunicorn.conf.py's when_ready does before forking
+		children = []
+		for _ in range(workers):
+			ready_r, ready_w = os.pipe()
+			go_r, go_w = os.pipe()
+			pid = os.fork()
+			if pid == 0:
+				status = 0
+				try:
+					os.close(ready_r)
+					os.close(go_w)
+					for _, sibling_ready, sibling_go in children:
+						# Inherited ends of earlier workers' pipes would keep them from seeing EOF
+						sibling_ready.close()
+						os.close(sibling_go)
+					_worker(spec, classifier, mode != "none", X, ready_w, go_r)
+				except BaseException:
+					status = 1
+				os._exit(status)
+			os.close(ready_w)
+			os.close(go_r)
+			children.append((pid, os.fdopen(ready_r), go_w))
+		try:
+			for _, ready, _ in children:
+				if not ready.readline():
+					raise CommandError(f"A {mode} worker failed before measuring")
+			for _, _, go in children:
+				os.write(go, b"g")
+			readings = []
+			for _, ready, _ in children:
+				line = ready.readline()
+				if not line:
+					raise CommandError(f"A {mode} worker failed while measuring")
+				readings.append(json.loads(line))
+			return readings
+		finally:
+			for pid, ready, go in children:
+				os.close(go)  # EOF releases the worker
+				ready.close()
+				os.waitpid(pid, 0)
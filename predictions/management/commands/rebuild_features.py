@@ -0,0 +1,28 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+
+from predictions.featurestore import rebuild_user_features
+
+
+class Command(BaseCommand):
+	help = "Backfill the UserFeatures store from the completed test sessions."
+
+	def add_arguments(self, parser):
+		parser.add_argument("--user-id", type=int, action="append", dest="user_ids", help="Only rebuild these users (repeatable).")
+		parser.add_argument("--chunk-size", type=int, default=500)
+
+	def handle(self, *args, **options):
+		user_ids = options["user_ids"]
+		if user_ids is None:
+			user_ids = get_user_model().objects.order_by("pk").values_list("pk", flat=True).iterator(chunk_size=options["chunk_size"])
+		chunk, users, rows = [], 0, 0
+		for uid in user_ids:
+			chunk.append(uid)
+			if len(chunk) >= options["chunk_size"]:
+				rows += rebuild_user_features(chunk)
+				users += len(chunk)
+				chunk = []
+		if chunk:
+			rows += rebuild_user_features(chunk)
+			users += len(chunk)
+		self.stdout.write(self.style.SUCCESS(f"Rebuilt features for {rows} of {users} users."))
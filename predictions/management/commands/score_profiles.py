@@ -0,0 +1,30 @@
+from django.core.management.base import BaseCommand
+from django.db.models import Max
+
+from assessments.models import DemographicProfile
+from predictions.registry import get_classifier
+from predictions.services import annotate_features, iter_profile_chunks, store_predictions
+
+
+class Command(BaseCommand):
+	help = "Score DemographicProfiles in chunks and bulk-insert PredictionResults."
+
+	def add_arguments(self, parser):
+		parser.add_argument("--chunk-size", type=int, default=2000)
+		parser.add_argument("--latest-only", action="store_true", help="Only score each user's most recent intake.")
+		parser.add_argument("--model-name", default=None, help="Defaults to the loaded model's version.")
+
+	def handle(self, *args, **options):
+		classifier = get_classifier()
+		qs = DemographicProfile.objects.all()
+		fields = ("id", "user_id", *classifier.encoder.source_fields)
+		if options["latest_only"]:
+			latest_ids = DemographicProfile.objects.order_by().values("user").annotate(latest=Max("id")).values("latest")
+			qs = qs.filter(id__in=latest_ids)
+		qs = annotate_features(qs, classifier.encoder.source_fields)
+		total = 0
+		for chunk in iter_profile_chunks(qs, fields, chunk_size=options["chunk_size"]):
+			store_predictions(classifier, chunk, model_name=options["model_name"])
+			total += len(chunk)
+			self.stdout.write(f"Scored {total} profiles")
+		self.stdout.write(self.style.SUCCESS(f"Done: {total} predictions written."))
@@ -0,0 +1,104 @@
+import json
+
+import numpy as np
+from django.core.management.base import BaseCommand, CommandError
+
+from predictions.features import DEFAULT_FEATURE_ORDER, FEATURE_DEFS, TRAINING_FEATURE_ORDER
+from predictions.selection import CANDIDATES, select_model
+from predictions.synthetic import synthetic_dataset
+from predictions.training import TrainingReport, load_labelled, write_artifact
+
+
+class Command(BaseCommand):
+	help = (
+		"Cross-validated, parallel hyperparameter search over several estimators with probability "
+		"calibration; reports fit time, latency and metrics per candidate and can publish the winner."
+	)
+
+	def add_arguments(self, parser):
+		parser.add_argument(
+			"--source",
+			choices=["db", "synthetic"],
+			default="db",
+			help=(
+				"Labelled intakes (test-battery features as of each intake's next intake or diagnosis, so later "
+				"sessions do not leak in), or the ml/build_baseline.py generator."
+			),
+		)
+		parser.add_argument("--samples", type=int, default=5000, help="Rows to generate with --source synthetic.")
+		parser.add_argument("--max-rows", type=int, default=200000, help="Cap on labelled rows loaded with --source db.")
+		parser.add_argument("--features", default=None, help="Comma-separated feature order (db source only).")
+		parser.add_argument("--candidates", default=",".join(CANDIDATES), help=f"Any of: {', '.join(CANDIDATES)}.")
+		parser.add_argument("--folds", type=int, default=5)
+		parser.add_argument("--test-size", type=float, default=0.2)
+		parser.add_argument("--calibration", choices=["sigmoid", "isotonic"], default="sigmoid")
+		parser.add_argument("--latency-budget-ms", type=float, default=None, help="Max p95 single-row predict_proba latency.")
+		parser.add_argument("--n-jobs", type=int, default=-1, help="Parallel workers for the search (-1: all cores).")
+		parser.add_argument("--seed", type=int, default=0)
+		parser.add_argument(
+			"--format", choices=["auto", "linear", "joblib"], default="auto",
+			help="linear: coefficients as JSON, served without scikit-learn (auto uses it when the model is linear).",
+		)
+		parser.add_argument("--report", default=None, help="Write every candidate's results to this JSON file.")
+		parser.add_argument("--publish", action="store_true", help="Publish the winner as the serving model.")
+
+	def handle(self, *args, **options):
+		candidates = [c.strip() for c in options["candidates"].split(",") if c.strip()]
+		unknown = [c for c in candidates if c not in CANDIDATES]
+		if unknown or not candidates:
+			raise CommandError(f"Unknown candidates: {', '.join(unknown)}")
+		if options["source"] == "synthetic":
+			features = list(DEFAULT_FEATURE_ORDER)
+			X, y = synthetic_dataset(options["samples"], np.random.default_rng(options["seed"]))
+		else:
+			features = [f.strip() for f in (options["features"] or ",".join(TRAINING_FEATURE_ORDER)).split(",") if f.strip()]
+			missing = [f for f in features if f not in FEATURE_DEFS]
+			if missing:
+				raise CommandError(f"Unknown features: {', '.join(missing)}")
+			X, y = load_labelled(features, max_rows=options["max_rows"])
+		counts = np.bincount(y, minlength=2) if len(y) else np.zeros(2, dtype=int)
+		if counts.min() < 2 * options["folds"]:
+			raise CommandError(f"Need at least {2 * options['folds']} rows of each class, have {counts.tolist()}.")
+		self.stdout.write(f"Selecting over {len(y)} rows ({counts[1]} positive), {len(features)} features, {options['folds']} folds")
+
+		winner, results = select_model(
+			X, y,
+			candidates=candidates,
+			n_splits=options["folds"],
+			test_size=options["test_size"],
+			latency_budget_ms=options["latency_budget_ms"],
+			n_jobs=options["n_jobs"],
+			calibration=options["calibration"],
+			seed=options["seed"],
+			progress=self._progress,
+		)
+		if options["report"]:
+			with open(options["report"], "w", encoding="utf-8") as fh:
+				json.dump([r.summary() for r in results], fh, indent=2, default=str)
+		if winner is None:
+			raise CommandError("No candidate meets the latency budget.")
+		self.stdout.write(self.style.SUCCESS(f"Winner: {winner.name} {winner.best_params} threshold={winner.threshold:.2f}"))
+		if not options["publish"]:
+			return
+		n_test = int(round(len(y) * options["test_size"])) if options["test_size"] < 1 else int(options["test_size"])
+		report = TrainingReport(train_rows=len(y) - n_test, holdout_rows=n_test, positives=int(counts[1]), metrics=winner.test)
+		try:
+			path = write_artifact(
+				winner.model, features, report,
+				extra={"threshold": winner.threshold, "candidate": winner.name, "selection": [r.summary() for r in results]},
+				fmt=options["format"],
+				parity_sample=X[:5000],
+			)
+		except ValueError as exc:
+			raise CommandError(str(exc))
+		self.stdout.write(self.style.SUCCESS(f"Published model {report.version}: {path}"))
+
+	def _progress(self, result):
+		status = "" if result.within_budget else "  (over latency budget)"
+		self.stdout.write(
+			f"{result.name:14} cv_auc={result.cv['roc_auc']:.3f} cv_logloss={result.cv['log_loss']:.3f} "
+			f"test_logloss={result.test['log_loss']:.3f} test_auc={result.test.get('roc_auc', float('nan')):.3f} "
+			f"search={result.search_seconds:.1f}s fit={result.fit_seconds:.2f}s "
+			f"p50={result.latency_ms_p50:.2f}ms p95={result.latency_ms_p95:.2f}ms "
+			f"batch={result.batch_rows_per_second:,.0f} rows/s threshold={result.threshold:.2f}{status}"
+		)
@@ -0,0 +1,57 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from predictions.features import FEATURE_DEFS, TRAINING_FEATURE_ORDER
+from predictions.training import labelled_chunks, train_incremental, write_artifact
+
+
+class Command(BaseCommand):
+	help = (
+		"Train the LD model from labelled intakes in the database, streaming rows in chunks, and publish a versioned artifact. "
+		"Test-battery features are taken as they stood at each intake's cutoff (its user's next intake or the diagnosis, "
+		"whichever came first), not from the live feature store, so sessions taken after a diagnosis do not leak into training."
+	)
+
+	def add_arguments(self, parser):
+		parser.add_argument("--chunk-size", type=int, default=2000)
+		parser.add_argument("--epochs", type=int, default=5)
+		parser.add_argument("--holdout", type=float, default=0.1, help="Fraction of intakes held out for the reported metrics.")
+		parser.add_argument("--alpha", type=float, default=1e-4, help="L2 regularization strength.")
+		parser.add_argument("--features", default=",".join(TRAINING_FEATURE_ORDER), help="Comma-separated feature order.")
+		parser.add_argument("--seed", type=int, default=0)
+		parser.add_argument(
+			"--format", choices=["auto", "linear", "joblib"], default="auto",
+			help="linear: coefficients as JSON, served without scikit-learn (auto uses it when the model is linear).",
+		)
+		parser.add_argument("--dry-run", action="store_true", help="Train and report without writing an artifact.")
+
+	def handle(self, *args, **options):
+		features = [f.strip() for f in options["features"].split(",") if f.strip()]
+		unknown = [f for f in features if f not in FEATURE_DEFS]
+		if unknown:
+			raise CommandError(f"Unknown features: {', '.join(unknown)}")
+		if not 0.0 <= options["holdout"] < 1.0:
+			raise CommandError("--holdout must be in [0, 1)")
+		try:
+			model, report = train_incremental(
+				features,
+				chunk_size=options["chunk_size"],
+				epochs=options["epochs"],
+				holdout=options["holdout"],
+				alpha=options["alpha"],
+				seed=options["seed"],
+			)
+		except ValueError as exc:
+			raise CommandError(str(exc))
+		self.stdout.write(
+			f"Trained on {report.train_rows} intakes ({report.positives} positive overall), "
+			f"{report.holdout_rows} held out: {report.metrics}"
+		)
+		if options["dry_run"]:
+			return
+		# Parity check for the linear export on the first chunk of real rows
+		sample = next(labelled_chunks(features, options["chunk_size"]))[0]
+		try:
+			path = write_artifact(model, features, report, fmt=options["format"], parity_sample=sample)
+		except ValueError as exc:
+			raise CommandError(str(exc))
+		self.stdout.write(self.style.SUCCESS(f"Published model {report.version}: {path}"))
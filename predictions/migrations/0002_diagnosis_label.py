@@ -0,0 +1,25 @@
+# Generated by Django 5.2.18 on 2026-10-18 12:55
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('assessments', '0010_offline_sync'),
+        ('predictions', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DiagnosisLabel',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('has_ld', models.BooleanField()),
+                ('source', models.CharField(blank=True, max_length=64)),
+                ('recorded_at', models.DateTimeField(auto_now=True)),
+                ('intake', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='diagnosis', to='assessments.demographicprofile')),
+            ],
+        ),
+    ]
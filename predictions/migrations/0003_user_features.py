@@ -0,0 +1,46 @@
+# Generated by Django 5.2.18 on 2026-10-18 13:01
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0001_initial'),
+        ('predictions', '0002_diagnosis_label'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UserFeatures',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='features', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('sessions', models.PositiveIntegerField(default=0)),
+                ('math_sessions', models.PositiveIntegerField(default=0)),
+                ('math_correct', models.PositiveIntegerField(default=0)),
+                ('math_items', models.PositiveIntegerField(default=0)),
+                ('math_seconds', models.PositiveIntegerField(default=0)),
+                ('grammar_sessions', models.PositiveIntegerField(default=0)),
+                ('grammar_correct', models.PositiveIntegerField(default=0)),
+                ('grammar_items', models.PositiveIntegerField(default=0)),
+                ('grammar_seconds', models.PositiveIntegerField(default=0)),
+                ('scenario_sessions', models.PositiveIntegerField(default=0)),
+                ('scenario_correct', models.PositiveIntegerField(default=0)),
+                ('scenario_items', models.PositiveIntegerField(default=0)),
+                ('scenario_seconds', models.PositiveIntegerField(default=0)),
+                ('memory_sessions', models.PositiveIntegerField(default=0)),
+                ('memory_correct', models.PositiveIntegerField(default=0)),
+                ('memory_items', models.PositiveIntegerField(default=0)),
+                ('memory_seconds', models.PositiveIntegerField(default=0)),
+                ('memory_span_sum', models.PositiveIntegerField(default=0)),
+                ('memory_span_max', models.PositiveIntegerField(default=0)),
+                ('reading_sessions', models.PositiveIntegerField(default=0)),
+                ('reading_accuracy_sum', models.FloatField(default=0.0)),
+                ('reading_wpm_sum', models.FloatField(default=0.0)),
+                ('reading_seconds', models.PositiveIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+    ]
@@ -0,0 +1,68 @@
+from django.db import migrations
+
+from assessments.items import memory_sequence
+
+
+# Session model -> feature prefix, as predictions.featurestore._KINDS
+KINDS = {
+	"MathTestSession": "math",
+	"GrammarTestSession": "grammar",
+	"ScenarioTestSession": "scenario",
+	"MemoryTestSession": "memory",
+	"ReadingTestSession": "reading",
+}
+
+
+def _span(target, response):
+	# Same as predictions.featurestore.memory_span
+	span = 0
+	for a, b in zip(target, response):
+		if a != b:
+			break
+		span += 1
+	return span
+
+
+def backfill(apps, schema_editor):
+	# UserFeatures starts empty, and rows created since only hold sessions finished after
+	# the table existed: recompute every row from the session tables
+	UserFeatures = apps.get_model("predictions", "UserFeatures")
+	rows = {}
+	for model_name, kind in KINDS.items():
+		model = apps.get_model("assessments", model_name)
+		columns = ["accuracy", "wpm"] if kind == "reading" else ["num_correct", "num_total"]
+		if kind == "memory":
+			columns += ["seed", "sequence", "response"]
+		done = model.objects.filter(ended_at__isnull=False).order_by().only("user_id", "duration_seconds", *columns)
+		for session in done.iterator(chunk_size=2000):
+			features = rows.get(session.user_id)
+			if features is None:
+				features = rows[session.user_id] = UserFeatures(user_id=session.user_id)
+			features.sessions += 1
+			setattr(features, f"{kind}_sessions", getattr(features, f"{kind}_sessions") + 1)
+			setattr(features, f"{kind}_seconds", getattr(features, f"{kind}_seconds") + session.duration_seconds)
+			if kind == "reading":
+				features.reading_accuracy_sum += session.accuracy
+				features.reading_wpm_sum += session.wpm
+				continue
+			setattr(features, f"{kind}_correct", getattr(features, f"{kind}_correct") + session.num_correct)
+			setattr(features, f"{kind}_items", getattr(features, f"{kind}_items") + session.num_total)
+			if kind == "memory":
+				target = session.sequence if session.seed is None else memory_sequence(session.seed, session.num_total)
+				span = _span(target, session.response)
+				features.memory_span_sum += span
+				features.memory_span_max = max(features.memory_span_max, span)
+	UserFeatures.objects.all().delete()
+	UserFeatures.objects.bulk_create(rows.values(), batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+	dependencies = [
+		("predictions", "0003_user_features"),
+		("assessments", "0010_offline_sync"),
+	]
+
+	operations = [
+		migrations.RunPython(backfill, migrations.RunPython.noop),
+	]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 13:53
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('predictions', '0004_backfill_user_features'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='diagnosislabel',
+            name='diagnosed_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
@@ -18,3 +18,54 @@ class PredictionResult(models.Model):
 		return f"Prediction({self.user_id}, {self.label}, p={self.probability:.2f})"
 
 
+class DiagnosisLabel(models.Model):
+	"""Confirmed outcome for an intake (e.g. from a clinician's assessment); the training target."""
+
+	intake = models.OneToOneField("assessments.DemographicProfile", on_delete=models.CASCADE, related_name="diagnosis")
+	has_ld = models.BooleanField()
+	source = models.CharField(max_length=64, blank=True)  # who or what confirmed it
+	# When the diagnosis was made, as given by the label source; training cuts test sessions off
+	# here. Null only for labels loaded before it was recorded, which training skips.
+	diagnosed_at = models.DateTimeField(null=True, blank=True)
+	recorded_at = models.DateTimeField(auto_now=True)  # audit: when this row was last loaded
+
+	def __str__(self) -> str:
+		return f"Diagnosis({self.intake_id}, has_ld={self.has_ld})"
+
+
+class UserFeatures(models.Model):
+	"""Per-user test-battery aggregates for the model, kept as running sums.
+
+	Bumped with F() updates as each session completes and rebuilt from the
+	session tables after bulk imports (``predictions.featurestore``); feature
+	values are ratios of these columns (``predictions.services.annotate_features``).
+	"""
+
+	user = models.OneToOneField(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, primary_key=True, related_name="features")
+	sessions = models.PositiveIntegerField(default=0)
+	math_sessions = models.PositiveIntegerField(default=0)
+	math_correct = models.PositiveIntegerField(default=0)
+	math_items = models.PositiveIntegerField(default=0)
+	math_seconds = models.PositiveIntegerField(default=0)
+	grammar_sessions = models.PositiveIntegerField(default=0)
+	grammar_correct = models.PositiveIntegerField(default=0)
+	grammar_items = models.PositiveIntegerField(default=0)
+	grammar_seconds = models.PositiveIntegerField(default=0)
+	scenario_sessions = models.PositiveIntegerField(default=0)
+	scenario_correct = models.PositiveIntegerField(default=0)
+	scenario_items = models.PositiveIntegerField(default=0)
+	scenario_seconds = models.PositiveIntegerField(default=0)
+	memory_sessions = models.PositiveIntegerField(default=0)
+	memory_correct = models.PositiveIntegerField(default=0)
+	memory_items = models.PositiveIntegerField(default=0)
+	memory_seconds = models.PositiveIntegerField(default=0)
+	memory_span_sum = models.PositiveIntegerField(default=0)  # leading digits recalled in order, summed
+	memory_span_max = models.PositiveIntegerField(default=0)
+	reading_sessions = models.PositiveIntegerField(default=0)
+	reading_accuracy_sum = models.FloatField(default=0.0)
+	reading_wpm_sum = models.FloatField(default=0.0)
+	reading_seconds = models.PositiveIntegerField(default=0)
+	updated_at = models.DateTimeField(auto_now=True)
+
+	def __str__(self) -> str:
+		return f"UserFeatures({self.user_id}, sessions={self.sessions})"
@@ -0,0 +1,97 @@
+from __future__ import annotations
+
+import threading
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Iterable, Optional, Tuple
+
+from .services import LDClassifier, ModelSpec, default_model_spec
+
+
+@dataclass(frozen=True)
+class _Entry:
+	classifier: LDClassifier
+	mtime_ns: int
+
+
+def _mtime_ns(path: Path) -> int:
+	try:
+		return path.stat().st_mtime_ns
+	except FileNotFoundError:
+		return -1
+
+
+class ModelRegistry:
+	"""Process-wide cache of loaded classifiers, keyed by artifact path.
+
+	Entries are immutable and replaced wholesale, so a request that already
+	holds a classifier keeps using it while a newer artifact is swapped in.
+	Only the manifest's current artifact is kept for the default spec: when
+	the manifest moves to a new one, the old entry is dropped once the new
+	one has loaded.
+	"""
+
+	def __init__(self):
+		self._lock = threading.Lock()
+		self._entries: Dict[Path, _Entry] = {}
+		self._failed: Dict[Path, Tuple[int, Exception]] = {}  # mtime of an artifact that would not load
+		self._current: Optional[Path] = None  # artifact the default spec last resolved to
+
+	def get(self, spec: Optional[ModelSpec] = None) -> LDClassifier:
+		default = spec is None
+		spec = spec or default_model_spec()
+		key = Path(spec.path)
+		mtime = _mtime_ns(key)
+		entry = self._entries.get(key)
+		if entry is not None and (not default or key == self._current):
+			failed = self._failed.get(key)
+			if entry.mtime_ns == mtime or (failed is not None and failed[0] == mtime):
+				return entry.classifier
+		with self._lock:
+			# Another thread may have loaded it while we waited
+			entry = self._entries.get(key)
+			if entry is None or entry.mtime_ns != mtime:
+				failed = self._failed.get(key)
+				if failed is None or failed[0] != mtime:
+					classifier = LDClassifier(spec)
+					try:
+						classifier.load()
+					except Exception as exc:
+						# Remember the bad version: one load attempt per artifact write, not per request
+						failed = (mtime, exc)
+						self._failed[key] = failed
+					else:
+						self._failed.pop(key, None)
+						entry = _Entry(classifier=classifier, mtime_ns=mtime)
+						self._entries[key] = entry
+				if entry is None or entry.mtime_ns != mtime:
+					# Half-written artifact during a deploy: keep serving the old model
+					if entry is None and default:
+						entry = self._entries.get(self._current)
+					if entry is None:
+						raise failed[1]
+					return entry.classifier
+			if default and key != self._current:
+				# The manifest moved on: nothing asks for the artifact it replaced again
+				self._entries.pop(self._current, None)
+				self._failed.pop(self._current, None)
+				self._current = key
+		return entry.classifier
+
+	def warm(self, specs: Optional[Iterable[ModelSpec]] = None) -> None:
+		for spec in specs or [default_model_spec()]:
+			if Path(spec.path).exists():
+				self.get(spec)
+
+	def clear(self) -> None:
+		with self._lock:
+			self._entries = {}
+			self._failed = {}
+			self._current = None
+
+
+registry = ModelRegistry()
+
+
+def get_classifier(spec: Optional[ModelSpec] = None) -> LDClassifier:
+	return registry.get(spec)
@@ -0,0 +1,186 @@
+from __future__ import annotations
+
+import time
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+from sklearn.base import clone
+from sklearn.calibration import CalibratedClassifierCV
+from sklearn.ensemble import HistGradientBoostingClassifier, RandomForestClassifier
+from sklearn.linear_model import LogisticRegression, SGDClassifier
+from sklearn.metrics import accuracy_score, balanced_accuracy_score, brier_score_loss, f1_score, log_loss, roc_auc_score, roc_curve
+from sklearn.model_selection import GridSearchCV, StratifiedKFold, cross_val_predict, train_test_split
+from sklearn.pipeline import Pipeline
+from sklearn.preprocessing import StandardScaler
+
+
+Folds = List[Tuple[np.ndarray, np.ndarray]]
+
+# name -> (estimator factory, parameter grid). Tree ensembles stay single-threaded
+# inside: the search already spreads candidates x folds over every core.
+CANDIDATES: Dict[str, Tuple[Callable[[], Any], Dict[str, list]]] = {
+	"logreg": (
+		lambda: Pipeline([("scale", StandardScaler()), ("clf", LogisticRegression(max_iter=1000))]),
+		{"clf__C": [0.01, 0.1, 1.0, 10.0]},
+	),
+	"sgd": (
+		lambda: Pipeline([("scale", StandardScaler()), ("clf", SGDClassifier(loss="log_loss", random_state=0))]),
+		{"clf__alpha": [1e-5, 1e-4, 1e-3]},
+	),
+	"random_forest": (
+		lambda: RandomForestClassifier(n_jobs=1, random_state=0),
+		{"n_estimators": [100, 300], "max_depth": [None, 8], "min_samples_leaf": [1, 5]},
+	),
+	"hist_gb": (
+		lambda: HistGradientBoostingClassifier(random_state=0),
+		{"learning_rate": [0.05, 0.1], "max_leaf_nodes": [15, 31]},
+	),
+}
+
+SCORING = {"roc_auc": "roc_auc", "log_loss": "neg_log_loss", "brier": "neg_brier_score"}
+
+
+@dataclass
+class CandidateResult:
+	name: str
+	best_params: Dict[str, Any]
+	cv: Dict[str, float]  # mean CV scores of the best parameters (losses as positive numbers)
+	search_seconds: float
+	fit_seconds: float  # refit of the calibrated model on the full training split
+	latency_ms_p50: float  # one-row predict_proba, as in a request
+	latency_ms_p95: float
+	batch_rows_per_second: float
+	threshold: float
+	test: Dict[str, float] = field(default_factory=dict)
+	within_budget: bool = True
+	model: Any = field(default=None, repr=False, compare=False)
+
+	def summary(self) -> Dict[str, Any]:
+		return {k: v for k, v in self.__dict__.items() if k != "model"}
+
+
+def make_folds(y: np.ndarray, n_splits: int = 5, seed: int = 0) -> Folds:
+	"""Stratified splits computed once and shared by every candidate's search and out-of-fold pass."""
+	return list(StratifiedKFold(n_splits=n_splits, shuffle=True, random_state=seed).split(np.zeros(len(y)), y))
+
+
+def best_threshold(y: np.ndarray, p: np.ndarray) -> float:
+	"""Cut-off maximizing Youden's J (sensitivity + specificity - 1) on out-of-fold probabilities.
+
+	Unlike F1 it cannot be won by flagging everyone when positives are common.
+	"""
+	fpr, tpr, thresholds = roc_curve(y, p)
+	best = int(np.argmax(tpr - fpr))
+	return float(np.clip(thresholds[best], 0.01, 0.99))
+
+
+def measure_latency(model, X: np.ndarray, repeats: int = 200) -> Tuple[float, float, float]:
+	"""(p50 ms, p95 ms) for single-row predict_proba, and rows/s for one batch call."""
+	rows = X[np.arange(repeats) % len(X)]
+	for row in rows[:10]:
+		model.predict_proba(row[None, :])  # warm up
+	timings = np.empty(repeats)
+	for i, row in enumerate(rows):
+		start = time.perf_counter()
+		model.predict_proba(row[None, :])
+		timings[i] = time.perf_counter() - start
+	start = time.perf_counter()
+	model.predict_proba(X)
+	batch = time.perf_counter() - start
+	return (
+		float(np.percentile(timings, 50) * 1000),
+		float(np.percentile(timings, 95) * 1000),
+		float(len(X) / batch) if batch > 0 else float("inf"),
+	)
+
+
+def _metrics(y: np.ndarray, p: np.ndarray, threshold: float) -> Dict[str, float]:
+	metrics = {
+		"log_loss": float(log_loss(y, p, labels=[0, 1])),
+		"brier": float(brier_score_loss(y, p)),
+		"accuracy": float(accuracy_score(y, p >= threshold)),
+		"balanced_accuracy": float(balanced_accuracy_score(y, p >= threshold)),
+		"f1": float(f1_score(y, p >= threshold, zero_division=0)),
+	}
+	if len(np.unique(y)) == 2:
+		metrics["roc_auc"] = float(roc_auc_score(y, p))
+	return metrics
+
+
+def evaluate_candidate(
+	name: str,
+	X_train: np.ndarray,
+	y_train: np.ndarray,
+	X_test: np.ndarray,
+	y_test: np.ndarray,
+	folds: Folds,
+	n_jobs: int = -1,
+	calibration: str = "sigmoid",
+	seed: int = 0,
+) -> CandidateResult:
+	factory, grid = CANDIDATES[name]
+	start = time.perf_counter()
+	search = GridSearchCV(factory(), grid, scoring=SCORING, refit=False, cv=folds, n_jobs=n_jobs)
+	search.fit(X_train, y_train)
+	search_seconds = time.perf_counter() - start
+	best = int(np.argmin(search.cv_results_["rank_test_log_loss"]))
+	params = search.cv_results_["params"][best]
+	cv = {key: float(abs(search.cv_results_[f"mean_test_{key}"][best])) for key in SCORING}
+
+	# ensemble=False: one model refit on all training rows plus a calibrator fitted on
+	# out-of-fold predictions, so serving cost is a single estimator. The calibrator
+	# also runs inside cross_val_predict on fold subsets, so it takes a seeded splitter
+	# rather than the shared index folds.
+	inner = StratifiedKFold(n_splits=len(folds), shuffle=True, random_state=seed)
+	calibrated = CalibratedClassifierCV(clone(factory()).set_params(**params), method=calibration, cv=inner, ensemble=False)
+	oof = cross_val_predict(calibrated, X_train, y_train, cv=folds, method="predict_proba", n_jobs=n_jobs)[:, 1]
+	threshold = best_threshold(y_train, oof)
+	start = time.perf_counter()
+	calibrated.fit(X_train, y_train)
+	fit_seconds = time.perf_counter() - start
+	p50, p95, throughput = measure_latency(calibrated, X_test)
+	return CandidateResult(
+		name=name,
+		best_params=params,
+		cv=cv,
+		search_seconds=search_seconds,
+		fit_seconds=fit_seconds,
+		latency_ms_p50=p50,
+		latency_ms_p95=p95,
+		batch_rows_per_second=throughput,
+		threshold=threshold,
+		test=_metrics(y_test, calibrated.predict_proba(X_test)[:, 1], threshold),
+		model=calibrated,
+	)
+
+
+def select_model(
+	X: np.ndarray,
+	y: np.ndarray,
+	candidates: Sequence[str] = tuple(CANDIDATES),
+	n_splits: int = 5,
+	test_size: float = 0.2,
+	latency_budget_ms: Optional[float] = None,
+	n_jobs: int = -1,
+	calibration: str = "sigmoid",
+	seed: int = 0,
+	progress: Optional[Callable[[CandidateResult], None]] = None,
+) -> Tuple[Optional[CandidateResult], List[CandidateResult]]:
+	"""Search, calibrate and time every candidate; pick the lowest test log loss within budget.
+
+	The p95 single-row latency is compared with ``latency_budget_ms``. Returns
+	(winner or None if nothing fits the budget, all results).
+	"""
+	X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=test_size, stratify=y, random_state=seed)
+	folds = make_folds(y_train, n_splits, seed)
+	results = []
+	for name in candidates:
+		result = evaluate_candidate(name, X_train, y_train, X_test, y_test, folds, n_jobs, calibration, seed)
+		result.within_budget = latency_budget_ms is None or result.latency_ms_p95 <= latency_budget_ms
+		results.append(result)
+		if progress is not None:
+			progress(result)
+	eligible = [r for r in results if r.within_budget]
+	winner = min(eligible, key=lambda r: r.test["log_loss"]) if eligible else None
+	return winner, results
@@ -1,13 +1,26 @@
 from __future__ import annotations
 
+import json
+import threading
 from dataclasses import dataclass
 from pathlib import Path
-from typing import Any, Dict, List
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Sequence, Tuple
 
-import joblib
 import numpy as np
 
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F, FloatField
+from django.db.models.functions import Cast, NullIf
+
 from assessments.models import DemographicProfile
+from .features import DEFAULT_FEATURE_ORDER, FeatureEncoder
+from .linear import LinearModel
+from .models import PredictionResult
+
+
+MODEL_DIR = Path(__file__).resolve().parent.parent / "ml"
+MANIFEST_PATH = MODEL_DIR / "ld_model.json"  # written by the train_model command
 
 
 @dataclass
@@ -16,59 +29,185 @@ class ModelSpec:
 	feature_order: List[str]
 	positive_label: str = "LD Detected"
 	negative_label: str = "No LD Detected"
+	version: str = ""
+	threshold: float = 0.5  # probability at or above which the positive label is given
+	mmap_mode: Optional[str] = None  # joblib artifacts: map arrays read-only instead of copying them
+
+
+def _store(name: str):
+	return F(f"user__features__{name}")
+
+
+def _expression(numerator: str, denominator: Optional[str] = None):
+	if denominator is None:
+		return Cast(_store(numerator), FloatField())
+	return Cast(_store(numerator), FloatField()) / NullIf(_store(denominator), 0)
+
+
+# Test-battery features: arithmetic on the user's UserFeatures row (one LEFT JOIN, no
+# aggregation at prediction time), as (numerator, denominator or None) column names.
+# NULL (no sessions yet) encodes as 0.
+_TEST_FEATURE_COLUMNS: Dict[str, Tuple[str, Optional[str]]] = {
+	"math_accuracy": ("math_correct", "math_items"),
+	"grammar_accuracy": ("grammar_correct", "grammar_items"),
+	"reading_accuracy": ("reading_accuracy_sum", "reading_sessions"),
+	"reading_wpm": ("reading_wpm_sum", "reading_sessions"),
+	"memory_accuracy": ("memory_correct", "memory_items"),
+	"scenario_accuracy": ("scenario_correct", "scenario_items"),
+	"math_seconds_per_item": ("math_seconds", "math_items"),
+	"grammar_seconds_per_item": ("grammar_seconds", "grammar_items"),
+	"scenario_seconds_per_item": ("scenario_seconds", "scenario_items"),
+	"memory_span": ("memory_span_sum", "memory_sessions"),
+	"memory_span_max": ("memory_span_max", None),
+	"sessions_completed": ("sessions", None),
+}
+
+
+def battery_feature_values(features, fields: Sequence[str]) -> Dict[str, Optional[float]]:
+	"""What ``annotate_features`` gives ``fields``, from an unsaved UserFeatures (None: no sessions)."""
+	values: Dict[str, Optional[float]] = {}
+	for name in fields:
+		numerator, denominator = _TEST_FEATURE_COLUMNS[name]
+		if features is None or (denominator is not None and not getattr(features, denominator)):
+			values[name] = None
+		elif denominator is None:
+			values[name] = float(getattr(features, numerator))
+		else:
+			values[name] = getattr(features, numerator) / getattr(features, denominator)
+	return values
+
+
+def annotate_features(queryset, fields: Sequence[str]):
+	"""Annotate a DemographicProfile queryset with whichever of ``fields`` are not model columns."""
+	extra = {name: _expression(*_TEST_FEATURE_COLUMNS[name]) for name in fields if name in _TEST_FEATURE_COLUMNS}
+	return queryset.annotate(**extra) if extra else queryset
 
 
 class LDClassifier:
 	def __init__(self, spec: ModelSpec):
 		self.spec = spec
+		self.encoder = FeatureEncoder(spec.feature_order)
+		self._annotated = any(name in _TEST_FEATURE_COLUMNS for name in self.encoder.source_fields)
 		self._model = None
 
+	@property
+	def name(self) -> str:
+		backend = "linear" if Path(self.spec.path).suffix == ".json" else "sklearn"
+		return f"{backend}:{self.spec.version}" if self.spec.version else backend
+
+	def profile_values(self, queryset, *fields: str):
+		"""``queryset.values()`` with ``fields`` plus everything the encoder reads."""
+		return annotate_features(queryset, self.encoder.source_fields).values(*fields, *self.encoder.source_fields)
+
 	def load(self) -> None:
 		if self._model is None:
-			self._model = joblib.load(self.spec.path)
-
-	def _vectorize(self, profile: DemographicProfile) -> np.ndarray:
-		values: Dict[str, Any] = {
-			"age": profile.age,
-			"gender_male": 1 if profile.gender == "male" else 0,
-			"gender_female": 1 if profile.gender == "female" else 0,
-			"gender_other": 1 if profile.gender == "other" else 0,
-			"reading_difficulties": int(profile.reading_difficulties),
-			"attention_low": 1 if profile.attention_span == "low" else 0,
-			"attention_medium": 1 if profile.attention_span == "medium" else 0,
-			"attention_high": 1 if profile.attention_span == "high" else 0,
-		}
-		return np.array([[values.get(name, 0) for name in self.spec.feature_order]], dtype=float)
+			if Path(self.spec.path).suffix == ".json":
+				# Exported linear model: NumPy only, no scikit-learn import in the worker
+				self._model = LinearModel.load(self.spec.path)
+			else:
+				import joblib  # deferred with the pickle path it serves
 
-	def predict(self, profile: DemographicProfile) -> Dict[str, Any]:
-		self.load()
-		X = self._vectorize(profile)
+				# With mmap_mode the arrays are views on the file's page-cache pages, which
+				# every worker process maps instead of keeping a private copy
+				self._model = joblib.load(self.spec.path, mmap_mode=self.spec.mmap_mode)
+
+	def _positive_proba(self, X: np.ndarray) -> np.ndarray:
 		proba = getattr(self._model, "predict_proba", None)
 		if proba is not None:
-			probs = proba(X)[0]
-			p_ld = float(probs[1]) if len(probs) > 1 else float(probs[0])
-		else:
-			# Fallback for models without predict_proba
-			pred = self._model.predict(X)[0]
-			p_ld = float(pred)
-		label = self.spec.positive_label if p_ld >= 0.5 else self.spec.negative_label
-		return {"label": label, "probability": p_ld}
+			probs = proba(X)
+			return probs[:, 1] if probs.shape[1] > 1 else probs[:, 0]
+		# Fallback for models without predict_proba
+		return np.asarray(self._model.predict(X), dtype=float)
 
+	def predict_matrix(self, X: np.ndarray) -> List[Dict[str, Any]]:
+		if X.shape[0] == 0:
+			return []
+		self.load()
+		# One predict_proba call for the whole cohort
+		results = []
+		for p in self._positive_proba(X).tolist():
+			label = self.spec.positive_label if p >= self.spec.threshold else self.spec.negative_label
+			results.append({"label": label, "probability": p})
+		return results
 
-def default_model_spec() -> ModelSpec:
-	base = Path(__file__).resolve().parent.parent / "ml"
-	path = base / "ld_model.joblib"
-	# Keep in sync with training pipeline
-	feature_order = [
-		"age",
-		"gender_male",
-		"gender_female",
-		"gender_other",
-		"reading_difficulties",
-		"attention_low",
-		"attention_medium",
-		"attention_high",
+	def predict(self, profile: DemographicProfile) -> Dict[str, Any]:
+		return self.predict_many([profile])[0]
+
+	def predict_many(self, profiles: Sequence[DemographicProfile]) -> List[Dict[str, Any]]:
+		if self._annotated:
+			# Test-battery features live outside the profile row; fetch them in one query
+			rows = {row["id"]: row for row in self.profile_values(DemographicProfile.objects.filter(pk__in=[p.pk for p in profiles]), "id")}
+			return self.predict_values([rows[p.pk] for p in profiles])
+		return self.predict_matrix(self.encoder.transform_objects(profiles))
+
+	def predict_values(self, rows: Sequence[Mapping[str, Any]]) -> List[Dict[str, Any]]:
+		"""Score rows from ``queryset.values(*self.encoder.source_fields)``."""
+		return self.predict_matrix(self.encoder.transform_values(rows))
+
+
+def store_predictions(
+	classifier: LDClassifier,
+	rows: Sequence[Mapping[str, Any]],
+	model_name: Optional[str] = None,
+	batch_size: int = 1000,
+) -> List[PredictionResult]:
+	"""Score profile rows (``classifier.profile_values(qs, "id", "user_id")``) and bulk-insert the results."""
+	results = classifier.predict_values(rows)
+	model_name = model_name or classifier.name
+	objs = [
+		PredictionResult(
+			user_id=row["user_id"],
+			intake_id=row["id"],
+			label=result["label"],
+			probability=result["probability"],
+			model_name=model_name,
+		)
+		for row, result in zip(rows, results)
 	]
-	return ModelSpec(path=path, feature_order=feature_order)
+	with transaction.atomic():
+		return PredictionResult.objects.bulk_create(objs, batch_size=batch_size)
+
+
+def iter_profile_chunks(queryset, fields: Sequence[str], chunk_size: int = 2000) -> Iterable[List[Dict[str, Any]]]:
+	chunk: List[Dict[str, Any]] = []
+	for row in queryset.order_by("pk").values(*fields).iterator(chunk_size=chunk_size):
+		chunk.append(row)
+		if len(chunk) >= chunk_size:
+			yield chunk
+			chunk = []
+	if chunk:
+		yield chunk
+
 
+_manifest_lock = threading.Lock()
+_manifest_cache: Tuple[int, Optional[dict]] = (-1, None)
 
+
+def read_manifest(path: Path = MANIFEST_PATH) -> Optional[dict]:
+	"""The current training manifest, re-read only when the file changes."""
+	global _manifest_cache
+	try:
+		mtime = path.stat().st_mtime_ns
+	except FileNotFoundError:
+		return None
+	cached_mtime, manifest = _manifest_cache
+	if cached_mtime == mtime:
+		return manifest
+	with _manifest_lock:
+		manifest = json.loads(path.read_text())
+		_manifest_cache = (mtime, manifest)
+	return manifest
+
+
+def default_model_spec() -> ModelSpec:
+	manifest = read_manifest()
+	if manifest is not None:
+		return ModelSpec(
+			path=MODEL_DIR / manifest["artifact"],
+			feature_order=list(manifest["feature_order"]),
+			version=manifest["version"],
+			threshold=float(manifest.get("threshold", 0.5)),
+			mmap_mode=settings.MODEL_MMAP_MODE,
+		)
+	# No trained model yet: the synthetic baseline from ml/build_baseline.py
+	return ModelSpec(path=MODEL_DIR / "ld_model.joblib", feature_order=list(DEFAULT_FEATURE_ORDER), mmap_mode=settings.MODEL_MMAP_MODE)
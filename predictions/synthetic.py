@@ -0,0 +1,42 @@
+from __future__ import annotations
+
+from typing import Optional, Sequence, Tuple
+
+import numpy as np
+
+from .features import DEFAULT_FEATURE_ORDER, FeatureEncoder
+
+
+# Django-free, like features.py: used by ml/build_baseline.py and select_model
+
+
+def synthetic_dataset(
+	n_samples: int,
+	rng: Optional[np.random.Generator] = None,
+	feature_order: Sequence[str] = DEFAULT_FEATURE_ORDER,
+) -> Tuple[np.ndarray, np.ndarray]:
+	"""Synthetic intakes and labels for bootstrapping before real diagnoses exist."""
+	rng = rng or np.random.default_rng()
+	# Same encoder the serving path uses, so feature layout cannot drift
+	encoder = FeatureEncoder(feature_order)
+	# Intuition: reading difficulties and low attention increase LD risk; age, gender neutral here
+	columns = {
+		"age": rng.integers(6, 19, size=n_samples),
+		"gender": rng.choice(["male", "female", "other"], size=n_samples),
+		"reading_difficulties": rng.binomial(1, 0.3, size=n_samples).astype(bool),
+		"attention_span": rng.choice(["low", "medium", "high"], size=n_samples),
+	}
+	X = encoder.transform_columns(columns, n_samples)
+	col = encoder.index
+
+	# Generate probabilities using a simple linear combination
+	logits = (
+		0.0
+		+ 0.05 * (X[:, col["age"]] - 10.0)
+		+ 1.5 * X[:, col["reading_difficulties"]]
+		+ 0.8 * X[:, col["attention_low"]]
+		- 0.5 * X[:, col["attention_high"]]
+	)
+	p = 1.0 / (1.0 + np.exp(-logits))
+	y = (rng.random(n_samples) < p).astype(int)
+	return X, y
@@ -0,0 +1,222 @@
+import io
+import json
+import tempfile
+from datetime import timedelta
+from pathlib import Path
+from unittest import mock
+
+import numpy as np
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.forms.models import model_to_dict
+from django.test import SimpleTestCase, TestCase
+from django.utils import timezone
+from sklearn.calibration import CalibratedClassifierCV
+from sklearn.linear_model import LogisticRegression, SGDClassifier
+from sklearn.pipeline import make_pipeline
+from sklearn.preprocessing import StandardScaler
+from sklearn.svm import LinearSVC
+from sklearn.tree import DecisionTreeClassifier
+
+from assessments.models import DemographicProfile, MathTestSession, MemoryTestSession, ReadingTestSession
+from predictions.featurestore import memory_span, rebuild_user_features, record_session_features
+from predictions.features import DEFAULT_FEATURE_ORDER
+from predictions.linear import LinearModel, export_linear, parity_error
+from predictions.models import DiagnosisLabel, UserFeatures
+from predictions.registry import ModelRegistry
+from predictions.services import LDClassifier, ModelSpec
+from predictions.training import TrainingReport, labelled_chunks, write_artifact
+
+
+class LinearExportTests(SimpleTestCase):
+	order = ["a", "b", "c", "d"]
+
+	@classmethod
+	def setUpClass(cls):
+		super().setUpClass()
+		rng = np.random.default_rng(0)
+		cls.X = rng.normal(size=(400, 4)) * [1.0, 5.0, 0.1, 30.0] + [0.0, 10.0, 0.0, -50.0]
+		cls.y = (cls.X @ [1.0, -0.2, 8.0, 0.03] + rng.normal(size=400) > 0).astype(int)
+
+	def assertParity(self, model):
+		model.fit(self.X, self.y)
+		self.assertLess(parity_error(model, export_linear(model, self.order), self.X), 1e-9)
+
+	def test_scaled_logistic_regression(self):
+		self.assertParity(make_pipeline(StandardScaler(), LogisticRegression()))
+
+	def test_sgd_log_loss(self):
+		self.assertParity(make_pipeline(StandardScaler(), SGDClassifier(loss="log_loss", random_state=0)))
+
+	def test_sigmoid_calibration(self):
+		self.assertParity(CalibratedClassifierCV(LinearSVC(), method="sigmoid", ensemble=False, cv=3))
+
+	def test_non_linear_models_are_rejected(self):
+		for model in (
+			CalibratedClassifierCV(LogisticRegression(), method="isotonic", ensemble=False, cv=3),
+			DecisionTreeClassifier(max_depth=3),
+			SGDClassifier(loss="hinge", random_state=0),
+		):
+			with self.subTest(model=type(model).__name__):
+				model.fit(self.X, self.y)
+				with self.assertRaises(ValueError):
+					export_linear(model, self.order)
+
+	def test_round_trip(self):
+		model = LinearModel([0.5, -1.0, 2.0, 0.0], -0.25, self.order)
+		copy = LinearModel.from_dict(json.loads(json.dumps(model.to_dict())))
+		np.testing.assert_array_equal(copy.predict_proba(self.X), model.predict_proba(self.X))
+		self.assertEqual(copy.feature_order, self.order)
+		with self.assertRaises(ValueError):
+			LinearModel.from_dict({**model.to_dict(), "format": "other"})
+		with self.assertRaises(ValueError):
+			LinearModel([1.0], 0.0, self.order)
+
+	def test_extreme_scores_do_not_overflow(self):
+		model = LinearModel([1.0], 0.0, ["a"])
+		p = model.predict_proba(np.array([[-1e4], [0.0], [1e4]]))[:, 1]
+		np.testing.assert_allclose(p, [0.0, 0.5, 1.0])
+
+	def test_published_artifact_serves_like_the_model(self):
+		model = make_pipeline(StandardScaler(), LogisticRegression()).fit(self.X, self.y)
+		with tempfile.TemporaryDirectory() as tmp:
+			artifact = write_artifact(model, self.order, TrainingReport(), model_dir=Path(tmp), fmt="auto", parity_sample=self.X)
+			self.assertEqual(artifact.suffix, ".json")
+			manifest = json.loads((Path(tmp) / "ld_model.json").read_text())
+			self.assertEqual((manifest["backend"], manifest["parity_rows"]), ("linear", len(self.X)))
+			served = LDClassifier(ModelSpec(path=artifact, feature_order=self.order)).predict_matrix(self.X)
+		np.testing.assert_allclose([r["probability"] for r in served], model.predict_proba(self.X)[:, 1], atol=1e-9)
+
+
+class RegistryTests(SimpleTestCase):
+	def setUp(self):
+		tmp = tempfile.TemporaryDirectory()
+		self.addCleanup(tmp.cleanup)
+		self.dir = Path(tmp.name)
+
+	def artifact(self, name, intercept):
+		path = self.dir / name
+		path.write_text(json.dumps(LinearModel(np.zeros(len(DEFAULT_FEATURE_ORDER)), intercept, DEFAULT_FEATURE_ORDER).to_dict()))
+		return ModelSpec(path=path, feature_order=list(DEFAULT_FEATURE_ORDER))
+
+	def serve(self, registry, spec):
+		with mock.patch("predictions.registry.default_model_spec", return_value=spec):
+			return registry.get()
+
+	def test_manifest_swap_evicts_previous_artifact(self):
+		registry = ModelRegistry()
+		first, second = self.artifact("a.json", 0.0), self.artifact("b.json", 1.0)
+		held = self.serve(registry, first)
+		self.assertIs(self.serve(registry, first), held)
+		swapped = self.serve(registry, second)
+		self.assertIsNot(swapped, held)
+		self.assertEqual(list(registry._entries), [second.path])
+		held.load()  # a request still holding the old classifier keeps working
+		self.assertEqual(held._model.intercept, 0.0)
+
+	def test_unloadable_artifact_keeps_serving_previous(self):
+		registry = ModelRegistry()
+		first = self.artifact("a.json", 0.0)
+		held = self.serve(registry, first)
+		broken = self.dir / "b.json"
+		broken.write_text("{")
+		spec = ModelSpec(path=broken, feature_order=list(DEFAULT_FEATURE_ORDER))
+		with mock.patch("predictions.services.LinearModel.load", side_effect=ValueError("truncated")) as load:
+			self.assertIs(self.serve(registry, spec), held)
+			self.assertIs(self.serve(registry, spec), held)
+		self.assertEqual(load.call_count, 1)
+
+	def test_unloadable_artifact_without_fallback_raises(self):
+		broken = self.dir / "b.json"
+		broken.write_text("{")
+		with self.assertRaises(ValueError):
+			self.serve(ModelRegistry(), ModelSpec(path=broken, feature_order=list(DEFAULT_FEATURE_ORDER)))
+
+
+class FeatureStoreTests(TestCase):
+	def test_memory_span(self):
+		self.assertEqual(memory_span([1, 2, 3, 4], [1, 2, 5, 4]), 2)
+		self.assertEqual(memory_span([1, 2, 3], [1, 2, 3, 9]), 3)
+		self.assertEqual(memory_span([1, 2, 3], []), 0)
+
+	def test_rebuild_matches_incremental_updates(self):
+		user = get_user_model().objects.create_user("pupil@example.com", "pw")
+		idle = get_user_model().objects.create_user("idle@example.com", "pw")
+		now = timezone.now()
+		sessions = [
+			MathTestSession.objects.create(user=user, ended_at=now, num_correct=3, num_total=5, duration_seconds=40),
+			MemoryTestSession.objects.create(user=user, ended_at=now, sequence=[1, 2, 3, 4], response=[1, 2, 5, 4], num_correct=3, num_total=4),
+			MemoryTestSession.objects.create(user=user, ended_at=now, seed=7, response=[], num_total=6),
+			ReadingTestSession.objects.create(user=user, ended_at=now, passage="a cat", accuracy=0.5, wpm=80.0, duration_seconds=60),
+		]
+		MathTestSession.objects.create(user=user, num_correct=9, num_total=9)  # unfinished: never counted
+		for session in sessions:
+			record_session_features(session)
+		fields = [f.name for f in UserFeatures._meta.concrete_fields if f.name != "updated_at"]
+		incremental = model_to_dict(UserFeatures.objects.get(pk=user.pk), fields=fields)
+		self.assertEqual((incremental["sessions"], incremental["memory_span_sum"], incremental["memory_span_max"]), (4, 2, 2))
+
+		UserFeatures.objects.filter(pk=user.pk).update(sessions=99, math_correct=0)
+		self.assertEqual(rebuild_user_features([user.pk, idle.pk]), 1)
+		self.assertEqual(model_to_dict(UserFeatures.objects.get(pk=user.pk), fields=fields), incremental)
+		self.assertEqual(UserFeatures.objects.get(pk=idle.pk).sessions, 0)
+
+
+class TrainingFeatureTests(TestCase):
+	def setUp(self):
+		self.user = get_user_model().objects.create_user("pupil@example.com", "pw")
+		self.start = timezone.now() - timedelta(days=30)
+		self.first, self.second = self.intake(0), self.intake(10)
+		self.math(2, 4)
+		self.math(12, 8)
+		self.math(25, 10)  # after both diagnoses
+		# The live store has every session; training must not use it
+		UserFeatures.objects.create(user=self.user, sessions=3, math_sessions=3, math_correct=22, math_items=30)
+
+	def intake(self, day):
+		profile = DemographicProfile.objects.create(user=self.user, age=9, gender="female")
+		DemographicProfile.objects.filter(pk=profile.pk).update(created_at=self.start + timedelta(days=day))
+		return profile
+
+	def math(self, day, correct):
+		MathTestSession.objects.create(user=self.user, ended_at=self.start + timedelta(days=day), num_correct=correct, num_total=10)
+
+	def features(self):
+		X, y, ids = next(labelled_chunks(["math_accuracy", "sessions_completed"]))
+		return list(ids), X
+
+	def load_labels(self, lines):
+		with tempfile.NamedTemporaryFile("w", suffix=".jsonl") as fh:
+			fh.write("\n".join(json.dumps(line) for line in lines))
+			fh.flush()
+			call_command("load_labels", fh.name, stdout=io.StringIO())
+
+	def test_sessions_after_the_cutoff_do_not_leak_into_training(self):
+		for profile, day in ((self.first, 5), (self.second, 20)):
+			DiagnosisLabel.objects.create(intake=profile, has_ld=False, diagnosed_at=self.start + timedelta(days=day))
+		ids, X = self.features()
+		self.assertEqual(ids, [self.first.pk, self.second.pk])
+		np.testing.assert_allclose(X, [[0.4, 1.0], [0.6, 2.0]])
+
+	def test_reloading_labels_does_not_move_the_cutoff(self):
+		lines = [
+			{"intake_id": self.first.pk, "has_ld": False, "diagnosed_at": (self.start + timedelta(days=5)).isoformat()},
+			{"intake_id": self.second.pk, "has_ld": True, "diagnosed_at": (self.start + timedelta(days=20)).date().isoformat()},
+		]
+		self.load_labels(lines)
+		ids, before = self.features()
+		self.load_labels(lines)
+		self.assertEqual(self.features()[0], ids)
+		np.testing.assert_array_equal(self.features()[1], before)
+		np.testing.assert_allclose(before, [[0.4, 1.0], [0.6, 2.0]])
+
+	def test_labels_need_a_diagnosis_date(self):
+		with self.assertRaises(CommandError):
+			self.load_labels([{"intake_id": self.first.pk, "has_ld": False}])
+		with self.assertRaises(CommandError):
+			self.load_labels([{"intake_id": self.first.pk, "has_ld": False, "diagnosed_at": "2999-01-01"}])
+		# Labels from before diagnosed_at existed have no safe cutoff
+		DiagnosisLabel.objects.create(intake=self.first, has_ld=False)
+		with self.assertRaises(StopIteration):
+			self.features()
@@ -0,0 +1,219 @@
+from __future__ import annotations
+
+import json
+import os
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+import joblib
+import numpy as np
+from django.db.models import OuterRef, Subquery
+from django.utils import timezone
+from sklearn.linear_model import SGDClassifier
+from sklearn.metrics import accuracy_score, log_loss, roc_auc_score
+from sklearn.pipeline import Pipeline
+from sklearn.preprocessing import StandardScaler
+
+from assessments.models import DemographicProfile
+from .featurestore import features_as_of
+from .features import TEST_FEATURES, FeatureEncoder
+from .linear import export_linear, parity_error
+from .services import MANIFEST_PATH, MODEL_DIR, battery_feature_values
+
+
+PARITY_TOLERANCE = 1e-9  # max |P(LD)| gap allowed between a model and its linear export
+
+
+LABEL_FIELD = "diagnosis__has_ld"
+
+
+@dataclass
+class TrainingReport:
+	version: str = ""
+	train_rows: int = 0
+	holdout_rows: int = 0
+	positives: int = 0
+	epochs: int = 0
+	metrics: Dict[str, float] = field(default_factory=dict)
+
+
+def labelled_chunks(feature_order: Sequence[str], chunk_size: int = 2000) -> Iterator[Tuple[np.ndarray, np.ndarray, np.ndarray]]:
+	"""Stream (X, y, intake ids) for every labelled intake, ``chunk_size`` rows at a time.
+
+	Rows come through a server-side cursor (``iterator``), so only one chunk is
+	ever held in memory no matter how many intakes are labelled.
+
+	Test-battery features are not the user's current ``UserFeatures`` (that
+	would leak sessions taken after the diagnosis into training, and give
+	every intake of a user the same values): they are replayed from the
+	sessions that ended before the intake's cutoff, the earlier of the user's
+	next intake and ``diagnosed_at``. Labels without ``diagnosed_at`` have no
+	safe cutoff and are skipped.
+	"""
+	encoder = FeatureEncoder(feature_order)
+	battery = [name for name in encoder.source_fields if name in TEST_FEATURES]
+	columns = [name for name in encoder.source_fields if name not in battery]
+	next_intake = DemographicProfile.objects.filter(user=OuterRef("user"), created_at__gt=OuterRef("created_at")).order_by("created_at")
+	qs = DemographicProfile.objects.filter(diagnosis__diagnosed_at__isnull=False).annotate(
+		next_intake_at=Subquery(next_intake.values("created_at")[:1]),
+	)
+	fields = ["id", "user_id", "next_intake_at", "diagnosis__diagnosed_at", LABEL_FIELD, *columns]
+	rows: List[dict] = []
+	for row in qs.order_by("pk").values(*fields).iterator(chunk_size=chunk_size):
+		rows.append(row)
+		if len(rows) >= chunk_size:
+			yield _encode(encoder, rows, battery)
+			rows = []
+	if rows:
+		yield _encode(encoder, rows, battery)
+
+
+def load_labelled(feature_order: Sequence[str], chunk_size: int = 2000, max_rows: Optional[int] = None) -> Tuple[np.ndarray, np.ndarray]:
+	"""All labelled rows in memory (up to ``max_rows``), for model selection's cross-validation."""
+	Xs, ys, n = [], [], 0
+	for X, y, _ in labelled_chunks(feature_order, chunk_size):
+		if max_rows is not None and n + len(y) > max_rows:
+			X, y = X[:max_rows - n], y[:max_rows - n]
+		Xs.append(X)
+		ys.append(y)
+		n += len(y)
+		if max_rows is not None and n >= max_rows:
+			break
+	width = len(feature_order)
+	return (np.vstack(Xs) if Xs else np.zeros((0, width))), (np.concatenate(ys) if ys else np.zeros(0, dtype=int))
+
+
+def _cutoff(row: dict):
+	return min(t for t in (row["next_intake_at"], row["diagnosis__diagnosed_at"]) if t is not None)
+
+
+def _encode(encoder: FeatureEncoder, rows: List[dict], battery: Sequence[str] = ()) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+	if battery:
+		snapshots = features_as_of([(row["user_id"], _cutoff(row)) for row in rows])
+		for row, features in zip(rows, snapshots):
+			row.update(battery_feature_values(features, battery))
+	y = np.fromiter((row[LABEL_FIELD] for row in rows), dtype=int, count=len(rows))
+	ids = np.fromiter((row["id"] for row in rows), dtype=np.int64, count=len(rows))
+	return encoder.transform_values(rows), y, ids
+
+
+def holdout_mask(ids: np.ndarray, fraction: float) -> np.ndarray:
+	# Hash of the intake id: the same rows are held out on every pass and every run
+	h = (ids.astype(np.uint64) * np.uint64(2654435761)) % np.uint64(2**32)
+	return h < np.uint64(int(fraction * 2**32))
+
+
+def train_incremental(
+	feature_order: Sequence[str],
+	chunk_size: int = 2000,
+	epochs: int = 5,
+	holdout: float = 0.1,
+	alpha: float = 1e-4,
+	seed: int = 0,
+) -> Tuple[Pipeline, TrainingReport]:
+	"""Fit StandardScaler + logistic SGD with ``partial_fit`` over streamed chunks.
+
+	One pass fits the scaler, ``epochs`` passes fit the classifier (rows are
+	shuffled within each chunk), and a last pass scores the held-out rows.
+	"""
+	report = TrainingReport(epochs=epochs)
+	scaler = StandardScaler()
+	for X, y, ids in labelled_chunks(feature_order, chunk_size):
+		train = ~holdout_mask(ids, holdout)
+		if train.any():
+			scaler.partial_fit(X[train])
+		report.train_rows += int(train.sum())
+		report.holdout_rows += int((~train).sum())
+		report.positives += int(y.sum())
+	if report.train_rows == 0:
+		raise ValueError("No labelled intakes to train on; load diagnoses (with diagnosed_at) first.")
+
+	rng = np.random.default_rng(seed)
+	clf = SGDClassifier(loss="log_loss", alpha=alpha, random_state=seed)
+	for _ in range(epochs):
+		for X, y, ids in labelled_chunks(feature_order, chunk_size):
+			train = ~holdout_mask(ids, holdout)
+			if not train.any():
+				continue
+			order = rng.permutation(int(train.sum()))
+			clf.partial_fit(scaler.transform(X[train])[order], y[train][order], classes=[0, 1])
+
+	model = Pipeline([("scale", scaler), ("clf", clf)])
+	report.metrics = evaluate(model, feature_order, chunk_size, holdout)
+	return model, report
+
+
+def evaluate(model, feature_order: Sequence[str], chunk_size: int, holdout: float) -> Dict[str, float]:
+	y_true: List[np.ndarray] = []
+	y_prob: List[np.ndarray] = []
+	for X, y, ids in labelled_chunks(feature_order, chunk_size):
+		held = holdout_mask(ids, holdout)
+		if held.any():
+			y_true.append(y[held])
+			y_prob.append(model.predict_proba(X[held])[:, 1])
+	if not y_true:
+		return {}
+	y, p = np.concatenate(y_true), np.concatenate(y_prob)
+	metrics = {"accuracy": float(accuracy_score(y, p >= 0.5)), "log_loss": float(log_loss(y, p, labels=[0, 1]))}
+	if len(np.unique(y)) == 2:
+		metrics["roc_auc"] = float(roc_auc_score(y, p))
+	return metrics
+
+
+def _atomic_write(path: Path, write) -> None:
+	tmp = path.with_name(f".{path.name}.tmp")
+	write(tmp)
+	os.replace(tmp, path)  # readers see the old file or the new one, never half of either
+
+
+def write_artifact(
+	model,
+	feature_order: Sequence[str],
+	report: TrainingReport,
+	model_dir: Path = MODEL_DIR,
+	manifest_path: Optional[Path] = None,
+	extra: Optional[dict] = None,
+	fmt: str = "joblib",
+	parity_sample: Optional[np.ndarray] = None,
+) -> Path:
+	"""Save ``model`` as a new versioned artifact and point the manifest at it.
+
+	``fmt="linear"`` writes coefficients as JSON for the NumPy-only backend,
+	after checking its probabilities against ``model.predict_proba`` on
+	``parity_sample``; ``"auto"`` does that when the model is linear and
+	falls back to joblib otherwise. Earlier artifacts are kept, so rolling
+	back is a manifest edit.
+	"""
+	manifest_path = manifest_path or (MANIFEST_PATH if model_dir == MODEL_DIR else model_dir / MANIFEST_PATH.name)
+	linear = None
+	if fmt in ("linear", "auto"):
+		try:
+			linear = export_linear(model, feature_order)
+		except ValueError:
+			if fmt == "linear":
+				raise
+	if linear is not None:
+		error = parity_error(model, linear, parity_sample if parity_sample is not None else np.zeros((0, len(feature_order))))
+		if error > PARITY_TOLERANCE:
+			raise ValueError(f"Linear export differs from predict_proba by {error:.3g}")
+		extra = {**(extra or {}), "parity_error": error, "parity_rows": 0 if parity_sample is None else len(parity_sample)}
+	report.version = timezone.now().strftime("%Y%m%d%H%M%S")
+	artifact = model_dir / "models" / f"ld_model-{report.version}.{'json' if linear is not None else 'joblib'}"
+	artifact.parent.mkdir(parents=True, exist_ok=True)
+	if linear is not None:
+		_atomic_write(artifact, lambda tmp: tmp.write_text(json.dumps(linear.to_dict())))
+	else:
+		_atomic_write(artifact, lambda tmp: joblib.dump(model, tmp))
+	manifest = {
+		"version": report.version,
+		"artifact": str(artifact.relative_to(model_dir)),
+		"feature_order": list(feature_order),
+		"estimator": " > ".join(type(step).__name__ for _, step in getattr(model, "steps", [("", model)])),
+		"backend": "linear" if linear is not None else "joblib",
+		"trained_at": timezone.now().isoformat(),
+		"report": asdict(report),
+		**(extra or {}),
+	}
+	_atomic_write(manifest_path, lambda tmp: tmp.write_text(json.dumps(manifest, indent=2)))
+	return artifact
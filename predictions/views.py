@@ -1,30 +1,41 @@
+import asyncio
+
+from asgiref.sync import sync_to_async
 from django.contrib.auth.decorators import login_required
-from django.shortcuts import get_object_or_404, redirect, render
+from django.shortcuts import aget_object_or_404, redirect, render
 from django.urls import reverse
 
 from assessments.models import DemographicProfile
 from .models import PredictionResult
-from .services import LDClassifier, default_model_spec
+from .registry import get_classifier
+
+
+arender = sync_to_async(render)
+
+
+def _predict(profile):
+	classifier = get_classifier()
+	return classifier.predict(profile), classifier.name
 
 
 @login_required
-def predict_from_intake(request, intake_id: int):
-	profile = get_object_or_404(DemographicProfile, pk=intake_id, user=request.user)
-	classifier = LDClassifier(default_model_spec())
-	result = classifier.predict(profile)
-	prediction = PredictionResult.objects.create(
-		user=request.user,
+async def predict_from_intake(request, intake_id: int):
+	user = await request.auser()
+	profile = await aget_object_or_404(DemographicProfile, pk=intake_id, user=user)
+	# Model loading and inference are CPU-bound; run them off the event loop
+	result, model_name = await asyncio.get_running_loop().run_in_executor(None, _predict, profile)
+	prediction = await PredictionResult.objects.acreate(
+		user=user,
 		intake=profile,
 		label=result["label"],
 		probability=result["probability"],
-		model_name="sklearn",
+		model_name=model_name,
 	)
 	return redirect(reverse("prediction_detail", args=[prediction.id]))
 
 
 @login_required
-def prediction_detail(request, prediction_id: int):
-	prediction = get_object_or_404(PredictionResult, pk=prediction_id, user=request.user)
-	return render(request, "predictions/detail.html", {"prediction": prediction})
-
-
+async def prediction_detail(request, prediction_id: int):
+	user = await request.auser()
+	prediction = await aget_object_or_404(PredictionResult, pk=prediction_id, user=user)
+	return await arender(request, "predictions/detail.html", {"prediction": prediction})
@@ -0,0 +1,25 @@
+from django.urls import path
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from .models import Recommendation
+from .services import compute_user_area_scores
+
+
+class AreaScoresView(APIView):
+	"""GET: the user's weakness score per area (0..1, higher is weaker)."""
+
+	def get(self, request):
+		return Response([{"area": a.area, "score": a.score} for a in compute_user_area_scores(request.user)])
+
+
+class RecommendationsView(APIView):
+	def get(self, request):
+		recs = Recommendation.objects.filter(user=request.user).order_by("-score").values("area", "title", "description", "url", "score")
+		return Response(list(recs))
+
+
+urlpatterns = [
+	path("areas/", AreaScoresView.as_view(), name="api_area_scores"),
+	path("", RecommendationsView.as_view(), name="api_recommendations"),
+]
@@ -0,0 +1,90 @@
+from __future__ import annotations
+
+import threading
+import time
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+from .models import RecommendationResource
+
+
+BANDS = ["mild", "moderate", "severe"]
+MIN_SCORE = 0.1  # weaknesses at or below this get no recommendations
+INDEX_TTL_SECONDS = 60.0  # picks up catalog edits made by other processes
+
+
+@dataclass(frozen=True)
+class CatalogItem:
+	id: int
+	area: str
+	title: str
+	description: str
+	url: str
+	priority: int
+
+
+def band_for(score: float) -> Optional[str]:
+	if score <= MIN_SCORE:
+		return None
+	if score <= 0.4:
+		return "mild"
+	if score <= 0.7:
+		return "moderate"
+	return "severe"
+
+
+class CatalogIndex:
+	"""In-memory (area, band) -> items index over active RecommendationResources."""
+
+	def __init__(self, ttl: float = INDEX_TTL_SECONDS):
+		self.ttl = ttl
+		self._lock = threading.Lock()
+		self._index: Optional[Dict[Tuple[str, str], List[CatalogItem]]] = None
+		self._loaded_at = 0.0
+		self._version = ""
+
+	def _load(self) -> Dict[Tuple[str, str], List[CatalogItem]]:
+		index: Dict[Tuple[str, str], List[CatalogItem]] = {}
+		rows = RecommendationResource.objects.filter(active=True).values_list(
+			"id", "area", "band", "title", "description", "url", "priority", "updated_at",
+		)
+		latest = None
+		count = 0
+		for pk, area, band, title, description, url, priority, updated_at in rows:
+			count += 1
+			latest = updated_at if latest is None else max(latest, updated_at)
+			item = CatalogItem(pk, area, title, description, url, priority)
+			for b in (BANDS if band == "any" else [band]):
+				index.setdefault((area, b), []).append(item)
+		for items in index.values():
+			items.sort(key=lambda i: (i.priority, i.id))
+		self._version = f"{count}:{latest.isoformat() if latest else ''}"
+		return index
+
+	def get(self) -> Dict[Tuple[str, str], List[CatalogItem]]:
+		index = self._index
+		if index is not None and time.monotonic() - self._loaded_at < self.ttl:
+			return index
+		with self._lock:
+			if self._index is None or time.monotonic() - self._loaded_at >= self.ttl:
+				self._index = self._load()
+				self._loaded_at = time.monotonic()
+			return self._index
+
+	@property
+	def version(self) -> str:
+		"""Changes whenever the active catalog does; part of the recommendations digest."""
+		self.get()
+		return self._version
+
+	def invalidate(self) -> None:
+		self._index = None
+
+	def lookup(self, area: str, score: float) -> List[CatalogItem]:
+		band = band_for(score)
+		if band is None:
+			return []
+		return self.get().get((area, band), [])
+
+
+catalog = CatalogIndex()
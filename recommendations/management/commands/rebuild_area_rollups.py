@@ -0,0 +1,34 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+
+from recommendations.services import rebuild_area_rollups, refresh_recommendations
+
+
+class Command(BaseCommand):
+	help = "Backfill AreaScoreRollup rows from the completed test sessions and refresh recommendations."
+
+	def add_arguments(self, parser):
+		parser.add_argument("--user-id", type=int, action="append", dest="user_ids", help="Only rebuild these users (repeatable).")
+		parser.add_argument("--chunk-size", type=int, default=500)
+
+	def handle(self, *args, **options):
+		user_ids = options["user_ids"]
+		if user_ids is None:
+			user_ids = get_user_model().objects.order_by("pk").values_list("pk", flat=True).iterator(chunk_size=options["chunk_size"])
+		chunk, users, rows = [], 0, 0
+		for uid in user_ids:
+			chunk.append(uid)
+			if len(chunk) >= options["chunk_size"]:
+				rows += self._rebuild(chunk)
+				users += len(chunk)
+				chunk = []
+		if chunk:
+			rows += self._rebuild(chunk)
+			users += len(chunk)
+		self.stdout.write(self.style.SUCCESS(f"Rebuilt {rows} rollup rows for {users} users."))
+
+	def _rebuild(self, user_ids):
+		rows = rebuild_area_rollups(user_ids)
+		for user in get_user_model().objects.filter(pk__in=user_ids):
+			refresh_recommendations(user)
+		return rows
@@ -0,0 +1,31 @@
+# Generated by Django 5.2.18 on 2026-10-18 12:28
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recommendations', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AreaScoreRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('area', models.CharField(choices=[('math', 'Math'), ('grammar', 'Grammar'), ('reading', 'Reading'), ('memory', 'Memory'), ('scenario', 'Comprehension')], max_length=20)),
+                ('sessions', models.PositiveIntegerField(default=0)),
+                ('sum_first', models.FloatField(default=0.0)),
+                ('sum_second', models.FloatField(default=0.0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='area_rollups', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('user', 'area'), name='uniq_area_rollup_user_area')],
+            },
+        ),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 5.2.18 on 2026-10-18 12:29
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recommendations', '0003_recommendationstate'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RecommendationResource',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('area', models.CharField(choices=[('math', 'Math'), ('grammar', 'Grammar'), ('reading', 'Reading'), ('memory', 'Memory'), ('scenario', 'Comprehension')], max_length=20)),
+                ('band', models.CharField(choices=[('any', 'Any'), ('mild', 'Mild (0.1-0.4)'), ('moderate', 'Moderate (0.4-0.7)'), ('severe', 'Severe (0.7-1.0)')], default='any', max_length=10)),
+                ('title', models.CharField(max_length=200)),
+                ('description', models.TextField(blank=True)),
+                ('url', models.URLField(blank=True)),
+                ('priority', models.PositiveSmallIntegerField(default=100)),
+                ('active', models.BooleanField(default=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'ordering': ['area', 'band', 'priority'],
+                'indexes': [models.Index(fields=['area', 'band'], name='rec_resource_area_band_idx')],
+            },
+        ),
+        migrations.AddField(
+            model_name='recommendation',
+            name='resource',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='recommendations.recommendationresource'),
+        ),
+    ]
@@ -0,0 +1,41 @@
+from django.db import migrations
+
+
+RESOURCES = [
+	# The original per-area items apply at any severity
+	("math", "any", 10, "Basic numeracy practice", "Practice addition and subtraction within 20. Focus on accuracy, then speed.", "https://www.khanacademy.org/math/arithmetic"),
+	("math", "mild", 20, "Timed fact fluency", "Short daily timed sets of mixed addition and subtraction facts.", "https://www.khanacademy.org/math/arithmetic"),
+	("math", "severe", 5, "Concrete manipulatives for number sense", "Use counters or a number line to model each sum before answering.", "https://www.khanacademy.org/math/early-math"),
+	("grammar", "any", 10, "Subject-verb agreement drills", "Short exercises on articles and agreement.", "https://www.ego4u.com/en/cram-up/grammar"),
+	("grammar", "severe", 5, "Guided sentence building", "Build simple sentences with an adult, then change one word at a time.", "https://www.ego4u.com/en/cram-up/grammar"),
+	("reading", "any", 10, "Fluency passages (timed)", "Read graded passages aloud daily; track WPM and accuracy.", "https://readtheory.org/"),
+	("reading", "severe", 5, "Phonics and decoding support", "Practice sounding out words in short, decodable texts before timed reading.", "https://readtheory.org/"),
+	("memory", "any", 10, "Working memory games", "Sequence recall and matching games to build memory span.", "https://www.cogniFit.com/"),
+	("memory", "mild", 20, "Chunking strategies", "Group digits in twos or threes when memorising sequences.", "https://www.cogniFit.com/"),
+	("scenario", "any", 10, "Reading comprehension practice", "Answer wh- questions after short stories to improve inference.", "https://www.ixl.com/ela/"),
+	("scenario", "severe", 5, "Story retelling", "Retell a short story in your own words before answering questions about it.", "https://www.ixl.com/ela/"),
+]
+
+
+def seed(apps, schema_editor):
+	RecommendationResource = apps.get_model("recommendations", "RecommendationResource")
+	RecommendationResource.objects.bulk_create([
+		RecommendationResource(area=area, band=band, priority=priority, title=title, description=description, url=url)
+		for area, band, priority, title, description, url in RESOURCES
+	])
+
+
+def unseed(apps, schema_editor):
+	RecommendationResource = apps.get_model("recommendations", "RecommendationResource")
+	RecommendationResource.objects.filter(title__in=[r[3] for r in RESOURCES]).delete()
+
+
+class Migration(migrations.Migration):
+
+	dependencies = [
+		("recommendations", "0004_recommendationresource"),
+	]
+
+	operations = [
+		migrations.RunPython(seed, unseed),
+	]
@@ -17,6 +17,7 @@ class Recommendation(models.Model):
 	description = models.TextField(blank=True)
 	url = models.URLField(blank=True)
 	score = models.FloatField(default=0.0)  # normalized weakness severity 0..1
+	resource = models.ForeignKey("RecommendationResource", on_delete=models.SET_NULL, null=True, blank=True, related_name="+")
 	created_at = models.DateTimeField(auto_now_add=True)
 
 	class Meta:
@@ -26,3 +27,63 @@ class Recommendation(models.Model):
 		return f"Rec({self.user_id}, {self.area}, {self.title})"
 
 
+
+
+class RecommendationResource(models.Model):
+	"""Catalog entry offered to users whose weakness in ``area`` falls in ``band``."""
+
+	BAND_CHOICES = [
+		("any", "Any"),
+		("mild", "Mild (0.1-0.4)"),
+		("moderate", "Moderate (0.4-0.7)"),
+		("severe", "Severe (0.7-1.0)"),
+	]
+
+	area = models.CharField(max_length=20, choices=Recommendation.AREA_CHOICES)
+	band = models.CharField(max_length=10, choices=BAND_CHOICES, default="any")
+	title = models.CharField(max_length=200)
+	description = models.TextField(blank=True)
+	url = models.URLField(blank=True)
+	priority = models.PositiveSmallIntegerField(default=100)  # lower comes first
+	active = models.BooleanField(default=True)
+	updated_at = models.DateTimeField(auto_now=True)
+
+	class Meta:
+		ordering = ["area", "band", "priority"]
+		indexes = [
+			models.Index(fields=["area", "band"], name="rec_resource_area_band_idx"),
+		]
+
+	def __str__(self) -> str:
+		return f"Resource({self.area}/{self.band}, {self.title})"
+
+
+class AreaScoreRollup(models.Model):
+	"""Running per-user, per-area totals over completed test sessions."""
+
+	user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="area_rollups")
+	area = models.CharField(max_length=20, choices=Recommendation.AREA_CHOICES)
+	sessions = models.PositiveIntegerField(default=0)
+	# num_correct / num_total sums; reading stores accuracy / wpm sums instead
+	sum_first = models.FloatField(default=0.0)
+	sum_second = models.FloatField(default=0.0)
+	updated_at = models.DateTimeField(auto_now=True)
+
+	class Meta:
+		constraints = [
+			models.UniqueConstraint(fields=["user", "area"], name="uniq_area_rollup_user_area"),
+		]
+
+	def __str__(self) -> str:
+		return f"Rollup({self.user_id}, {self.area}, n={self.sessions})"
+
+
+class RecommendationState(models.Model):
+	"""Fingerprint of the area scores the user's current recommendations were built from."""
+
+	user = models.OneToOneField(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, primary_key=True, related_name="recommendation_state")
+	scores_digest = models.CharField(max_length=64)
+	updated_at = models.DateTimeField(auto_now=True)
+
+	def __str__(self) -> str:
+		return f"RecState({self.user_id}, {self.scores_digest[:8]})"
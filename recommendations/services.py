@@ -1,12 +1,17 @@
 from __future__ import annotations
 
+import hashlib
 from dataclasses import dataclass
-from typing import List
+from typing import Dict, Iterable, List
 
-from django.db.models import Avg
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models import CharField, Count, F, FloatField, Sum, Value
+from django.utils import timezone
 
 from assessments.models import MathTestSession, GrammarTestSession, ReadingTestSession, MemoryTestSession, ScenarioTestSession
-from .models import Recommendation
+from .catalog import catalog
+from .models import AreaScoreRollup, Recommendation, RecommendationState
 
 
 @dataclass
@@ -15,80 +20,175 @@ class AreaScore:
 	score: float  # 0..1 weakness (higher = weaker)
 
 
-def compute_user_area_scores(user) -> List[AreaScore]:
-	areas: List[AreaScore] = []
-	# For each area, compute average performance and convert to weakness score
-	def ratio(qs, correct_field="num_correct", total_field="num_total"):
-		agg = qs.aggregate(avg_correct=Avg(correct_field), avg_total=Avg(total_field))
-		c = (agg["avg_correct"] or 0)
-		t = (agg["avg_total"] or 0)
-		return (1.0 - (c / t)) if t else 0.0
-
-	areas.append(AreaScore("math", ratio(MathTestSession.objects.filter(user=user))))
-	areas.append(AreaScore("grammar", ratio(GrammarTestSession.objects.filter(user=user))))
+AREAS = ["math", "grammar", "reading", "memory", "scenario"]
+
+# area -> (session model, field summed into sum_first, field summed into sum_second)
+_AREA_SOURCES = [
+	("math", MathTestSession, "num_correct", "num_total"),
+	("grammar", GrammarTestSession, "num_correct", "num_total"),
+	("reading", ReadingTestSession, "accuracy", "wpm"),
+	("memory", MemoryTestSession, "num_correct", "num_total"),
+	("scenario", ScenarioTestSession, "num_correct", "num_total"),
+]
+_SESSION_AREAS = {model: (area, first, second) for area, model, first, second in _AREA_SOURCES}
+
+
+def _ratio_weakness(sum_correct, sum_total) -> float:
+	# mean(correct) / mean(total) over n sessions == sum(correct) / sum(total)
+	return (1.0 - (sum_correct / sum_total)) if sum_total else 0.0
+
+
+def _reading_weakness(sessions, sum_accuracy, sum_wpm) -> float:
 	# Reading weakness: combine low accuracy and low WPM
-	read_qs = ReadingTestSession.objects.filter(user=user)
-	read_acc_weak = 1.0 - (read_qs.aggregate(v=Avg("accuracy"))["v"] or 0)
-	read_wpm = (read_qs.aggregate(v=Avg("wpm"))["v"] or 0)
-	read_wpm_weak = 1.0 if read_wpm < 80 else (0.5 if read_wpm < 120 else 0.0)
-	areas.append(AreaScore("reading", min(1.0, max(0.0, 0.6 * read_acc_weak + 0.4 * read_wpm_weak))))
-	areas.append(AreaScore("memory", ratio(MemoryTestSession.objects.filter(user=user))))
-	areas.append(AreaScore("scenario", ratio(ScenarioTestSession.objects.filter(user=user))))
-	return areas
+	acc = (sum_accuracy / sessions) if sessions else 0.0
+	wpm = (sum_wpm / sessions) if sessions else 0.0
+	acc_weak = 1.0 - acc
+	wpm_weak = 1.0 if wpm < 80 else (0.5 if wpm < 120 else 0.0)
+	return min(1.0, max(0.0, 0.6 * acc_weak + 0.4 * wpm_weak))
 
 
-def generate_recommendations(user) -> List[Recommendation]:
-	areas = compute_user_area_scores(user)
-	Recommendation.objects.filter(user=user).delete()
+def _area_score(area: str, sessions: int, sum_first: float, sum_second: float) -> AreaScore:
+	if area == "reading":
+		return AreaScore(area, _reading_weakness(sessions, sum_first, sum_second))
+	return AreaScore(area, _ratio_weakness(sum_first, sum_second))
+
+
+def _scores_from_totals(totals: Dict[str, tuple]) -> List[AreaScore]:
+	return [_area_score(area, *totals.get(area, (0, 0.0, 0.0))) for area in AREAS]
+
+
+def _area_totals_query(user_ids: List[int]):
+	# One GROUP BY per session table, glued together with UNION ALL: a single round trip
+	parts = [
+		model.objects.filter(user_id__in=user_ids, ended_at__isnull=False)
+		.order_by()
+		.values("user_id")
+		.annotate(
+			area=Value(area, output_field=CharField()),
+			n=Count("id"),
+			sum_first=Sum(first, output_field=FloatField()),
+			sum_second=Sum(second, output_field=FloatField()),
+		)
+		.values_list("user_id", "area", "n", "sum_first", "sum_second")
+		for area, model, first, second in _AREA_SOURCES
+	]
+	return parts[0].union(*parts[1:], all=True)
+
+
+def compute_session_totals(user_ids: List[int]) -> Dict[int, Dict[str, tuple]]:
+	"""Scan the session tables directly; used to (re)build the rollups."""
+	totals: Dict[int, Dict[str, tuple]] = {uid: {} for uid in user_ids}
+	if user_ids:
+		for user_id, area, n, sum_first, sum_second in _area_totals_query(user_ids):
+			totals[user_id][area] = (n, sum_first or 0.0, sum_second or 0.0)
+	return totals
+
+
+def compute_area_scores_bulk(users: Iterable) -> Dict[int, List[AreaScore]]:
+	user_ids = [getattr(u, "pk", u) for u in users]
+	totals: Dict[int, Dict[str, tuple]] = {uid: {} for uid in user_ids}
+	rows = AreaScoreRollup.objects.filter(user_id__in=user_ids).values_list("user_id", "area", "sessions", "sum_first", "sum_second")
+	for user_id, area, n, sum_first, sum_second in rows:
+		totals[user_id][area] = (n, sum_first, sum_second)
+	return {uid: _scores_from_totals(per_area) for uid, per_area in totals.items()}
+
+
+def compute_user_area_scores(user) -> List[AreaScore]:
+	return compute_area_scores_bulk([user])[user.pk]
+
+
+def record_completed_session(session) -> None:
+	"""Fold a just-finished session into its user's rollup; call inside the saving transaction."""
+	area, first, second = _SESSION_AREAS[type(session)]
+	rollup, _ = AreaScoreRollup.objects.get_or_create(user_id=session.user_id, area=area)
+	AreaScoreRollup.objects.filter(pk=rollup.pk).update(
+		sessions=F("sessions") + 1,
+		sum_first=F("sum_first") + float(getattr(session, first)),
+		sum_second=F("sum_second") + float(getattr(session, second)),
+		updated_at=timezone.now(),
+	)
+
+
+def rebuild_area_rollups(user_ids: List[int]) -> int:
+	"""Recompute the rollups for ``user_ids`` from the session tables.
+
+	Reads and rewrites inside one transaction that holds the users' rollup
+	rows, as ``predictions.featurestore.rebuild_user_features`` does, so a
+	session finishing meanwhile is either counted here or has its F()
+	increment applied after the rewrite. Returns how many (user, area) rows
+	have sessions.
+	"""
+	with transaction.atomic():
+		# A row must exist to be locked; record_completed_session creates them the same way
+		existing = get_user_model().objects.filter(pk__in=user_ids).values_list("pk", flat=True)
+		AreaScoreRollup.objects.bulk_create(
+			[AreaScoreRollup(user_id=uid, area=area) for uid in existing for area in AREAS], ignore_conflicts=True,
+		)
+		rows = list(AreaScoreRollup.objects.select_for_update().filter(user_id__in=user_ids).order_by("pk"))
+		totals = compute_session_totals(user_ids)
+		now = timezone.now()
+		for rollup in rows:
+			rollup.sessions, rollup.sum_first, rollup.sum_second = totals[rollup.user_id].get(rollup.area, (0, 0.0, 0.0))
+			rollup.updated_at = now
+		# Overwrite in place rather than delete and re-insert, which would drop the row locks
+		AreaScoreRollup.objects.bulk_update(rows, ["sessions", "sum_first", "sum_second", "updated_at"], batch_size=500)
+	return sum(1 for rollup in rows if rollup.sessions)
+
+
+def build_recommendations(user, areas: List[AreaScore], limit: int = 5, per_area: int = 2) -> List[Recommendation]:
+	"""Unsaved top-``limit`` recommendations for the given area scores, weakest areas first."""
 	created: List[Recommendation] = []
-	for a in areas:
-		if a.score <= 0.1:
-			continue
-		if a.area == "math":
-			created.append(Recommendation.objects.create(
+	for a in sorted(areas, key=lambda a: -a.score):
+		for item in catalog.lookup(a.area, a.score)[:per_area]:
+			created.append(Recommendation(
 				user=user,
-				area="math",
-				title="Basic numeracy practice",
-				description="Practice addition and subtraction within 20. Focus on accuracy, then speed.",
-				url="https://www.khanacademy.org/math/arithmetic",
-				score=a.score,
-			))
-		elif a.area == "grammar":
-			created.append(Recommendation.objects.create(
-				user=user,
-				area="grammar",
-				title="Subject-verb agreement drills",
-				description="Short exercises on articles and agreement.",
-				url="https://www.ego4u.com/en/cram-up/grammar",
-				score=a.score,
-			))
-		elif a.area == "reading":
-			created.append(Recommendation.objects.create(
-				user=user,
-				area="reading",
-				title="Fluency passages (timed)",
-				description="Read graded passages aloud daily; track WPM and accuracy.",
-				url="https://readtheory.org/",
-				score=a.score,
-			))
-		elif a.area == "memory":
-			created.append(Recommendation.objects.create(
-				user=user,
-				area="memory",
-				title="Working memory games",
-				description="Sequence recall and matching games to build memory span.",
-				url="https://www.cogniFit.com/",
-				score=a.score,
-			))
-		elif a.area == "scenario":
-			created.append(Recommendation.objects.create(
-				user=user,
-				area="scenario",
-				title="Reading comprehension practice",
-				description="Answer wh- questions after short stories to improve inference.",
-				url="https://www.ixl.com/ela/",
+				area=a.area,
+				title=item.title,
+				description=item.description,
+				url=item.url,
 				score=a.score,
+				resource_id=item.id,
 			))
+			if len(created) >= limit:
+				return created
 	return created
 
 
+def scores_digest(areas: List[AreaScore]) -> str:
+	key = ";".join(f"{a.area}={a.score:.4f}" for a in areas) + f"|catalog={catalog.version}"
+	return hashlib.sha1(key.encode("utf-8")).hexdigest()
+
+
+def refresh_recommendations(user) -> bool:
+	"""Bring stored recommendations in line with the current area scores.
+
+	Does nothing when the scores fingerprint is unchanged; otherwise applies the
+	difference with bulk_create/bulk_update/delete in one transaction.
+	"""
+	areas = compute_user_area_scores(user)
+	digest = scores_digest(areas)
+	if RecommendationState.objects.filter(user=user, scores_digest=digest).exists():
+		return False
+	desired = {(r.area, r.title): r for r in build_recommendations(user, areas)}
+	existing = {(r.area, r.title): r for r in Recommendation.objects.filter(user=user)}
+	to_create = [r for key, r in desired.items() if key not in existing]
+	to_update = []
+	for key, current in existing.items():
+		wanted = desired.get(key)
+		if wanted is None:
+			continue
+		fields = ("description", "url", "score", "resource_id")
+		if any(getattr(current, f) != getattr(wanted, f) for f in fields):
+			for f in fields:
+				setattr(current, f, getattr(wanted, f))
+			to_update.append(current)
+	stale = [r.pk for key, r in existing.items() if key not in desired]
+	with transaction.atomic():
+		if stale:
+			Recommendation.objects.filter(pk__in=stale).delete()
+		if to_update:
+			Recommendation.objects.bulk_update(to_update, ["description", "url", "score", "resource"])
+		if to_create:
+			Recommendation.objects.bulk_create(to_create)
+		RecommendationState.objects.update_or_create(user=user, defaults={"scores_digest": digest})
+	return True
@@ -0,0 +1,10 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .catalog import catalog
+from .models import RecommendationResource
+
+
+@receiver([post_save, post_delete], sender=RecommendationResource)
+def invalidate_catalog_index(**kwargs):
+	catalog.invalidate()
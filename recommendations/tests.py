@@ -0,0 +1,67 @@
+import threading
+import time
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.db import OperationalError, connection
+from django.test import TransactionTestCase
+from django.utils import timezone
+
+from assessments.models import MathTestSession
+from assessments.services import finish_session
+from recommendations import services
+from recommendations.models import AreaScoreRollup
+
+
+class RebuildRollupTests(TransactionTestCase):
+	# Keep the seeded catalog resources, which the flush between tests would otherwise drop
+	serialized_rollback = True
+
+	def setUp(self):
+		self.user = get_user_model().objects.create_user("pupil@example.com", "pw")
+		MathTestSession.objects.create(user=self.user, ended_at=timezone.now(), num_correct=3, num_total=5)
+		services.rebuild_area_rollups([self.user.pk])
+		self.pending = MathTestSession.objects.create(user=self.user, num_correct=4, num_total=5)
+
+	def finish_concurrently(self):
+		def run():
+			try:
+				while True:
+					try:
+						finish_session(MathTestSession.objects.get(pk=self.pending.pk))
+						return
+					except OperationalError:
+						# SQLite reports a held lock instead of waiting on it, as other backends do
+						time.sleep(0.01)
+			finally:
+				connection.close()
+
+		thread = threading.Thread(target=run)
+		thread.start()
+		return thread
+
+	def test_session_finished_during_rebuild_is_kept(self):
+		read_totals = services.compute_session_totals
+		threads = []
+
+		def totals_then_finish(user_ids):
+			totals = read_totals(user_ids)
+			# Another request finishes a session right after the rebuild has read the totals
+			threads.append(self.finish_concurrently())
+			threads[0].join(timeout=0.5)
+			return totals
+
+		with mock.patch.object(services, "compute_session_totals", side_effect=totals_then_finish):
+			self.assertEqual(services.rebuild_area_rollups([self.user.pk]), 1)
+		threads[0].join(timeout=10)
+		self.assertFalse(threads[0].is_alive())
+		rollup = AreaScoreRollup.objects.get(user=self.user, area="math")
+		self.assertEqual((rollup.sessions, rollup.sum_first, rollup.sum_second), (2, 7.0, 10.0))
+		self.assertEqual(services.compute_session_totals([self.user.pk])[self.user.pk]["math"], (2, 7.0, 10.0))
+
+	def test_rebuild_resets_areas_without_sessions(self):
+		AreaScoreRollup.objects.filter(user=self.user, area="math").update(sessions=5, sum_first=1.0)
+		AreaScoreRollup.objects.filter(user=self.user, area="grammar").update(sessions=2, sum_first=2.0, sum_second=4.0)
+		services.rebuild_area_rollups([self.user.pk])
+		rows = dict(AreaScoreRollup.objects.filter(user=self.user).values_list("area", "sessions"))
+		self.assertEqual(rows, {"math": 1, "grammar": 0, "reading": 0, "memory": 0, "scenario": 0})
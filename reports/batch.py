@@ -0,0 +1,116 @@
+from __future__ import annotations
+
+import json
+import multiprocessing
+import os
+import shutil
+import zipfile
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+import django
+from .services import ReportData, collect_report_data_bulk, render_report_pdf, report_cache_keys, report_cache_path
+
+
+MANIFEST_NAME = "manifest.json"
+
+
+def _render_to_file(data: ReportData, path: str) -> str:
+	# Runs in a pool process: pure rendering, no database access
+	tmp = f"{path}.tmp"
+	with open(tmp, "wb") as fh:
+		fh.write(render_report_pdf(data))
+	os.replace(tmp, path)
+	return path
+
+
+def _report_filename(user_id: int, email: str) -> str:
+	slug = "".join(c if c.isalnum() else "_" for c in email.split("@")[0])
+	return f"{user_id:06d}_{slug}.pdf"
+
+
+def load_manifest(out_dir: Path) -> Dict[str, dict]:
+	path = out_dir / MANIFEST_NAME
+	if not path.exists():
+		return {}
+	return json.loads(path.read_text())
+
+
+def _save_manifest(out_dir: Path, manifest: Dict[str, dict]) -> None:
+	tmp = out_dir / f"{MANIFEST_NAME}.tmp"
+	tmp.write_text(json.dumps(manifest, indent=1, sort_keys=True))
+	os.replace(tmp, out_dir / MANIFEST_NAME)
+
+
+def generate_batch(
+	user_ids: List[int],
+	out_dir: Path,
+	workers: Optional[int] = None,
+	chunk_size: int = 200,
+	zip_path: Optional[Path] = None,
+	progress: Optional[Callable[[int, int], None]] = None,
+) -> Dict[str, dict]:
+	"""Render one PDF per user into ``out_dir`` across a process pool.
+
+	``manifest.json`` records each finished report with the data fingerprint it
+	was built from, so re-running after a crash skips reports that are still
+	current and only redoes the rest.
+	"""
+	out_dir.mkdir(parents=True, exist_ok=True)
+	manifest = load_manifest(out_dir)
+	total = len(user_ids)
+	done = 0
+	# Spawned, not forked: the caller may be a threaded web worker, and a forked child
+	# would inherit its open database connections and locks held by other threads.
+	# The initializer is django.setup itself, since importing this module needs apps loaded.
+	mp_context = multiprocessing.get_context("spawn")
+	with ProcessPoolExecutor(max_workers=workers, initializer=django.setup, mp_context=mp_context) as pool:
+		for start in range(0, total, chunk_size):
+			chunk = user_ids[start:start + chunk_size]
+			keys = report_cache_keys(chunk)
+			todo = []
+			for uid in chunk:
+				entry = manifest.get(str(uid))
+				if entry and entry.get("cache_key") == keys.get(uid) and (out_dir / entry["file"]).exists():
+					done += 1
+					continue
+				todo.append(uid)
+			data = collect_report_data_bulk(todo) if todo else {}
+			futures = {}
+			for uid in todo:
+				if uid not in data:
+					manifest[str(uid)] = {"status": "missing"}
+					done += 1
+					continue
+				filename = _report_filename(uid, data[uid].email)
+				cached = report_cache_path(keys[uid])
+				if cached.exists():
+					shutil.copyfile(cached, out_dir / filename)
+					manifest[str(uid)] = {"status": "done", "file": filename, "cache_key": keys[uid]}
+					done += 1
+					continue
+				futures[pool.submit(_render_to_file, data[uid], str(out_dir / filename))] = (uid, filename)
+			for future in as_completed(futures):
+				uid, filename = futures[future]
+				try:
+					future.result()
+				except Exception as exc:
+					manifest[str(uid)] = {"status": "failed", "error": str(exc)}
+				else:
+					manifest[str(uid)] = {"status": "done", "file": filename, "cache_key": keys[uid]}
+				done += 1
+				if progress:
+					progress(done, total)
+				if done % 20 == 0:
+					_save_manifest(out_dir, manifest)
+			_save_manifest(out_dir, manifest)
+	if zip_path is not None:
+		tmp_zip = zip_path.with_suffix(".zip.tmp")
+		with zipfile.ZipFile(tmp_zip, "w", compression=zipfile.ZIP_DEFLATED) as zf:
+			for entry in manifest.values():
+				if entry.get("status") == "done":
+					zf.write(out_dir / entry["file"], entry["file"])
+			zf.write(out_dir / MANIFEST_NAME, MANIFEST_NAME)
+		os.replace(tmp_zip, zip_path)
+	return manifest
@@ -0,0 +1,76 @@
+from __future__ import annotations
+
+import hashlib
+from io import BytesIO
+from typing import List
+from xml.sax.saxutils import escape
+
+from django.core.cache import cache
+
+from recommendations.services import AreaScore
+
+
+CHART_CACHE_TIMEOUT = 60 * 60 * 24
+PDF_COLOR = "#4e79a7"
+DASHBOARD_COLOR = "#f28e2b"
+
+
+def area_chart_digest(areas: List[AreaScore], color: str) -> str:
+	key = ";".join(f"{a.area}={a.score:.4f}" for a in areas) + f"|{color}"
+	return hashlib.sha1(key.encode("utf-8")).hexdigest()
+
+
+def _draw_png(areas: List[AreaScore], color: str) -> bytes:
+	# Object-oriented API only: no pyplot global state, safe under threaded workers
+	from matplotlib.backends.backend_agg import FigureCanvasAgg
+	from matplotlib.figure import Figure
+
+	fig = Figure(figsize=(6, 3))
+	FigureCanvasAgg(fig)
+	ax = fig.add_subplot()
+	ax.bar([a.area.title() for a in areas], [a.score for a in areas], color=color)
+	ax.set_ylim(0, 1)
+	ax.set_ylabel("Weakness (0..1)")
+	ax.set_title("Area Weakness Scores")
+	fig.tight_layout()
+	buf = BytesIO()
+	fig.savefig(buf, format="png")
+	return buf.getvalue()
+
+
+def render_area_chart_png(areas: List[AreaScore], color: str = PDF_COLOR) -> bytes:
+	key = f"area-chart:png:{area_chart_digest(areas, color)}"
+	png = cache.get(key)
+	if png is None:
+		png = _draw_png(areas, color)
+		cache.set(key, png, CHART_CACHE_TIMEOUT)
+	return png
+
+
+def render_area_chart_svg(areas: List[AreaScore], color: str = DASHBOARD_COLOR) -> str:
+	"""Plain SVG bar chart; no Matplotlib import."""
+	width, height, pad, axis = 600, 300, 30, 40
+	plot_h = height - 2 * pad
+	slot = (width - axis - pad) / max(1, len(areas))
+	bar_w = slot * 0.6
+	parts = [
+		f'<svg xmlns="http://www.w3.org/2000/svg" viewBox="0 0 {width} {height}" role="img" aria-label="Area weakness scores">',
+		f'<text x="{width / 2}" y="18" text-anchor="middle" font-size="14">Area Weakness Scores</text>',
+		f'<line x1="{axis}" y1="{pad}" x2="{axis}" y2="{height - pad}" stroke="#333"/>',
+		f'<line x1="{axis}" y1="{height - pad}" x2="{width - pad}" y2="{height - pad}" stroke="#333"/>',
+	]
+	for tick in (0.0, 0.5, 1.0):
+		y = height - pad - tick * plot_h
+		parts.append(f'<text x="{axis - 6}" y="{y + 4:.1f}" text-anchor="end" font-size="10">{tick:.1f}</text>')
+	for i, a in enumerate(areas):
+		score = min(1.0, max(0.0, a.score))
+		x = axis + i * slot + (slot - bar_w) / 2
+		h = score * plot_h
+		label = escape(a.area.title())
+		parts.append(
+			f'<rect x="{x:.1f}" y="{height - pad - h:.1f}" width="{bar_w:.1f}" height="{h:.1f}" fill="{color}">'
+			f'<title>{label}: {score:.2f}</title></rect>'
+		)
+		parts.append(f'<text x="{x + bar_w / 2:.1f}" y="{height - pad + 14}" text-anchor="middle" font-size="11">{label}</text>')
+	parts.append("</svg>")
+	return "".join(parts)
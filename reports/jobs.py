@@ -0,0 +1,109 @@
+from __future__ import annotations
+
+import logging
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from pathlib import Path
+from typing import List, Optional
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from .batch import generate_batch
+from .models import ReportJob
+from .services import build_user_report, report_cache_key, report_cache_path
+
+
+logger = logging.getLogger(__name__)
+
+_executor: Optional[ThreadPoolExecutor] = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor() -> ThreadPoolExecutor:
+	global _executor
+	if _executor is None:
+		with _executor_lock:
+			if _executor is None:
+				_executor = ThreadPoolExecutor(max_workers=settings.REPORT_WORKERS, thread_name_prefix="report")
+	return _executor
+
+
+def run_job(job_id: int) -> None:
+	"""Claim a queued job and build its PDF; safe to call from any worker or command."""
+	close_old_connections()
+	try:
+		claimed = ReportJob.objects.filter(pk=job_id, status="queued").update(
+			status="running", started_at=timezone.now(), attempts=F("attempts") + 1,
+		)
+		if not claimed:
+			return
+		job = ReportJob.objects.select_related("user").get(pk=job_id)
+		try:
+			build_user_report(job.user, job.cache_key)
+		except Exception as exc:
+			logger.exception("Report job %s failed", job_id)
+			ReportJob.objects.filter(pk=job_id).update(status="failed", error=str(exc), finished_at=timezone.now())
+		else:
+			ReportJob.objects.filter(pk=job_id).update(status="done", finished_at=timezone.now())
+	finally:
+		close_old_connections()
+
+
+def reclaim_stale_jobs(**filters) -> List[int]:
+	"""Requeue jobs left "running" longer than REPORT_JOB_TIMEOUT by a killed worker.
+
+	Jobs that have already been claimed REPORT_JOB_MAX_ATTEMPTS times are
+	failed instead, so a report that kills its worker is not retried forever.
+	Returns the requeued job ids.
+	"""
+	cutoff = timezone.now() - timedelta(seconds=settings.REPORT_JOB_TIMEOUT)
+	# Jobs claimed before started_at existed go by their creation time
+	old = Q(started_at__lt=cutoff) | Q(started_at__isnull=True, created_at__lt=cutoff)
+	stale = ReportJob.objects.filter(old, status="running", **filters)
+	stale.filter(attempts__gte=settings.REPORT_JOB_MAX_ATTEMPTS).update(
+		status="failed", error="Worker stopped before the report was built", finished_at=timezone.now(),
+	)
+	job_ids = list(stale.values_list("pk", flat=True))
+	# Same conditional-UPDATE claim as run_job: only still-stale rows are requeued
+	ReportJob.objects.filter(old, pk__in=job_ids, status="running").update(status="queued", started_at=None)
+	return job_ids
+
+
+def enqueue_report(user) -> ReportJob:
+	cache_key = report_cache_key(user)
+	if report_cache_path(cache_key).exists():
+		return ReportJob.objects.create(user=user, cache_key=cache_key, status="done", finished_at=timezone.now())
+	for job_id in reclaim_stale_jobs(user=user, cache_key=cache_key):
+		transaction.on_commit(lambda job_id=job_id: _get_executor().submit(run_job, job_id))
+	pending = ReportJob.objects.filter(user=user, cache_key=cache_key, status__in=["queued", "running"]).first()
+	if pending:
+		return pending
+	job = ReportJob.objects.create(user=user, cache_key=cache_key)
+	transaction.on_commit(lambda: _get_executor().submit(run_job, job.pk))
+	return job
+
+
+def batch_dir(batch_id: str) -> Path:
+	return Path(settings.REPORT_CACHE_DIR) / "batches" / batch_id
+
+
+def _run_batch(user_ids: List[int], batch_id: str) -> None:
+	out_dir = batch_dir(batch_id)
+	try:
+		generate_batch(user_ids, out_dir, zip_path=out_dir / "reports.zip")
+	except Exception:
+		logger.exception("Report batch %s failed", batch_id)
+	finally:
+		close_old_connections()
+
+
+def enqueue_batch(user_ids: List[int]) -> str:
+	batch_id = uuid.uuid4().hex
+	batch_dir(batch_id).mkdir(parents=True, exist_ok=True)
+	_get_executor().submit(_run_batch, list(user_ids), batch_id)
+	return batch_id
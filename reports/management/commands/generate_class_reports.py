@@ -0,0 +1,48 @@
+from pathlib import Path
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from reports.batch import generate_batch
+
+
+class Command(BaseCommand):
+	help = "Generate one PDF report per user in parallel; re-run to resume after a crash."
+
+	def add_arguments(self, parser):
+		parser.add_argument("--out", required=True, help="Output directory (holds the PDFs and manifest.json).")
+		parser.add_argument("--user-id", type=int, action="append", dest="user_ids")
+		parser.add_argument("--emails-file", help="File with one user email per line.")
+		parser.add_argument("--role", help="All users with this role, e.g. student.")
+		parser.add_argument("--zip", dest="zip_path", help="Also bundle the finished reports into this zip file.")
+		parser.add_argument("--workers", type=int, default=None, help="Pool size (default: CPU count).")
+		parser.add_argument("--chunk-size", type=int, default=200)
+
+	def handle(self, *args, **options):
+		users = get_user_model().objects.order_by("pk")
+		if options["user_ids"]:
+			users = users.filter(pk__in=options["user_ids"])
+		elif options["emails_file"]:
+			emails = [line.strip() for line in Path(options["emails_file"]).read_text().splitlines() if line.strip()]
+			users = users.filter(email__in=emails)
+		elif options["role"]:
+			users = users.filter(role=options["role"])
+		else:
+			raise CommandError("Pass --user-id, --emails-file or --role.")
+		user_ids = list(users.values_list("pk", flat=True))
+
+		def progress(done, total):
+			self.stdout.write(f"{done}/{total}")
+
+		manifest = generate_batch(
+			user_ids,
+			Path(options["out"]),
+			workers=options["workers"],
+			chunk_size=options["chunk_size"],
+			zip_path=Path(options["zip_path"]) if options["zip_path"] else None,
+			progress=progress,
+		)
+		failed = [uid for uid, entry in manifest.items() if entry.get("status") == "failed"]
+		self.stdout.write(self.style.SUCCESS(f"{len(user_ids) - len(failed)} reports ready in {options['out']}"))
+		if failed:
+			self.stderr.write(f"Failed: {', '.join(failed)}")
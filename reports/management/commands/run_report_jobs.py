@@ -0,0 +1,32 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from reports.jobs import reclaim_stale_jobs, run_job
+from reports.models import ReportJob
+
+
+class Command(BaseCommand):
+	help = (
+		"Build queued PDF report jobs, e.g. ones left behind by a restarted web worker. "
+		"Jobs stuck in \"running\" past REPORT_JOB_TIMEOUT are requeued first."
+	)
+
+	def add_arguments(self, parser):
+		parser.add_argument("--loop", action="store_true", help="Keep polling for new jobs.")
+		parser.add_argument("--interval", type=float, default=2.0)
+
+	def handle(self, *args, **options):
+		while True:
+			reclaimed = reclaim_stale_jobs()
+			if reclaimed:
+				self.stdout.write(f"Requeued {len(reclaimed)} stale jobs")
+			job_ids = list(ReportJob.objects.filter(status="queued").order_by("created_at").values_list("pk", flat=True)[:50])
+			for job_id in job_ids:
+				run_job(job_id)
+			if job_ids:
+				self.stdout.write(f"Processed {len(job_ids)} jobs")
+			if not options["loop"]:
+				break
+			if not job_ids:
+				time.sleep(options["interval"])
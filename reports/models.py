@@ -0,0 +1,29 @@
+from django.conf import settings
+from django.db import models
+
+
+class ReportJob(models.Model):
+	STATUS_CHOICES = [
+		("queued", "Queued"),
+		("running", "Running"),
+		("done", "Done"),
+		("failed", "Failed"),
+	]
+
+	user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="report_jobs")
+	status = models.CharField(max_length=10, choices=STATUS_CHOICES, default="queued")
+	cache_key = models.CharField(max_length=64)
+	error = models.TextField(blank=True)
+	created_at = models.DateTimeField(auto_now_add=True)
+	started_at = models.DateTimeField(null=True, blank=True)  # last claim; a stale one means the worker died
+	attempts = models.PositiveSmallIntegerField(default=0)
+	finished_at = models.DateTimeField(null=True, blank=True)
+
+	class Meta:
+		ordering = ["-created_at"]
+		indexes = [
+			models.Index(fields=["status", "created_at"], name="report_job_status_idx"),
+		]
+
+	def __str__(self) -> str:
+		return f"ReportJob({self.user_id}, {self.status})"
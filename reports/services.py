@@ -0,0 +1,278 @@
+from __future__ import annotations
+
+import hashlib
+import os
+import threading
+from dataclasses import dataclass, field
+from datetime import datetime
+from io import BytesIO
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db.models import Max, OuterRef, Subquery
+
+from reportlab.lib import colors
+from reportlab.lib.pagesizes import A4
+from reportlab.lib.styles import getSampleStyleSheet
+from reportlab.platypus import Image as RLImage
+from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle
+
+from assessments.models import (
+	DemographicProfile,
+	MathTestSession,
+	GrammarTestSession,
+	ReadingTestSession,
+	MemoryTestSession,
+	ScenarioTestSession,
+)
+from assessments.itembank import responses_by_session
+from predictions.models import PredictionResult
+from recommendations.models import Recommendation, RecommendationState
+from recommendations.services import AreaScore, compute_area_scores_bulk, compute_user_area_scores
+from .charts import PDF_COLOR, render_area_chart_png
+
+
+# Bump when the PDF layout changes so cached reports are rebuilt
+REPORT_LAYOUT_VERSION = "1"
+
+
+@dataclass
+class TestSection:
+	title: str
+	cols: List[str]
+	summary: Optional[Tuple[int, int, int]] = None  # (num_correct, num_total, duration_seconds)
+	rows: List[List[Any]] = field(default_factory=list)
+
+
+@dataclass
+class ReportData:
+	"""Everything the PDF needs, fetched up front so rendering does no queries."""
+
+	email: str
+	profile: Optional[Tuple[int, str, bool, str]] = None  # (age, gender, reading_difficulties, attention_span)
+	prediction: Optional[Tuple[str, float]] = None
+	sections: List[TestSection] = field(default_factory=list)
+	reading: Optional[Tuple[float, float, str]] = None  # (wpm, accuracy, passage)
+	areas: List[AreaScore] = field(default_factory=list)
+	recs: List[Tuple[str, str, float]] = field(default_factory=list)
+
+
+def _math_rows(s, responses=None) -> List[List[Any]]:
+	return [[i+1, f"{d['a']} {d['op']} {d['b']}", d.get("user"), d.get("answer"), "Yes" if d.get("correct") else "No"] for i,d in enumerate(s.question_rows(responses)[:10])]
+
+
+def _grammar_rows(s, responses=None) -> List[List[Any]]:
+	return [[i+1, d.get("prompt"), d.get("user"), d.get("answer"), "Yes" if d.get("correct") else "No"] for i,d in enumerate(s.question_rows(responses)[:10])]
+
+
+def _memory_rows(s, responses=None) -> List[List[Any]]:
+	seq = s.target_sequence
+	return [[i+1, seq[i] if i < len(seq) else "", s.response[i] if i < len(s.response) else "", "Yes" if (i < len(seq) and i < len(s.response) and seq[i]==s.response[i]) else "No"] for i in range(min(10, max(len(seq), len(s.response))))]
+
+
+def _scenario_rows(s, responses=None) -> List[List[Any]]:
+	return [[i+1, d.get("q"), d.get("user"), d.get("a"), "Yes" if d.get("correct") else "No"] for i,d in enumerate(s.question_rows(responses)[:10])]
+
+
+# (title, model, table header, row builder) in report order; reading is rendered separately
+SECTIONS = [
+	("Math Test", MathTestSession, ["#", "Question", "Your", "Correct", "✓"], _math_rows),
+	("Grammar Test", GrammarTestSession, ["#", "Prompt", "Your", "Correct", "✓"], _grammar_rows),
+	("Memory Test", MemoryTestSession, ["#", "Target", "Your", "✓"], _memory_rows),
+	("Scenario Test", ScenarioTestSession, ["#", "Question", "Your", "Correct", "✓"], _scenario_rows),
+]
+
+# ItemResponse kind for sections whose answers live in the item bank
+_RESPONSE_KINDS = {MathTestSession: "math", GrammarTestSession: "grammar", ScenarioTestSession: "scenario"}
+
+
+def build_section(title: str, cols: List[str], row_fn, latest, responses=None) -> TestSection:
+	if latest is None:
+		return TestSection(title, cols)
+	summary = (getattr(latest, "num_correct", 0), getattr(latest, "num_total", 0), getattr(latest, "duration_seconds", 0))
+	return TestSection(title, cols, summary, row_fn(latest, responses))
+
+
+def collect_report_data(user) -> ReportData:
+	data = ReportData(email=user.email)
+	profile = DemographicProfile.objects.filter(user=user).order_by("-created_at").first()
+	if profile:
+		data.profile = (profile.age, profile.gender, profile.reading_difficulties, profile.attention_span)
+	pred = PredictionResult.objects.filter(user=user).order_by("-created_at").first()
+	if pred:
+		data.prediction = (pred.label, pred.probability)
+	for title, model, cols, row_fn in SECTIONS:
+		latest = model.objects.filter(user=user).order_by("-started_at").first()
+		data.sections.append(build_section(title, cols, row_fn, latest))
+	read = ReadingTestSession.objects.filter(user=user).order_by("-started_at").first()
+	if read:
+		data.reading = (read.wpm, read.accuracy, read.passage)
+	data.areas = compute_user_area_scores(user)
+	data.recs = [(r.area, r.title, r.score) for r in Recommendation.objects.filter(user=user).order_by("-score")[:10]]
+	return data
+
+
+def _latest_per_user(model, user_ids: List[int]):
+	# Highest id per user == latest row, since ids follow auto_now_add order
+	latest_ids = model.objects.filter(user_id__in=user_ids).order_by().values("user").annotate(m=Max("id")).values("m")
+	return {obj.user_id: obj for obj in model.objects.filter(id__in=latest_ids)}
+
+
+def collect_report_data_bulk(user_ids: List[int]) -> Dict[int, ReportData]:
+	"""collect_report_data for many users with a fixed number of queries."""
+	data = {pk: ReportData(email=email) for pk, email in get_user_model().objects.filter(pk__in=user_ids).values_list("pk", "email")}
+	ids = list(data)
+	for uid, profile in _latest_per_user(DemographicProfile, ids).items():
+		data[uid].profile = (profile.age, profile.gender, profile.reading_difficulties, profile.attention_span)
+	for uid, pred in _latest_per_user(PredictionResult, ids).items():
+		data[uid].prediction = (pred.label, pred.probability)
+	for title, model, cols, row_fn in SECTIONS:
+		latest = _latest_per_user(model, ids)
+		kind = _RESPONSE_KINDS.get(model)
+		responses = responses_by_session(kind, [s.pk for s in latest.values()]) if kind else {}
+		for uid, report in data.items():
+			session = latest.get(uid)
+			report.sections.append(build_section(title, cols, row_fn, session, responses.get(session.pk) if session else None))
+	for uid, read in _latest_per_user(ReadingTestSession, ids).items():
+		data[uid].reading = (read.wpm, read.accuracy, read.passage)
+	for uid, areas in compute_area_scores_bulk(ids).items():
+		data[uid].areas = areas
+	for uid, area, title, score in Recommendation.objects.filter(user_id__in=ids).order_by("user_id", "-score").values_list("user_id", "area", "title", "score"):
+		if len(data[uid].recs) < 10:
+			data[uid].recs.append((area, title, score))
+	return data
+
+
+def render_report_pdf(data: ReportData) -> bytes:
+	buffer = BytesIO()
+	doc = SimpleDocTemplate(buffer, pagesize=A4)
+	styles = getSampleStyleSheet()
+	story = []
+
+	# Header
+	story.append(Paragraph("LD Detection - Student Report", styles["Title"]))
+	story.append(Paragraph(datetime.utcnow().strftime("Generated on %Y-%m-%d %H:%M UTC"), styles["Normal"]))
+	story.append(Spacer(1, 12))
+
+	# User info
+	story.append(Paragraph(f"User: {data.email}", styles["Heading3"]))
+	if data.profile:
+		age, gender, reading_difficulties, attention_span = data.profile
+		rows = [["Age", age], ["Gender", gender], ["Reading difficulties", "Yes" if reading_difficulties else "No"], ["Attention", attention_span]]
+		table = Table(rows, hAlign="LEFT")
+		table.setStyle(TableStyle([("GRID", (0,0), (-1,-1), 0.25, colors.grey)]))
+		story.append(table)
+		story.append(Spacer(1, 12))
+
+	# Prediction
+	story.append(Paragraph("Model Prediction", styles["Heading3"]))
+	if data.prediction:
+		label, probability = data.prediction
+		story.append(Paragraph(f"Label: <b>{label}</b>", styles["Normal"]))
+		story.append(Paragraph(f"Probability (LD): {probability:.2f}", styles["Normal"]))
+	else:
+		story.append(Paragraph("No prediction available.", styles["Normal"]))
+	story.append(Spacer(1, 12))
+
+	# Test summaries
+	def add_test_section(section: TestSection):
+		story.append(Paragraph(section.title, styles["Heading3"]))
+		if section.summary:
+			num_correct, num_total, duration = section.summary
+			story.append(Paragraph(f"Score: {num_correct} / {num_total}", styles["Normal"]))
+			story.append(Paragraph(f"Duration: {duration} seconds", styles["Normal"]))
+			t = Table([section.cols] + section.rows, hAlign="LEFT")
+			t.setStyle(TableStyle([
+				("GRID", (0,0), (-1,-1), 0.25, colors.grey),
+				("BACKGROUND", (0,0), (-1,0), colors.whitesmoke),
+			]))
+			story.append(t)
+		else:
+			story.append(Paragraph("No attempts recorded.", styles["Normal"]))
+		story.append(Spacer(1, 12))
+
+	math, grammar, memory, scenario = data.sections
+	add_test_section(math)
+	add_test_section(grammar)
+
+	# Reading summary
+	story.append(Paragraph("Reading Test", styles["Heading3"]))
+	if data.reading:
+		wpm, accuracy, passage = data.reading
+		story.append(Paragraph(f"WPM: {wpm:.1f}, Accuracy: {accuracy:.2f}", styles["Normal"]))
+		story.append(Paragraph("Passage:", styles["Normal"]))
+		story.append(Paragraph(passage, styles["Normal"]))
+	else:
+		story.append(Paragraph("No attempts recorded.", styles["Normal"]))
+	story.append(Spacer(1, 12))
+
+	add_test_section(memory)
+	add_test_section(scenario)
+
+	# Analytics chart (area weaknesses)
+	if data.areas:
+		story.append(RLImage(BytesIO(render_area_chart_png(data.areas, PDF_COLOR)), width=400, height=200))
+		story.append(Spacer(1, 12))
+
+	# Recommendations
+	story.append(Paragraph("Recommendations", styles["Heading3"]))
+	if data.recs:
+		rows = [["Area", "Title", "Score"]] + [[area.title(), title, f"{score:.2f}"] for area, title, score in data.recs]
+		t = Table(rows, hAlign="LEFT")
+		t.setStyle(TableStyle([("GRID", (0,0), (-1,-1), 0.25, colors.grey), ("BACKGROUND", (0,0), (-1,0), colors.whitesmoke)]))
+		story.append(t)
+	else:
+		story.append(Paragraph("No recommendations at this time.", styles["Normal"]))
+
+	doc.build(story)
+	return buffer.getvalue()
+
+
+def _latest(model, field_name: str) -> Subquery:
+	return Subquery(
+		model.objects.filter(user=OuterRef("pk")).order_by().values("user").annotate(m=Max(field_name)).values("m")[:1]
+	)
+
+
+def report_cache_keys(user_ids: List[int]) -> Dict[int, str]:
+	"""Fingerprint of everything each user's report shows, built in a single query."""
+	fingerprint = {"profile": _latest(DemographicProfile, "updated_at"), "prediction": _latest(PredictionResult, "created_at")}
+	for model in (MathTestSession, GrammarTestSession, ReadingTestSession, MemoryTestSession, ScenarioTestSession):
+		name = model._meta.model_name
+		fingerprint[f"{name}_started"] = _latest(model, "started_at")
+		fingerprint[f"{name}_ended"] = _latest(model, "ended_at")
+	fingerprint["recs"] = _latest(RecommendationState, "updated_at")
+	rows = get_user_model().objects.filter(pk__in=user_ids).annotate(**fingerprint).values_list("pk", *fingerprint)
+	keys = {}
+	for pk, *values in rows:
+		raw = "|".join([REPORT_LAYOUT_VERSION, str(pk)] + [v.isoformat() if v else "-" for v in values])
+		keys[pk] = hashlib.sha1(raw.encode("utf-8")).hexdigest()
+	return keys
+
+
+def report_cache_key(user) -> str:
+	return report_cache_keys([user.pk])[user.pk]
+
+
+def report_cache_path(cache_key: str) -> Path:
+	return Path(settings.REPORT_CACHE_DIR) / cache_key[:2] / f"{cache_key}.pdf"
+
+
+def write_cached_report(cache_key: str, pdf: bytes) -> Path:
+	path = report_cache_path(cache_key)
+	path.parent.mkdir(parents=True, exist_ok=True)
+	# Write then rename so readers never see a partial file
+	tmp = path.with_suffix(f".{os.getpid()}-{threading.get_ident()}.tmp")
+	tmp.write_bytes(pdf)
+	os.replace(tmp, path)
+	return path
+
+
+def build_user_report(user, cache_key: Optional[str] = None) -> Path:
+	cache_key = cache_key or report_cache_key(user)
+	path = report_cache_path(cache_key)
+	if path.exists():
+		return path
+	return write_cached_report(cache_key, render_report_pdf(collect_report_data(user)))
@@ -1,10 +1,27 @@
-from django.urls import path
-from .views import download_report, analytics_dashboard
+from django.urls import path, re_path
+from .views import (
+	download_report,
+	analytics_dashboard,
+	area_chart,
+	report_job_create,
+	report_job_status,
+	report_job_download,
+	class_reports_create,
+	class_reports_status,
+	class_reports_download,
+)
 
 
 urlpatterns = [
 	path("download/", download_report, name="download_report"),
+	path("jobs/", report_job_create, name="report_job_create"),
+	path("jobs/<int:job_id>/", report_job_status, name="report_job_status"),
+	path("jobs/<int:job_id>/download/", report_job_download, name="report_job_download"),
+	path("class/", class_reports_create, name="class_reports_create"),
+	path("class/<slug:batch_id>/", class_reports_status, name="class_reports_status"),
+	path("class/<slug:batch_id>/download/", class_reports_download, name="class_reports_download"),
 	path("dashboard/", analytics_dashboard, name="analytics_dashboard"),
+	re_path(r"^chart/areas\.(?P<fmt>png|svg)$", area_chart, name="area_chart"),
 ]
 
 
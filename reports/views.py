@@ -1,181 +1,140 @@
-from io import BytesIO
-from datetime import datetime
-
-from django.contrib.auth.decorators import login_required
-from django.http import HttpResponse
-from django.shortcuts import render
-
-from reportlab.lib import colors
-from reportlab.lib.pagesizes import A4
-from reportlab.lib.styles import getSampleStyleSheet
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle
-
-from assessments.models import (
-	DemographicProfile,
-	MathTestSession,
-	GrammarTestSession,
-	ReadingTestSession,
-	MemoryTestSession,
-	ScenarioTestSession,
-)
-from predictions.models import PredictionResult
-from recommendations.models import Recommendation
+import asyncio
+
+from asgiref.sync import sync_to_async
+from django.contrib.auth.decorators import login_required, user_passes_test
+from django.http import FileResponse, Http404, HttpResponse, JsonResponse
+from django.shortcuts import aget_object_or_404, render
+from django.urls import reverse
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.views.decorators.http import require_POST
+
 from recommendations.services import compute_user_area_scores
+from .charts import DASHBOARD_COLOR, area_chart_digest, render_area_chart_png, render_area_chart_svg
+from .batch import load_manifest
+from .jobs import batch_dir, enqueue_batch, enqueue_report
+from .models import ReportJob
+from .services import report_cache_key, report_cache_path
+
+
+arender = sync_to_async(render)
+
+
+def _pdf_response(path):
+	return FileResponse(open(path, "rb"), as_attachment=True, filename="ld_report.pdf", content_type="application/pdf")
 
-# Matplotlib (non-interactive backend)
-import matplotlib
-matplotlib.use("Agg")
-import matplotlib.pyplot as plt
+
+def _job_payload(job: ReportJob) -> dict:
+	return {
+		"id": job.id,
+		"status": job.status,
+		"error": job.error,
+		"status_url": reverse("report_job_status", args=[job.id]),
+		"download_url": reverse("report_job_download", args=[job.id]) if job.status == "done" else None,
+	}
 
 
 @login_required
-def download_report(request):
-	buffer = BytesIO()
-	doc = SimpleDocTemplate(buffer, pagesize=A4)
-	styles = getSampleStyleSheet()
-	story = []
-
-	# Header
-	story.append(Paragraph("LD Detection - Student Report", styles["Title"]))
-	story.append(Paragraph(datetime.utcnow().strftime("Generated on %Y-%m-%d %H:%M UTC"), styles["Normal"]))
-	story.append(Spacer(1, 12))
-
-	# User info
-	story.append(Paragraph(f"User: {request.user.email}", styles["Heading3"]))
-	profile = DemographicProfile.objects.filter(user=request.user).order_by("-created_at").first()
-	if profile:
-		data = [["Age", profile.age], ["Gender", profile.gender], ["Reading difficulties", "Yes" if profile.reading_difficulties else "No"], ["Attention", profile.attention_span]]
-		table = Table(data, hAlign="LEFT")
-		table.setStyle(TableStyle([("GRID", (0,0), (-1,-1), 0.25, colors.grey)]))
-		story.append(table)
-		story.append(Spacer(1, 12))
-
-	# Prediction
-	story.append(Paragraph("Model Prediction", styles["Heading3"]))
-	pred = PredictionResult.objects.filter(user=request.user).order_by("-created_at").first()
-	if pred:
-		story.append(Paragraph(f"Label: <b>{pred.label}</b>", styles["Normal"]))
-		story.append(Paragraph(f"Probability (LD): {pred.probability:.2f}", styles["Normal"]))
-	else:
-		story.append(Paragraph("No prediction available.", styles["Normal"]))
-	story.append(Spacer(1, 12))
-
-	# Test summaries
-	def add_test_section(title, qs, cols, row_fn):
-		story.append(Paragraph(title, styles["Heading3"]))
-		latest = qs.order_by("-started_at").first()
-		if latest:
-			story.append(Paragraph(f"Score: {getattr(latest, 'num_correct', 0)} / {getattr(latest, 'num_total', 0)}", styles["Normal"]))
-			story.append(Paragraph(f"Duration: {getattr(latest, 'duration_seconds', 0)} seconds", styles["Normal"]))
-			rows = [cols] + row_fn(latest)
-			t = Table(rows, hAlign="LEFT")
-			t.setStyle(TableStyle([
-				("GRID", (0,0), (-1,-1), 0.25, colors.grey),
-				("BACKGROUND", (0,0), (-1,0), colors.whitesmoke),
-			]))
-			story.append(t)
-		else:
-			story.append(Paragraph("No attempts recorded.", styles["Normal"]))
-		story.append(Spacer(1, 12))
-
-	add_test_section(
-		"Math Test",
-		MathTestSession.objects.filter(user=request.user),
-		["#", "Question", "Your", "Correct", "✓"],
-		lambda s: [[i+1, f"{d['a']} {d['op']} {d['b']}", d.get("user"), d.get("answer"), "Yes" if d.get("correct") else "No"] for i,d in enumerate(s.details[:10])]
-	)
-
-	add_test_section(
-		"Grammar Test",
-		GrammarTestSession.objects.filter(user=request.user),
-		["#", "Prompt", "Your", "Correct", "✓"],
-		lambda s: [[i+1, d.get("prompt"), d.get("user"), d.get("answer"), "Yes" if d.get("correct") else "No"] for i,d in enumerate(s.details[:10])]
-	)
-
-	# Reading summary
-	story.append(Paragraph("Reading Test", styles["Heading3"]))
-	read = ReadingTestSession.objects.filter(user=request.user).order_by("-started_at").first()
-	if read:
-		story.append(Paragraph(f"WPM: {read.wpm:.1f}, Accuracy: {read.accuracy:.2f}", styles["Normal"]))
-		story.append(Paragraph("Passage:", styles["Normal"]))
-		story.append(Paragraph(read.passage, styles["Normal"]))
-	else:
-		story.append(Paragraph("No attempts recorded.", styles["Normal"]))
-	story.append(Spacer(1, 12))
-
-	add_test_section(
-		"Memory Test",
-		MemoryTestSession.objects.filter(user=request.user),
-		["#", "Target", "Your", "✓"],
-		lambda s: [[i+1, s.sequence[i] if i < len(s.sequence) else "", s.response[i] if i < len(s.response) else "", "Yes" if (i < len(s.sequence) and i < len(s.response) and s.sequence[i]==s.response[i]) else "No"] for i in range(min(10, max(len(s.sequence), len(s.response))))]
-	)
-
-	add_test_section(
-		"Scenario Test",
-		ScenarioTestSession.objects.filter(user=request.user),
-		["#", "Question", "Your", "Correct", "✓"],
-		lambda s: [[i+1, d.get("q"), d.get("user"), d.get("a"), "Yes" if d.get("correct") else "No"] for i,d in enumerate(s.details[:10])]
-	)
-
-	# Analytics chart (area weaknesses)
-	areas = compute_user_area_scores(request.user)
-	if areas:
-		# Create bar chart into buffer
-		labels = [a.area.title() for a in areas]
-		values = [a.score for a in areas]
-		fig, ax = plt.subplots(figsize=(6, 3))
-		ax.bar(labels, values, color="#4e79a7")
-		ax.set_ylim(0, 1)
-		ax.set_ylabel("Weakness (0..1)")
-		ax.set_title("Area Weakness Scores")
-		img_buf = BytesIO()
-		plt.tight_layout()
-		fig.savefig(img_buf, format="PNG")
-		plt.close(fig)
-		img_buf.seek(0)
-		from reportlab.platypus import Image as RLImage
-		story.append(RLImage(img_buf, width=400, height=200))
-		story.append(Spacer(1, 12))
-
-	# Recommendations
-	story.append(Paragraph("Recommendations", styles["Heading3"]))
-	recs = Recommendation.objects.filter(user=request.user).order_by("-score")[:10]
-	if recs:
-		rows = [["Area", "Title", "Score"]] + [[r.area.title(), r.title, f"{r.score:.2f}"] for r in recs]
-		t = Table(rows, hAlign="LEFT")
-		t.setStyle(TableStyle([("GRID", (0,0), (-1,-1), 0.25, colors.grey), ("BACKGROUND", (0,0), (-1,0), colors.whitesmoke)]))
-		story.append(t)
-	else:
-		story.append(Paragraph("No recommendations at this time.", styles["Normal"]))
-
-	doc.build(story)
-	pdf = buffer.getvalue()
-	buffer.close()
-	resp = HttpResponse(pdf, content_type="application/pdf")
-	resp["Content-Disposition"] = "attachment; filename=ld_report.pdf"
-	return resp
+async def download_report(request):
+	user = await request.auser()
+	# Cached PDFs are served straight from disk until the underlying data changes
+	path = report_cache_path(await sync_to_async(report_cache_key)(user))
+	if path.exists():
+		return _pdf_response(path)
+	# Rendering happens in the report pool, never on the request's event loop
+	job = await sync_to_async(enqueue_report)(user)
+	return await arender(request, "reports/report_pending.html", {"job": _job_payload(job)})
 
 
 @login_required
-def analytics_dashboard(request):
-	areas = compute_user_area_scores(request.user)
+@require_POST
+async def report_job_create(request):
+	job = await sync_to_async(enqueue_report)(await request.auser())
+	return JsonResponse(_job_payload(job), status=202)
+
+
+@login_required
+async def report_job_status(request, job_id: int):
+	job = await aget_object_or_404(ReportJob, pk=job_id, user=await request.auser())
+	return JsonResponse(_job_payload(job))
+
+
+@login_required
+async def report_job_download(request, job_id: int):
+	job = await aget_object_or_404(ReportJob, pk=job_id, user=await request.auser(), status="done")
+	path = report_cache_path(job.cache_key)
+	if not path.exists():
+		raise Http404("Report is no longer cached; request a new one.")
+	return _pdf_response(path)
+
+
+staff_required = user_passes_test(lambda u: u.is_active and u.is_staff)
+
+
+@staff_required
+@require_POST
+def class_reports_create(request):
+	try:
+		raw = ",".join(request.POST.getlist("user_ids"))
+		user_ids = [int(v) for v in raw.split(",") if v.strip()]
+	except ValueError:
+		return JsonResponse({"error": "user_ids must be integers"}, status=400)
+	if not user_ids:
+		return JsonResponse({"error": "user_ids is required"}, status=400)
+	batch_id = enqueue_batch(user_ids)
+	return JsonResponse({"batch_id": batch_id, "status_url": reverse("class_reports_status", args=[batch_id])}, status=202)
+
+
+@staff_required
+def class_reports_status(request, batch_id: str):
+	out_dir = batch_dir(batch_id)
+	if not out_dir.is_dir():
+		raise Http404("Unknown batch")
+	manifest = load_manifest(out_dir)
+	finished = (out_dir / "reports.zip").exists()
+	return JsonResponse({
+		"batch_id": batch_id,
+		"finished": finished,
+		"reports": manifest,
+		"download_url": reverse("class_reports_download", args=[batch_id]) if finished else None,
+	})
+
+
+@staff_required
+def class_reports_download(request, batch_id: str):
+	path = batch_dir(batch_id) / "reports.zip"
+	if not path.exists():
+		raise Http404("Batch is not finished")
+	return FileResponse(open(path, "rb"), as_attachment=True, filename="class_reports.zip", content_type="application/zip")
+
+
+@login_required
+async def analytics_dashboard(request):
+	areas = await sync_to_async(compute_user_area_scores)(await request.auser())
 	labels = [a.area.title() for a in areas]
 	values = [a.score for a in areas]
-	img_data_uri = None
+	chart_url = None
+	chart_svg = None
 	if areas:
-		fig, ax = plt.subplots(figsize=(6, 3))
-		ax.bar(labels, values, color="#f28e2b")
-		ax.set_ylim(0, 1)
-		ax.set_ylabel("Weakness (0..1)")
-		ax.set_title("Area Weakness Scores")
-		buf = BytesIO()
-		plt.tight_layout()
-		fig.savefig(buf, format="png")
-		plt.close(fig)
-		buf.seek(0)
-		import base64
-		img_b64 = base64.b64encode(buf.read()).decode("ascii")
-		img_data_uri = f"data:image/png;base64,{img_b64}"
-	return render(request, "reports/dashboard.html", {"labels": labels, "values": values, "img_data_uri": img_data_uri})
+		if request.GET.get("chart") == "svg":
+			chart_svg = await asyncio.get_running_loop().run_in_executor(None, render_area_chart_svg, areas, DASHBOARD_COLOR)
+		else:
+			# Versioned URL: the browser can cache the image until the scores change
+			chart_url = reverse("area_chart", args=["png"]) + f"?v={area_chart_digest(areas, DASHBOARD_COLOR)}"
+	return await arender(request, "reports/dashboard.html", {"labels": labels, "values": values, "chart_url": chart_url, "chart_svg": chart_svg})
 
 
+@login_required
+async def area_chart(request, fmt: str):
+	areas = await sync_to_async(compute_user_area_scores)(await request.auser())
+	etag = f'"{area_chart_digest(areas, DASHBOARD_COLOR)}-{fmt}"'
+	resp = get_conditional_response(request, etag=etag)
+	if resp is None:
+		# Chart drawing is CPU-bound; run it in the default executor
+		loop = asyncio.get_running_loop()
+		if fmt == "svg":
+			resp = HttpResponse(await loop.run_in_executor(None, render_area_chart_svg, areas, DASHBOARD_COLOR), content_type="image/svg+xml")
+		else:
+			resp = HttpResponse(await loop.run_in_executor(None, render_area_chart_png, areas, DASHBOARD_COLOR), content_type="image/png")
+		resp["ETag"] = etag
+	patch_cache_control(resp, private=True, max_age=3600)
+	return resp